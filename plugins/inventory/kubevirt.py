@@ -21,6 +21,8 @@ description:
 - Uses V(*.kubevirt.[yml|yaml]) YAML configuration file to set parameter values.
 - By default it uses the active context in I(~/.kube/config) and will return all virtual machines
   for all namespaces the active user is authorized to access.
+- Inventory sources fetching the same objects, that is sources using the same connection, O(namespaces),
+  O(label_selector) and O(api_version), share their cache entries if O(cache) is enabled.
 
 extends_documentation_fragment:
 - kubevirt.core.kubevirt_auth_options
@@ -61,6 +63,8 @@ options:
     description:
     - Enable the use of C(Services) to establish an SSH connection to a virtual machine.
     - Services are only used if no O(network_name) was provided.
+    - Services are only fetched if they can be used, that is for namespaces with at least one
+      C(VirtualMachineInstance) reporting a network interface.
     type: bool
     default: True
   unset_ansible_port:
@@ -102,6 +106,223 @@ options:
     description:
     - Specify the used KubeVirt API version.
     default: "kubevirt.io/v1"
+  fetch_concurrency:
+    description:
+    - Number of namespaces to fetch objects from in parallel.
+    - Values lower than V(2) fetch namespaces sequentially.
+    type: int
+    default: 1
+    version_added: 2.4.0
+  cluster_wide_list:
+    description:
+    - List C(VirtualMachines), C(VirtualMachineInstances) and C(Services) once across all namespaces
+      instead of listing them namespace by namespace.
+    - Only used if no O(namespaces) were provided. Requires permissions to list these objects cluster wide.
+    - Falls back to listing namespace by namespace if a cluster wide list is forbidden.
+    type: bool
+    default: False
+    version_added: 2.4.0
+  chunk_size:
+    description:
+    - Return large lists in chunks of this size instead of requesting all objects at once.
+    - Chunks are processed one after another so only a single chunk is held in memory
+      as API objects at any time.
+    - Set to V(0) to disable chunking.
+    type: int
+    default: 0
+    version_added: 2.4.0
+  incremental_refresh:
+    description:
+    - Refresh cached objects incrementally instead of fetching all objects again.
+    - The cache stores the C(resourceVersion) of every list. On refresh a short watch is opened from
+      that version and the reported changes are applied to the cached objects.
+    - A full list is only fetched again if the API server reports the stored version as expired.
+    - 'Only takes effect if a previous cache entry is still available, for example on
+      C(meta: refresh_inventory) or when the inventory is run with C(--flush-cache).'
+    type: bool
+    default: False
+    version_added: 2.4.0
+  watch_timeout:
+    description:
+    - Number of seconds a watch opened by O(incremental_refresh) waits for changes.
+    - Watches of multiple namespaces are run in parallel according to O(fetch_concurrency).
+    type: int
+    default: 1
+    version_added: 2.4.0
+  snapshot_file:
+    description:
+    - Path to a snapshot of C(VirtualMachines), C(VirtualMachineInstances) and C(Services)
+      written by the watch process shipped in C(kubevirt.core.plugins.module_utils.snapshot).
+    - If set, objects are read from the snapshot instead of the API server.
+    - Objects are fetched from the API server if the snapshot is missing, older than
+      O(snapshot_max_age), was taken of another cluster or with a different O(api_version) or
+      O(label_selector).
+    - The snapshot contains the objects of all namespaces the watch process is authorized to access.
+      Objects are read with the permissions of the watch process instead of the configured
+      credentials, so restrict access to the snapshot file accordingly.
+      Make sure it was taken of the same cluster this inventory is configured for.
+    type: path
+    version_added: 2.4.0
+  snapshot_max_age:
+    description:
+    - Maximum age in seconds of a snapshot read from O(snapshot_file).
+    type: int
+    default: 60
+    version_added: 2.4.0
+  vm_cache_timeout:
+    description:
+    - Cache timeout in seconds of the cached C(VirtualMachines) of a namespace.
+    - The cache stores the objects of every namespace and kind in a separate entry. Expired entries are
+      fetched again on their own while all other entries are reused.
+    - Defaults to O(cache_timeout). O(cache_timeout) caps this value, because the cache plugin expires
+      all entries once they are older than O(cache_timeout) and all namespaces are discovered and
+      fetched again then. Larger values are lowered to O(cache_timeout) with a warning.
+    type: int
+    version_added: 2.4.0
+  vmi_cache_timeout:
+    description:
+    - Cache timeout in seconds of the cached C(VirtualMachineInstances) of a namespace.
+    - See O(vm_cache_timeout) for details.
+    type: int
+    version_added: 2.4.0
+  service_cache_timeout:
+    description:
+    - Cache timeout in seconds of the cached C(Services) of a namespace.
+    - See O(vm_cache_timeout) for details.
+    type: int
+    version_added: 2.4.0
+  discovery_cache_timeout:
+    description:
+    - Number of seconds the API discovery of the cluster is reused across runs.
+    - The discovered resources are stored on disk by the client of C(kubernetes.core). Resources missing
+      on the cluster, for example the OpenShift C(Project) and C(DNS) kinds, are remembered as well so
+      looking them up does not trigger a new discovery on every run.
+    - The discovery is refreshed once this timeout expired or a list request reports a discovered
+      resource as not found. The first run against a cluster keeps the discovery already stored by the
+      client and starts the timeout.
+    - Set to V(0) to never expire the discovery.
+    type: int
+    default: 3600
+    version_added: 2.4.0
+  direct_api_paths:
+    description:
+    - Request C(VirtualMachines), C(VirtualMachineInstances), C(Services), C(Namespaces) and the
+      OpenShift C(Projects) and C(DNS) config by their well-known URL paths, for example
+      C(/apis/kubevirt.io/v1/namespaces/{namespace}/virtualmachineinstances).
+    - This skips looking up these resources with API discovery, which makes the time of the first
+      request independent of the number of resources served by the cluster.
+    type: bool
+    default: False
+    version_added: 2.4.0
+  hostvars_include:
+    description:
+    - List of shell-style patterns, for example V(vmi_node_name) or V(vmi_guest_os_*), of
+      C(vm_*) and C(vmi_*) host variables to set from C(VirtualMachines) and C(VirtualMachineInstances).
+    - These variables are set from the C(status), labels, annotations, C(resourceVersion) and C(uid)
+      of the objects. If not specified, all of them are set.
+    - Variables that are not set cannot be used by O(compose), O(groups) and O(keyed_groups).
+    type: list
+    elements: str
+    version_added: 2.4.0
+  hostvars_exclude:
+    description:
+    - List of shell-style patterns of C(vm_*) and C(vmi_*) host variables not to set.
+    - Takes precedence over O(hostvars_include).
+    type: list
+    elements: str
+    version_added: 2.4.0
+  hostvars_annotations:
+    description:
+    - Set the C(vm_annotations) and C(vmi_annotations) host variables.
+    - Annotations are still used to detect Windows guests if disabled.
+    type: bool
+    default: True
+    version_added: 2.4.0
+  fetch_memo_ttl:
+    description:
+    - 'Number of seconds fetched objects are shared with other inventory sources parsed by the same
+      process, for example by AWX, C(ansible-runner) or C(meta: refresh_inventory).'
+    - Sources share fetched objects if they use the same connection, O(namespaces),
+      O(label_selector) and O(api_version). Objects are neither fetched again nor is a new
+      client created while they are shared.
+    - Objects are released once they expired. At most the objects of the 16 most recent fetches are kept.
+    - Set to V(0) to disable sharing fetched objects.
+    type: int
+    default: 0
+    version_added: 2.4.0
+  cache_plan:
+    description:
+    - Additionally cache the hosts, groups and host variables derived from the cached objects.
+    - On a cache hit the inventory is then rebuilt from this plan instead of being derived from the
+      objects again. Only O(compose), O(groups) and O(keyed_groups) are still evaluated for every host.
+    - The plan is derived again if any other option changed, if the cached objects were updated or if
+      any of its hosts was already added by another inventory source.
+    - Only takes effect if O(cache) is enabled.
+    type: bool
+    default: False
+    version_added: 2.4.0
+  cache_mode:
+    description:
+    - How expired cache entries are handled if O(cache) is enabled.
+    - With V(blocking) expired objects are fetched again before the inventory is populated.
+    - With V(stale_while_revalidate) the inventory is populated from the expired objects right away if
+      they expired less than O(cache_max_stale) seconds ago. The objects are then fetched again by a
+      detached C(ansible-inventory) process and the cache is updated for the next run. Objects expired
+      longer ago are fetched again before the inventory is populated.
+    - V(stale_while_revalidate) requires a persistent cache plugin like C(ansible.builtin.jsonfile).
+      Cache entries are kept by the cache plugin for O(cache_timeout) plus O(cache_max_stale) seconds.
+    - The detached process reads the same inventory source with the environment and working directory
+      of the current process. Collections only available to a playbook, e.g. next to it, are not found
+      by it.
+    type: str
+    choices:
+    - blocking
+    - stale_while_revalidate
+    default: blocking
+    version_added: 2.4.0
+  cache_max_stale:
+    description:
+    - Maximum number of seconds cached objects may be expired to still be used with
+      O(cache_mode=stale_while_revalidate) or probed with O(freshness_probe).
+    type: int
+    default: 3600
+    version_added: 2.4.0
+  freshness_probe:
+    description:
+    - Before expired cached objects are fetched again, watch every cached list for up to
+      O(watch_timeout) seconds starting from the C(resourceVersion) stored in the cache. A watch ends
+      early on the first bookmark sent by the API server.
+    - If O(namespaces) is not set, the list of namespaces or projects is probed as well, so
+      namespaces created since are not missed.
+    - If no objects were added, modified or deleted since, the cached objects are reused as they are
+      and only their age is reset. Otherwise they are fetched again as usual.
+    - At least 16 lists are probed in parallel, more if O(fetch_concurrency) is higher.
+    - Expired cache entries are kept for O(cache_max_stale) seconds to be probed.
+    - Only takes effect if O(cache) is enabled.
+    type: bool
+    default: False
+    version_added: 2.4.0
+  cache_lock_timeout:
+    description:
+    - If set, only one process at a time fetches objects to update the cache, for example when
+      the scheduled jobs of an AWX execution node start together after the cache expired.
+    - The process updating the cache holds a lock file next to the cache entries, or in the
+      temporary directory if O(cache_connection) is not a directory. Other processes wait for the
+      lock and then use the updated cache entries.
+    - Number of seconds to wait for the lock. Objects are fetched anyway if the lock was not released
+      in time or the cache entries were not updated.
+    - Only takes effect if O(cache) is enabled.
+    type: int
+    version_added: 2.4.0
+  resource_version:
+    description:
+    - Resource version to list objects at, with C(resourceVersionMatch=NotOlderThan).
+    - Set to V("0") to serve lists from the watch cache of the API server instead of reading them
+      from etcd. This lowers the load of the API server and etcd, but listed objects may be slightly
+      out of date.
+    - The probe of O(freshness_probe) always reads from etcd.
+    type: str
+    version_added: 2.4.0
   connections:
     description:
     - Optional list of cluster connection settings.
@@ -140,33 +361,92 @@ EXAMPLES = """
 - plugin: kubevirt.core.kubevirt
   kubeconfig: /path/to/config
   context: 'awx/192-168-64-4:8443/developer'
+
+# Read virtual machines from a local snapshot kept up to date by the watch process
+- plugin: kubevirt.core.kubevirt
+  snapshot_file: /var/cache/kubevirt/snapshot.json
+  snapshot_max_age: 30
+
+# Only set a few variables of virtual machines and drop annotations to keep the inventory small
+- plugin: kubevirt.core.kubevirt
+  hostvars_include:
+    - vmi_node_name
+    - vmi_interfaces
+    - vmi_guest_os_*
+    - vm_printable_status
+  hostvars_annotations: false
+
+# Start right away from objects cached by a previous run and refresh them in the background
+- plugin: kubevirt.core.kubevirt
+  cache: true
+  cache_plugin: ansible.builtin.jsonfile
+  cache_connection: /var/cache/kubevirt/inventory
+  cache_timeout: 300
+  cache_mode: stale_while_revalidate
+  cache_max_stale: 1800
+
+# Serve lists from the watch cache of the API server instead of reading them from etcd
+- plugin: kubevirt.core.kubevirt
+  resource_version: "0"
 """
 
-from dataclasses import dataclass, InitVar
-from json import loads
+import fcntl
+import os
+import subprocess
+import sys
+import tempfile
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from copy import deepcopy
+from dataclasses import asdict, dataclass, InitVar
+from fnmatch import fnmatchcase
+from hashlib import sha256
+from json import dumps, loads
 from re import compile as re_compile
+from threading import Lock
+from time import sleep, time
 from typing import (
     Any,
+    Callable,
     Dict,
+    Iterator,
     List,
     Optional,
+    Tuple,
 )
+from uuid import uuid4
 
 # Handle import errors of python kubernetes client.
 # Set HAS_K8S_MODULE_HELPER and k8s_import exception accordingly to
 # potentially print a warning to the user if the client is missing.
 try:
-    from kubernetes.dynamic.exceptions import DynamicApiError, ResourceNotFoundError
+    from kubernetes.client.rest import ApiException
+    from kubernetes.dynamic.exceptions import (
+        DynamicApiError,
+        NotFoundError,
+        ResourceNotFoundError,
+    )
 
     HAS_K8S_MODULE_HELPER = True
     K8S_IMPORT_EXCEPTION = None
 except ImportError as e:
 
+    class ApiException(Exception):
+        """
+        Dummy class, mainly used for ansible-test sanity.
+        """
+
     class DynamicApiError(Exception):
         """
         Dummy class, mainly used for ansible-test sanity.
         """
 
+    class NotFoundError(Exception):
+        """
+        Dummy class, mainly used for ansible-test sanity.
+        """
+
     class ResourceNotFoundError(Exception):
         """
         Dummy class, mainly used for ansible-test sanity.
@@ -175,13 +455,25 @@ except ImportError as e:
     HAS_K8S_MODULE_HELPER = False
     K8S_IMPORT_EXCEPTION = e
 
-from ansible.plugins.inventory import BaseInventoryPlugin, Constructable, Cacheable
+from jinja2 import Environment, nodes
+from jinja2.exceptions import TemplateSyntaxError
+
+from ansible.errors import AnsibleParserError
+from ansible.module_utils.common.text.converters import to_native
+from ansible.plugins.inventory import (
+    BaseInventoryPlugin,
+    Constructable,
+    Cacheable,
+    get_cache_plugin,
+)
+from ansible.utils.vars import combine_vars
 
-# Handle import errors of trust_as_template.
-# It is only available on ansible-core >=2.19.
+# Handle import errors of trust_as_template and is_trusted_as_template.
+# They are only available on ansible-core >=2.19.
 try:
-    from ansible.template import trust_as_template
+    from ansible.template import is_trusted_as_template, trust_as_template
 except ImportError:
+    is_trusted_as_template = None
     trust_as_template = None
 
 
@@ -190,6 +482,14 @@ from ansible_collections.kubernetes.core.plugins.module_utils.k8s.client import
     K8SClient,
 )
 
+from ansible_collections.kubevirt.core.plugins.module_utils.discovery import (
+    DiscoveryCache,
+)
+from ansible_collections.kubevirt.core.plugins.module_utils.snapshot import (
+    find_in_snapshot,
+    read_snapshot,
+)
+
 ANNOTATION_KUBEVIRT_IO_CLUSTER_PREFERENCE_NAME = "kubevirt.io/cluster-preference-name"
 ANNOTATION_KUBEVIRT_IO_PREFERENCE_NAME = "kubevirt.io/preference-name"
 ANNOTATION_VM_KUBEVIRT_IO_OS = "vm.kubevirt.io/os"
@@ -200,6 +500,94 @@ ID_MSWINDOWS = "mswindows"
 SERVICE_TARGET_PORT_SSH = 22
 SERVICE_TARGET_PORT_WIN_MGMT_HTTP = 5985
 SERVICE_TARGET_PORT_WIN_MGMT_HTTPS = 5986
+KIND_VM = "VirtualMachine"
+KIND_VMI = "VirtualMachineInstance"
+KIND_SERVICE = "Service"
+KIND_NAMESPACE = "Namespace"
+KIND_PROJECT = "Project"
+HTTP_STATUS_NOT_FOUND = 404
+HTTP_STATUS_GONE = 410
+# Seconds between attempts to acquire the lock of the cache
+CACHE_LOCK_INTERVAL = 0.1
+# Environment variable telling ansible-inventory it was started to refresh the
+# cache entries with the cache key set as its value
+REVALIDATE_ENV_VAR = "KUBEVIRT_INVENTORY_REVALIDATE"
+# Minimum number of lists probed in parallel by freshness_probe, as the
+# watches mostly wait for the API server
+FRESHNESS_PROBE_CONCURRENCY = 16
+
+# Version of the shape of cached objects, bumped whenever _prune_object changes
+# to invalidate cache entries written by other versions of this inventory.
+CACHE_FORMAT_VERSION = 2
+# Metadata of fetched objects read by this inventory, all other metadata like
+# managedFields is dropped before objects are cached.
+PRUNED_METADATA_KEYS = (
+    "name",
+    "namespace",
+    "uid",
+    "labels",
+    "annotations",
+    "resourceVersion",
+)
+# Options selecting the cluster and the credentials used to fetch objects
+FETCH_CONNECTION_OPTIONS = (
+    "host",
+    "api_key",
+    "kubeconfig",
+    "context",
+    "username",
+    "password",
+    "client_cert",
+    "client_key",
+    "ca_cert",
+    "validate_certs",
+    "proxy",
+    "no_proxy",
+    "proxy_headers",
+    "impersonate_user",
+    "impersonate_groups",
+)
+
+# Plain variable paths like vmi_node_name or vm_labels['app'] used in compose
+# and keyed_groups, which can be evaluated without the templar.
+SIMPLE_EXPRESSION_ROOT_PATTERN = re_compile(r"\s*([A-Za-z_][A-Za-z0-9_]*)")
+SIMPLE_EXPRESSION_SEGMENT_PATTERN = re_compile(
+    r"\.([A-Za-z_][A-Za-z0-9_]*)|\[\s*(?:'([^'\\]*)'|\"([^\"\\]*)\"|([0-9]+))\s*\]"
+)
+SIMPLE_EXPRESSION_LITERALS = ("true", "false", "none", "True", "False", "None")
+
+# Returned if a simple expression cannot be evaluated without the templar
+UNRESOLVED = object()
+
+# Maximum number of memoized results of compose, groups and keyed_groups expressions
+TEMPLATE_RESULTS_CACHE_SIZE = 4096
+# Filters whose results do not only depend on their input
+NONDETERMINISTIC_FILTERS = (
+    "password_hash",
+    "random",
+    "random_mac",
+    "shuffle",
+    "strftime",
+)
+
+# API group, plural name and scope of the resources used by this inventory.
+# They allow to build the URL paths of these resources without API discovery.
+KNOWN_RESOURCES = {
+    "Namespace": ("", "namespaces", False),
+    "Project": ("project.openshift.io", "projects", False),
+    "DNS": ("config.openshift.io", "dnses", False),
+    KIND_SERVICE: ("", "services", True),
+    KIND_VM: ("kubevirt.io", "virtualmachines", True),
+    KIND_VMI: ("kubevirt.io", "virtualmachineinstances", True),
+}
+
+
+# Results fetched by any source parsed by this process, keyed by the fingerprint
+# of the fetch and shared for fetch_memo_ttl seconds.
+_fetch_memo = {}
+# Maximum number of fetches kept in _fetch_memo
+FETCH_MEMO_SIZE = 16
+_fetch_memo_lock = Lock()
 
 
 class KubeVirtInventoryException(Exception):
@@ -208,6 +596,58 @@ class KubeVirtInventoryException(Exception):
     """
 
 
+class DirectResource:
+    """
+    This class gets and watches a resource with a known URL path through the
+    raw API client, without looking up the resource with API discovery.
+    """
+
+    def __init__(
+        self, client: Any, api_version: str, name: str, namespaced: bool
+    ) -> None:
+        self.client = client
+        self.api_version = api_version
+        self.name = name
+        self.namespaced = namespaced
+
+    def path(self, name: Optional[str] = None, namespace: Optional[str] = None) -> str:
+        """
+        path returns the URL path of the resource or of a single object.
+        """
+        prefix = "/apis" if "/" in self.api_version else "/api"
+        path = f"{prefix}/{self.api_version}"
+        if self.namespaced and namespace:
+            path += f"/namespaces/{namespace}"
+        path += f"/{self.name}"
+        if name:
+            path += f"/{name}"
+        return path
+
+    def get(
+        self, name: Optional[str] = None, namespace: Optional[str] = None, **kwargs
+    ) -> Any:
+        """
+        get gets a single object or lists objects of the resource. A list
+        answered with 404 means the resource does not exist on the cluster.
+        """
+        try:
+            return self.client.request(
+                "get", self.path(name=name, namespace=namespace), **kwargs
+            )
+        except NotFoundError as exc:
+            if name:
+                raise
+            raise ResourceNotFoundError(
+                f"No matches found for {self.api_version}/{self.name}"
+            ) from exc
+
+    def watch(self, **kwargs) -> Iterator[Dict]:
+        """
+        watch streams the events of the resource.
+        """
+        return self.client.watch(self, **kwargs)
+
+
 @dataclass
 class InventoryOptions:
     """
@@ -227,6 +667,28 @@ class InventoryOptions:
     host_format: Optional[str] = None
     namespaces: Optional[List[str]] = None
     name: Optional[str] = None
+    fetch_concurrency: Optional[int] = None
+    cluster_wide_list: Optional[bool] = None
+    chunk_size: Optional[int] = None
+    incremental_refresh: Optional[bool] = None
+    watch_timeout: Optional[int] = None
+    snapshot_file: Optional[str] = None
+    snapshot_max_age: Optional[int] = None
+    vm_cache_timeout: Optional[int] = None
+    vmi_cache_timeout: Optional[int] = None
+    service_cache_timeout: Optional[int] = None
+    discovery_cache_timeout: Optional[int] = None
+    direct_api_paths: Optional[bool] = None
+    hostvars_include: Optional[List[str]] = None
+    hostvars_exclude: Optional[List[str]] = None
+    hostvars_annotations: Optional[bool] = None
+    cache_plan: Optional[bool] = None
+    fetch_memo_ttl: Optional[int] = None
+    cache_mode: Optional[str] = None
+    cache_max_stale: Optional[int] = None
+    cache_lock_timeout: Optional[int] = None
+    freshness_probe: Optional[bool] = None
+    resource_version: Optional[str] = None
     config_data: InitVar[Optional[Dict]] = None
 
     def __post_init__(self, config_data: Optional[Dict]) -> None:
@@ -295,6 +757,195 @@ class InventoryOptions:
             else config_data.get("namespaces")
         )
         self.name = self.name if self.name is not None else config_data.get("name")
+        self.fetch_concurrency = (
+            self.fetch_concurrency
+            if self.fetch_concurrency is not None
+            else config_data.get("fetch_concurrency", 1)
+        )
+        self.cluster_wide_list = (
+            self.cluster_wide_list
+            if self.cluster_wide_list is not None
+            else config_data.get("cluster_wide_list", False)
+        )
+        self.chunk_size = (
+            self.chunk_size
+            if self.chunk_size is not None
+            else config_data.get("chunk_size", 0)
+        )
+        self.incremental_refresh = (
+            self.incremental_refresh
+            if self.incremental_refresh is not None
+            else config_data.get("incremental_refresh", False)
+        )
+        self.watch_timeout = (
+            self.watch_timeout
+            if self.watch_timeout is not None
+            else config_data.get("watch_timeout", 1)
+        )
+        self.snapshot_file = (
+            self.snapshot_file
+            if self.snapshot_file is not None
+            else config_data.get("snapshot_file")
+        )
+        self.snapshot_max_age = (
+            self.snapshot_max_age
+            if self.snapshot_max_age is not None
+            else config_data.get("snapshot_max_age", 60)
+        )
+        self.vm_cache_timeout = (
+            self.vm_cache_timeout
+            if self.vm_cache_timeout is not None
+            else config_data.get("vm_cache_timeout")
+        )
+        self.vmi_cache_timeout = (
+            self.vmi_cache_timeout
+            if self.vmi_cache_timeout is not None
+            else config_data.get("vmi_cache_timeout")
+        )
+        self.service_cache_timeout = (
+            self.service_cache_timeout
+            if self.service_cache_timeout is not None
+            else config_data.get("service_cache_timeout")
+        )
+        self.discovery_cache_timeout = (
+            self.discovery_cache_timeout
+            if self.discovery_cache_timeout is not None
+            else config_data.get("discovery_cache_timeout", 3600)
+        )
+        self.direct_api_paths = (
+            self.direct_api_paths
+            if self.direct_api_paths is not None
+            else config_data.get("direct_api_paths", False)
+        )
+        self.hostvars_include = (
+            self.hostvars_include
+            if self.hostvars_include is not None
+            else config_data.get("hostvars_include")
+        )
+        self.hostvars_exclude = (
+            self.hostvars_exclude
+            if self.hostvars_exclude is not None
+            else config_data.get("hostvars_exclude")
+        )
+        self.hostvars_annotations = (
+            self.hostvars_annotations
+            if self.hostvars_annotations is not None
+            else config_data.get("hostvars_annotations", True)
+        )
+        self.cache_plan = (
+            self.cache_plan
+            if self.cache_plan is not None
+            else config_data.get("cache_plan", False)
+        )
+        self.fetch_memo_ttl = (
+            self.fetch_memo_ttl
+            if self.fetch_memo_ttl is not None
+            else config_data.get("fetch_memo_ttl", 0)
+        )
+        self.cache_mode = (
+            self.cache_mode
+            if self.cache_mode is not None
+            else config_data.get("cache_mode", "blocking")
+        )
+        self.cache_max_stale = (
+            self.cache_max_stale
+            if self.cache_max_stale is not None
+            else config_data.get("cache_max_stale", 3600)
+        )
+        self.cache_lock_timeout = (
+            self.cache_lock_timeout
+            if self.cache_lock_timeout is not None
+            else config_data.get("cache_lock_timeout")
+        )
+        self.freshness_probe = (
+            self.freshness_probe
+            if self.freshness_probe is not None
+            else config_data.get("freshness_probe", False)
+        )
+        self.resource_version = (
+            self.resource_version
+            if self.resource_version is not None
+            else config_data.get("resource_version")
+        )
+
+
+class TemplateResultsCache:
+    """
+    This class memoizes results of expressions and evicts the least recently
+    used results once it is full.
+    """
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._results = OrderedDict()
+
+    def get(self, key: Tuple) -> Any:
+        """
+        get returns a copy of a memoized result or UNRESOLVED.
+        """
+        if key not in self._results:
+            return UNRESOLVED
+        self._results.move_to_end(key)
+        value = self._results[key]
+        return deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    def set(self, key: Tuple, value: Any) -> None:
+        """
+        set memoizes a copy of a result.
+        """
+        self._results[key] = (
+            deepcopy(value) if isinstance(value, (dict, list)) else value
+        )
+        self._results.move_to_end(key)
+        if len(self._results) > self.maxsize:
+            self._results.popitem(last=False)
+
+
+@dataclass
+class ConstructedOptions:
+    """
+    This class holds the options of Constructable, read once per parse.
+    """
+
+    compose: Dict
+    groups: Dict
+    keyed_groups: List[Dict]
+    strict: bool
+    simple_expressions: Dict[str, Tuple]
+    referenced_variables: Dict[str, Tuple[str, ...]]
+    template_results: TemplateResultsCache
+
+
+@dataclass(slots=True)
+class ObjectRecord:
+    """
+    This class holds the fields of a VM or VMI needed to populate the
+    inventory, so the full objects are not carried through populating.
+    """
+
+    name: Optional[str]
+    namespace: Optional[str]
+    uid: Optional[str]
+    labels: Dict
+    annotations: Dict
+    resource_version: Optional[str]
+    status: Dict
+
+    @classmethod
+    def from_obj(cls, obj: Dict) -> "ObjectRecord":
+        """
+        from_obj creates a record from a VM or VMI as returned by the K8S API.
+        """
+        metadata = obj.get("metadata") or {}
+        return cls(
+            name=metadata.get("name"),
+            namespace=metadata.get("namespace"),
+            uid=metadata.get("uid"),
+            labels=metadata.get("labels") or {},
+            annotations=metadata.get("annotations") or {},
+            resource_version=metadata.get("resourceVersion"),
+            status=obj.get("status") or {},
+        )
 
 
 class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
@@ -307,6 +958,25 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
     # Used to convert camel case variable names into snake case
     _snake_case_pattern = re_compile(r"(?<=[a-z])(?=[A-Z])|(?<=[A-Z])(?=[A-Z][a-z])")
 
+    def __init__(self) -> None:
+        super().__init__()
+        # Resource versions of the lists fetched by _iter_resources,
+        # keyed by kind and namespace.
+        self._resource_versions = {}
+        # Persisted discovery state of the cluster, set once a client exists.
+        self._discovery = None
+        # Resources resolved before fetching concurrently, keyed by API version
+        # and kind, and the lock serializing their rediscovery.
+        self._resources = {}
+        self._resources_lock = Lock()
+        # Options of Constructable, set once the inventory is populated.
+        self._constructed = None
+        # Names of the host variables of VM and VMI fields keyed by prefix
+        # and field, None if the variable is filtered out.
+        self._hostvar_names = {}
+        # Operations of populating the inventory, only recorded with cache_plan.
+        self._operations = None
+
     @staticmethod
     def _get_default_hostname(host: str) -> str:
         """
@@ -358,22 +1028,54 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         )
 
     @staticmethod
-    def _find_service_with_target_port(
-        services: List[Dict], target_port: int
-    ) -> Optional[Dict]:
+    def _prune_object(kind: str, obj: Dict) -> Dict:
         """
-        _find_service_with_target_port returns the first found service with a given
-        target port in the passed in list of services or otherwise None.
+        _prune_object drops the fields of a fetched object which are not read
+        by this inventory, like managedFields and the spec of VMs and VMIs.
+        Annotations are kept as they are exposed as host variables.
         """
-        for service in services:
-            if (
-                (ports := service.get("spec", {}).get("ports")) is not None
-                and len(ports) == 1
-                and ports[0].get("targetPort", 0) == target_port
-            ):
-                return service
+        if kind not in (KIND_VM, KIND_VMI, KIND_SERVICE):
+            return obj
 
-        return None
+        obj = dict(obj)
+        if metadata := obj.get("metadata"):
+            obj["metadata"] = {
+                key: metadata[key] for key in PRUNED_METADATA_KEYS if key in metadata
+            }
+        # Only the spec of Services is read
+        if kind != KIND_SERVICE and "spec" in obj:
+            obj["spec"] = {}
+        return obj
+
+    def _get_records(self, objs: List[Dict]) -> Dict[str, ObjectRecord]:
+        """
+        _get_records validates VMs or VMIs and maps the names of valid ones
+        to their records.
+        """
+        return {
+            obj["metadata"]["name"]: ObjectRecord.from_obj(obj)
+            for obj in objs
+            if self._obj_is_valid(obj)
+        }
+
+    @staticmethod
+    def _index_services(
+        services: Dict[str, List[Dict]],
+    ) -> Dict[Tuple[str, int], Dict]:
+        """
+        _index_services maps the domain and the target port of valid services
+        with a single port to the first found service. This allows to look up
+        the service of a VMI without scanning all services of its domain.
+        """
+        index = {}
+        for domain, domain_services in services.items():
+            for service in domain_services:
+                ports = service.get("spec", {}).get("ports")
+                if not InventoryModule._obj_is_valid(service) or len(ports or []) != 1:
+                    continue
+                index.setdefault((domain, ports[0].get("targetPort", 0)), service)
+
+        return index
 
     @staticmethod
     def _get_host_from_service(
@@ -468,147 +1170,1494 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         super().parse(inventory, loader, path)
 
         config_data = self._read_config_data(path)
-        cache_key = self.get_cache_key(path)
         user_cache_setting = self.get_option("cache")
         attempt_to_read_cache = user_cache_setting and cache
         cache_needs_update = user_cache_setting and not cache
 
         self._connections_compatibility(config_data)
         opts = InventoryOptions(config_data=config_data)
+        if user_cache_setting:
+            self._check_cache_timeouts(opts)
+        # Sources fetching the same objects share their cache entries
+        fingerprint = self._get_fetch_fingerprint(config_data, opts)
+        cache_key = self.get_cache_key(fingerprint)
+
+        stale_while_revalidate = (
+            user_cache_setting and opts.cache_mode == "stale_while_revalidate"
+        )
+        # Keep expired entries readable for cache_max_stale seconds
+        max_stale = (
+            opts.cache_max_stale
+            if stale_while_revalidate or (user_cache_setting and opts.freshness_probe)
+            else 0
+        )
+        if max_stale:
+            self._cache = self._load_cache_plugin(max_stale)
 
-        results = {}
-        if attempt_to_read_cache:
-            try:
-                results = self.cache[cache_key]
-            except KeyError:
-                cache_needs_update = True
-        if not attempt_to_read_cache or cache_needs_update:
-            results = self._fetch_objects(get_api_client(**config_data), opts)
+        cached, expired = None, None
+        if attempt_to_read_cache or (
+            user_cache_setting and (opts.incremental_refresh or opts.freshness_probe)
+        ):
+            cached, expired = self._read_cache(cache_key, opts)
+
+        entries = None
+        plan = None
+        revalidate = False
+        if attempt_to_read_cache and cached is not None and expired == []:
+            results = cached
+            if opts.cache_plan:
+                plan = self._read_plan(cache_key, results, opts)
+        elif (
+            stale_while_revalidate
+            and attempt_to_read_cache
+            and cached is not None
+            and self._cache_within_max_stale(cache_key, opts)
+        ):
+            results = cached
+            revalidate = True
+            if opts.cache_plan:
+                plan = self._read_plan(cache_key, results, opts)
+        else:
+            cache_needs_update = user_cache_setting
+            lock_timeout = opts.cache_lock_timeout if user_cache_setting else None
+            with self._lock_cache(cache_key, lock_timeout) as waited:
+                if waited:
+                    # Another process probably updated the cache meanwhile
+                    self._cache = self._load_cache_plugin(max_stale)
+                    cached, expired = self._read_cache(cache_key, opts)
+                if waited and cached is not None and expired == []:
+                    results = cached
+                    cache_needs_update = False
+                else:
+                    results, entries = self._fetch_results(
+                        config_data,
+                        fingerprint,
+                        cached,
+                        expired if attempt_to_read_cache or waited else None,
+                        opts,
+                        probe=opts.freshness_probe
+                        and cached is not None
+                        and self._cache_within_max_stale(cache_key, opts),
+                    )
+                    if cache_needs_update and lock_timeout is not None:
+                        # Persist the cache before waiting processes read it
+                        self._write_cache(cache_key, results, entries)
+                        self.cache.set_cache()
+                        cache_needs_update = False
         if cache_needs_update:
-            self.cache[cache_key] = results
-
-        self._populate_inventory(results, opts)
-
-    def _connections_compatibility(self, config_data: Dict) -> None:
-        """
-        _connections_compatibility ensures compatibility with the connection
-        parameter found in earlier versions of this inventory plugin (<1.5.0).
-        """
-        collection_name = "kubevirt.core"
-        version_removed_in = "3.0.0"
+            self._write_cache(cache_key, results, entries)
 
-        if (connections := config_data.get("connections")) is None:
-            return
+        if revalidate and os.environ.get(REVALIDATE_ENV_VAR) == cache_key:
+            # This is the detached process started to refresh the cache. It
+            # refreshes the cache before populating consumes the objects.
+            self._revalidate_cache(
+                config_data, fingerprint, cache_key, cached, expired, opts
+            )
 
-        self.display.deprecated(
-            msg="The 'connections' parameter is deprecated and now supports only a single list entry.",
-            version=version_removed_in,
-            collection_name=collection_name,
+        options_hash = self._get_options_hash(opts)
+        # Plans are not derived from stale objects, writing one could also
+        # overwrite the cache entries updated by the revalidation
+        self._operations = (
+            []
+            if user_cache_setting
+            and opts.cache_plan
+            and plan is None
+            and not revalidate
+            else None
         )
+        if plan is not None:
+            self._populate_inventory_from_plan(results, opts, plan)
+        else:
+            self._populate_inventory(results, opts)
+        self._write_plan(cache_key, options_hash)
+        self._operations = None
 
-        if not isinstance(connections, list):
-            raise KubeVirtInventoryException("Expecting connections to be a list.")
+        if revalidate and os.environ.get(REVALIDATE_ENV_VAR) != cache_key:
+            self.display.vvv("Refreshing expired cache entries in the background")
+            self._start_revalidation(path, cache_key)
 
-        if len(connections) == 1:
-            if not isinstance(connections[0], dict):
-                raise KubeVirtInventoryException(
-                    "Expecting connection to be a dictionary."
-                )
-            # Copy the single connections entry into the top level
-            for k, v in connections[0].items():
-                config_data[k] = v
-            self.display.deprecated(
-                msg="Move all of your connection parameters to the configuration top level.",
-                version=version_removed_in,
-                collection_name=collection_name,
-            )
-        elif len(connections) > 1:
-            self.display.deprecated(
-                msg="Split your connections into multiple configuration files.",
-                version="2.0.0",
-                collection_name=collection_name,
-                removed=True,
+    def _start_revalidation(self, path: str, cache_key: str) -> None:
+        """
+        _start_revalidation runs ansible-inventory with the inventory source
+        in a detached process, which refreshes the expired cache entries.
+        Threads are not used, as ansible-playbook forks its workers while the
+        inventory is in use.
+        """
+        try:
+            subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    "ansible.cli.inventory",
+                    "-i",
+                    path,
+                    "--list",
+                    "--output",
+                    os.devnull,
+                ],
+                env={**os.environ, REVALIDATE_ENV_VAR: cache_key},
+                stdin=subprocess.DEVNULL,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+                start_new_session=True,
             )
+        except OSError as exc:
+            self.display.warning(f"Failed to refresh the inventory cache: {exc}")
 
-    def _fetch_objects(self, client: Any, opts: InventoryOptions) -> Dict:
+    def _fetch_results(
+        self,
+        config_data: Dict,
+        fingerprint: str,
+        cached: Optional[Dict],
+        expired: Optional[List[Tuple[str, str]]],
+        opts: InventoryOptions,
+        probe: bool = False,
+    ) -> Tuple[Dict, Optional[List[Tuple[str, str]]]]:
         """
-        fetch_objects fetches all relevant objects from the K8S API.
+        _fetch_results gets the objects from the fetch memo, from the snapshot
+        or from the API server. Expired entries of cached results are fetched
+        again on their own, with incremental_refresh cached results are
+        refreshed. With probe, cached results are reused if their lists did
+        not change. It returns the results and the cache entries that need to
+        be written, None meaning all of them.
         """
-        namespaces = {}
-        for namespace in (
-            opts.namespaces
-            if opts.namespaces
-            else self._get_available_namespaces(client)
+        results = self._read_fetch_memo(fingerprint, opts.fetch_memo_ttl)
+        if results is not None:
+            return results, None
+
+        client = get_api_client(**config_data)
+        if opts.snapshot_file:
+            results = self._fetch_objects_from_snapshot(client, opts)
+            if results is not None:
+                return results, None
+
+        entries = None
+        self._discovery = self._load_discovery_cache(client, opts)
+        if (
+            probe
+            and cached is not None
+            and self._probe_resource_versions(
+                client, cached.get("resource_versions") or {}, expired, opts
+            )
         ):
-            vms = self._get_vms_for_namespace(client, namespace, opts)
-            vmis = self._get_vmis_for_namespace(client, namespace, opts)
+            self.display.vvv("Cached objects did not change, reusing them")
+            results = cached
+            entries = expired
+        elif cached is not None and expired:
+            results = self._refetch_expired_objects(client, cached, expired, opts)
+            entries = expired
+        elif cached is not None and opts.incremental_refresh:
+            results = self._refresh_objects(client, cached, opts)
+        else:
+            results = self._fetch_objects(client, opts)
+        if self._discovery is not None:
+            self._discovery.save()
+        self._write_fetch_memo(fingerprint, results, opts.fetch_memo_ttl)
 
-            if not vms and not vmis:
-                # Continue if no VMs and VMIs were found to avoid adding empty groups.
-                continue
+        return results, entries
 
-            namespaces[namespace] = {
-                "vms": vms,
-                "vmis": vmis,
-                "services": self._get_services_for_namespace(client, namespace),
-            }
+    def _revalidate_cache(
+        self,
+        config_data: Dict,
+        fingerprint: str,
+        cache_key: str,
+        cached: Dict,
+        expired: Optional[List[Tuple[str, str]]],
+        opts: InventoryOptions,
+    ) -> None:
+        """
+        _revalidate_cache fetches the objects of stale cached results again
+        and writes them to the cache for the next run. It runs in the detached
+        process started by _start_revalidation after the inventory was
+        populated, so it writes to a cache plugin instance of its own.
+        """
+        lock_timeout = 0 if opts.cache_lock_timeout is not None else None
+        try:
+            with self._lock_cache(cache_key, lock_timeout) as waited:
+                # Another process is already updating the cache
+                if waited:
+                    return
+                results, entries = self._fetch_results(
+                    config_data,
+                    fingerprint,
+                    cached,
+                    expired,
+                    opts,
+                    probe=opts.freshness_probe,
+                )
+                cache = self._load_cache_plugin(opts.cache_max_stale)
+                self._write_cache(cache_key, results, entries, cache)
+                cache.set_cache()
+        except Exception as exc:
+            self.display.warning(f"Failed to refresh the inventory cache: {exc}")
 
-        return {
-            "default_hostname": self._get_default_hostname(client.configuration.host),
-            "cluster_domain": self._get_cluster_domain(client),
-            "namespaces": namespaces,
+    def _load_cache_plugin(self, max_stale: int = 0) -> Any:
+        """
+        _load_cache_plugin loads the configured cache plugin like the base
+        inventory plugin does, but keeps its entries max_stale seconds longer
+        than cache_timeout. The loaded plugin has not read any entries yet.
+        """
+        cache_timeout = self.get_option("cache_timeout")
+        options = {
+            "_uri": self.get_option("cache_connection"),
+            "_timeout": cache_timeout + max_stale if cache_timeout else cache_timeout,
+            "_prefix": self.get_option("cache_prefix"),
         }
+        return get_cache_plugin(
+            self.get_option("cache_plugin"),
+            **{key: value for key, value in options.items() if value is not None},
+        )
 
-    def _get_cluster_domain(self, client: K8SClient) -> Optional[str]:
+    @staticmethod
+    def _load_discovery_cache(
+        client: Any, opts: InventoryOptions
+    ) -> Optional[DiscoveryCache]:
         """
-        _get_cluster_domain tries to get the base domain of an OpenShift cluster.
+        _load_discovery_cache loads the persisted discovery state of the cluster
+        and refreshes the discovery of the client if the state expired.
+        It returns None if direct_api_paths makes the discovery unnecessary.
         """
-        try:
-            v1_dns = client.resources.get(
-                api_version="config.openshift.io/v1", kind="DNS"
-            )
-        except Exception:
-            # If resource not found return None
-            return None
-        try:
-            obj = v1_dns.get(name="cluster")
-        except DynamicApiError as exc:
-            self.display.debug(
-                f"Failed to fetch cluster DNS config: {self._format_dynamic_api_exc(exc)}"
-            )
+        if opts.direct_api_paths:
             return None
-        return obj.get("spec", {}).get("baseDomain")
 
-    def _get_resources(
-        self, client: K8SClient, api_version: str, kind: str, **kwargs
-    ) -> List[Dict]:
+        discovery = DiscoveryCache(
+            client.configuration.host, opts.discovery_cache_timeout
+        )
+        if discovery.expired:
+            discovery.refresh(client)
+        return discovery
+
+    def _get_resource(
+        self,
+        client: K8SClient,
+        api_version: str,
+        kind: str,
+        opts: Optional[InventoryOptions] = None,
+    ) -> Any:
         """
-        _get_resources uses a dynamic K8SClient to fetch resources from the K8S API.
+        _get_resource looks up a resource with the discovery of the client.
+        Resources missing on the cluster are remembered by the discovery cache.
+        With direct_api_paths, known resources skip the discovery.
+        Resources resolved by _resolve_resources are returned as they are.
         """
-        client = client.resources.get(api_version=api_version, kind=kind)
-        try:
-            result = client.get(**kwargs)
-        except DynamicApiError as exc:
-            self.display.debug(exc)
-            raise KubeVirtInventoryException(
-                f"Error fetching {kind} list: {self._format_dynamic_api_exc(exc)}"
-            ) from exc
-
-        return [item.to_dict() for item in result.items]
-
-    def _get_available_namespaces(self, client: K8SClient) -> List[str]:
+        if (resource := self._resources.get((api_version, kind))) is not None:
+            return resource
+        if opts is not None and opts.direct_api_paths:
+            group, name, namespaced = KNOWN_RESOURCES.get(kind, (None, None, None))
+            if group is not None and api_version.rpartition("/")[0] == group:
+                return DirectResource(client.client, api_version, name, namespaced)
+        if self._discovery is None:
+            return client.resources.get(api_version=api_version, kind=kind)
+        return self._discovery.get(client, api_version, kind)
+
+    def _resolve_resources(self, client: K8SClient, opts: InventoryOptions) -> None:
         """
-        _get_available_namespaces lists all namespaces accessible with the
-        configured credentials and returns them.
+        _resolve_resources looks up the VM, VMI and Service resources before
+        they are used by concurrent workers, as the discovery of the client
+        is not thread-safe.
         """
-
-        namespaces = []
-        try:
-            namespaces = self._get_resources(
-                client, "project.openshift.io/v1", "Project"
+        self._resources = {}
+        kinds = [(opts.api_version, KIND_VM), (opts.api_version, KIND_VMI)]
+        if opts.use_service and not opts.network_name:
+            kinds.append(("v1", KIND_SERVICE))
+        for api_version, kind in kinds:
+            self._resources[(api_version, kind)] = self._get_resource(
+                client, api_version, kind, opts
             )
-        except ResourceNotFoundError:
-            namespaces = self._get_resources(client, "v1", "Namespace")
+
+    def _get_cache_timeouts(self, opts: InventoryOptions) -> Dict[str, int]:
+        """
+        _get_cache_timeouts returns the timeouts of the cache index and of the
+        cache entries of every kind. Kinds without a timeout of their own
+        expire with the index after cache_timeout seconds.
+        """
+        cache_timeout = self.get_option("cache_timeout")
+        timeouts = {
+            "vms": opts.vm_cache_timeout,
+            "vmis": opts.vmi_cache_timeout,
+            "services": opts.service_cache_timeout,
+        }
+        return {
+            "index": cache_timeout,
+            **{
+                key: (
+                    timeout
+                    if timeout is not None
+                    and not self._exceeds_timeout(timeout, cache_timeout)
+                    else cache_timeout
+                )
+                for key, timeout in timeouts.items()
+            },
+        }
+
+    def _check_cache_timeouts(self, opts: InventoryOptions) -> None:
+        """
+        _check_cache_timeouts warns about timeouts of kinds which exceed
+        cache_timeout, as the cache plugin expires all entries after
+        cache_timeout seconds.
+        """
+        cache_timeout = self.get_option("cache_timeout")
+        for name in ("vm_cache_timeout", "vmi_cache_timeout", "service_cache_timeout"):
+            timeout = getattr(opts, name)
+            if timeout is not None and self._exceeds_timeout(timeout, cache_timeout):
+                self.display.warning(
+                    f"{name} ({timeout}) exceeds cache_timeout ({cache_timeout}), "
+                    + "using cache_timeout instead"
+                )
+
+    @staticmethod
+    def _exceeds_timeout(timeout: int, cache_timeout: int) -> bool:
+        """
+        _exceeds_timeout checks if timeout is larger than cache_timeout.
+        A timeout of 0 never expires, like with cache plugins.
+        """
+        return bool(cache_timeout) and (not timeout or timeout > cache_timeout)
+
+    @staticmethod
+    def _get_cache_entry_key(cache_key: str, namespace: str, key: str) -> str:
+        """
+        _get_cache_entry_key returns the key of the cache entry holding the
+        objects of a kind in a namespace.
+        """
+        return f"{cache_key}_{namespace}_{key}"
+
+    @staticmethod
+    def _cache_entry_expired(entry: Dict, timeout: Optional[int]) -> bool:
+        """
+        _cache_entry_expired checks if a cache entry is older than timeout
+        seconds. A timeout of 0 never expires, like with cache plugins.
+        """
+        return bool(timeout) and time() - entry.get("timestamp", 0) > timeout
+
+    def _read_cache(
+        self, cache_key: str, opts: InventoryOptions
+    ) -> Tuple[Optional[Dict], Optional[List[Tuple[str, str]]]]:
+        """
+        _read_cache assembles the results of a previous run from the cache.
+        The index entry lists the cached namespaces, every namespace has a
+        separate entry per kind. The entries of all listed namespaces are
+        loaded together with the index.
+        It returns the cached results and the namespaces and kinds whose
+        entries expired. If the index itself expired, no list is returned and
+        the entries are only loaded if they can still be used, e.g. by
+        incremental_refresh.
+        """
+        index = self.cache.get(cache_key)
+        if not isinstance(index, dict) or "timestamp" not in index:
+            return None, None
+        # Entries written by other versions of this inventory may be shaped differently
+        if index.get("version") != CACHE_FORMAT_VERSION:
+            return None, None
+
+        timeouts = self._get_cache_timeouts(opts)
+        index_expired = self._cache_entry_expired(index, timeouts["index"])
+        if (
+            index_expired
+            and not opts.incremental_refresh
+            and not opts.freshness_probe
+            and opts.cache_mode != "stale_while_revalidate"
+        ):
+            return None, None
+
+        namespaces = {}
+        expired = []
+        for namespace in index.get("namespaces", []):
+            namespaces[namespace] = {}
+            for key, default in (("vms", []), ("vmis", []), ("services", {})):
+                entry = self.cache.get(
+                    self._get_cache_entry_key(cache_key, namespace, key)
+                )
+                if entry is None or self._cache_entry_expired(entry, timeouts[key]):
+                    expired.append((namespace, key))
+                namespaces[namespace][key] = (
+                    entry.get("objects", default) if entry else default
+                )
+
+        cached = {**index, "namespaces": namespaces}
+        return cached, None if index_expired else expired
+
+    def _get_cache_lock_path(self, cache_key: str) -> str:
+        """
+        _get_cache_lock_path returns the path of the lock file of the cache
+        entries, next to them if the cache plugin stores files.
+        """
+        cache_dir = self.get_option("cache_connection")
+        if cache_dir:
+            cache_dir = os.path.expanduser(os.path.expandvars(cache_dir))
+        if not cache_dir or not os.path.isdir(cache_dir):
+            cache_dir = tempfile.gettempdir()
+        return os.path.join(cache_dir, f"{cache_key}.lock")
+
+    @contextmanager
+    def _lock_cache(self, cache_key: str, timeout: Optional[int]) -> Iterator[bool]:
+        """
+        _lock_cache holds the lock file of the cache entries while the cache is
+        updated, waiting at most timeout seconds for other processes to
+        release it. It yields whether another process held the lock. Nothing
+        is locked if timeout is None or the lock file cannot be opened.
+        """
+        if timeout is None:
+            yield False
+            return
+
+        try:
+            fd = os.open(self._get_cache_lock_path(cache_key), os.O_RDWR | os.O_CREAT)
+        except OSError as exc:
+            self.display.vvv(f"Failed to open the lock file of the cache: {exc}")
+            yield False
+            return
+
+        waited = False
+        locked = False
+        deadline = time() + timeout
+        try:
+            while True:
+                try:
+                    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                    locked = True
+                    break
+                except BlockingIOError:
+                    waited = True
+                    if time() >= deadline:
+                        break
+                    sleep(CACHE_LOCK_INTERVAL)
+            yield waited
+        finally:
+            if locked:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def _cache_within_max_stale(self, cache_key: str, opts: InventoryOptions) -> bool:
+        """
+        _cache_within_max_stale checks if the cache index and all cache entries
+        of a previous run exist and expired at most cache_max_stale seconds
+        ago.
+        """
+        index = self.cache.get(cache_key)
+        if not isinstance(index, dict):
+            return False
+
+        timeouts = self._get_cache_timeouts(opts)
+        entries = [(index, timeouts["index"])]
+        for namespace in index.get("namespaces", []):
+            for key in ("vms", "vmis", "services"):
+                entry = self.cache.get(
+                    self._get_cache_entry_key(cache_key, namespace, key)
+                )
+                if entry is None:
+                    return False
+                entries.append((entry, timeouts[key]))
+
+        return not any(
+            self._cache_entry_expired(entry, timeout + opts.cache_max_stale)
+            for entry, timeout in entries
+            if timeout
+        )
+
+    def _write_cache(
+        self,
+        cache_key: str,
+        results: Dict,
+        entries: Optional[List[Tuple[str, str]]] = None,
+        cache: Optional[Any] = None,
+    ) -> None:
+        """
+        _write_cache stores results in the cache index and in the entries per
+        namespace and kind. If entries is passed only these are written, the
+        other entries keep their age. Results are written to the cache of the
+        plugin unless another cache is passed.
+        """
+        if cache is None:
+            cache = self.cache
+        now = time()
+        cache[cache_key] = {
+            "version": CACHE_FORMAT_VERSION,
+            # Changes with every write to tie cached plans to the cached objects
+            "revision": uuid4().hex,
+            "timestamp": results.get("timestamp", now) if entries else now,
+            "default_hostname": results.get("default_hostname"),
+            "cluster_domain": results.get("cluster_domain"),
+            "namespaces": list(results["namespaces"]),
+            "resource_versions": results.get("resource_versions", {}),
+        }
+        for namespace, data in results["namespaces"].items():
+            for key in ("vms", "vmis", "services"):
+                if entries and (namespace, key) not in entries:
+                    continue
+                cache[self._get_cache_entry_key(cache_key, namespace, key)] = {
+                    "timestamp": now,
+                    "objects": data[key],
+                }
+
+    @staticmethod
+    def _get_fetch_fingerprint(config_data: Dict, opts: InventoryOptions) -> str:
+        """
+        _get_fetch_fingerprint returns a fingerprint of the settings which
+        determine the fetched objects. Settings only affecting how hosts are
+        presented, like host_format or compose, are not part of it.
+        """
+        return dumps(
+            {
+                "connection": {
+                    key: config_data.get(key) for key in FETCH_CONNECTION_OPTIONS
+                },
+                "namespaces": sorted(opts.namespaces or []),
+                "label_selector": opts.label_selector,
+                "api_version": opts.api_version,
+                # Services are only fetched if they can be used
+                "services": bool(opts.use_service and not opts.network_name),
+            },
+            sort_keys=True,
+            default=str,
+        )
+
+    @staticmethod
+    def _copy_results(results: Dict) -> Dict:
+        """
+        _copy_results copies the structure of results down to the lists of
+        objects, so results shared between sources are not changed when
+        objects of a namespace or kind are replaced.
+        """
+        copied = {
+            **results,
+            "namespaces": {
+                namespace: dict(data)
+                for namespace, data in results["namespaces"].items()
+            },
+        }
+        if "resource_versions" in results:
+            copied["resource_versions"] = {
+                kind: dict(versions)
+                for kind, versions in results["resource_versions"].items()
+            }
+        return copied
+
+    def _read_fetch_memo(self, fingerprint: str, ttl: int) -> Optional[Dict]:
+        """
+        _read_fetch_memo returns the results fetched by a source parsed by this
+        process if they were fetched with the same fingerprint less than ttl
+        seconds ago.
+        """
+        if not ttl:
+            return None
+
+        with _fetch_memo_lock:
+            self._evict_fetch_memo()
+            memo = _fetch_memo.get(fingerprint)
+        if memo is None or time() - memo[0] > ttl:
+            return None
+
+        self.display.debug("Using objects fetched by another inventory source")
+        return self._copy_results(memo[2])
+
+    def _write_fetch_memo(self, fingerprint: str, results: Dict, ttl: int) -> None:
+        """
+        _write_fetch_memo shares fetched results with other sources parsed by
+        this process.
+        """
+        if not ttl:
+            return
+
+        with _fetch_memo_lock:
+            # Keep the memo ordered by the time of the fetches
+            _fetch_memo.pop(fingerprint, None)
+            _fetch_memo[fingerprint] = (time(), ttl, self._copy_results(results))
+            self._evict_fetch_memo()
+
+    @staticmethod
+    def _evict_fetch_memo() -> None:
+        """
+        _evict_fetch_memo removes fetches older than the ttl they were shared
+        for and the oldest fetches exceeding FETCH_MEMO_SIZE. The caller must
+        hold _fetch_memo_lock.
+        """
+        now = time()
+        for fingerprint, (timestamp, ttl, _) in list(_fetch_memo.items()):
+            if now - timestamp > ttl:
+                del _fetch_memo[fingerprint]
+        while len(_fetch_memo) > FETCH_MEMO_SIZE:
+            del _fetch_memo[next(iter(_fetch_memo))]
+
+    @staticmethod
+    def _get_plan_key(cache_key: str, options_hash: str) -> str:
+        """
+        _get_plan_key returns the key of the cache entry holding the plan
+        derived with a set of options.
+        """
+        return f"{cache_key}_plan_{options_hash[:16]}"
+
+    @staticmethod
+    def _get_options_hash(opts: InventoryOptions) -> str:
+        """
+        _get_options_hash returns a hash of the options a plan depends on.
+        """
+        return sha256(
+            dumps(asdict(opts), sort_keys=True, default=str).encode()
+        ).hexdigest()
+
+    def _read_plan(
+        self, cache_key: str, results: Dict, opts: InventoryOptions
+    ) -> Optional[List[List]]:
+        """
+        _read_plan returns the cached operations of populating the inventory
+        from results. It returns None if the plan was derived from other
+        objects or with other options, or if any of its hosts already exists
+        and could carry variables affecting the plan, like ansible_connection.
+        """
+        options_hash = self._get_options_hash(opts)
+        plan = self.cache.get(self._get_plan_key(cache_key, options_hash))
+        if (
+            not isinstance(plan, dict)
+            or plan.get("version") != CACHE_FORMAT_VERSION
+            or plan.get("revision") is None
+            or plan.get("revision") != results.get("revision")
+            or plan.get("options_hash") != options_hash
+        ):
+            return None
+
+        operations = plan.get("operations", [])
+        if any(
+            operation[0] == "host" and operation[1] in self.inventory.hosts
+            for operation in operations
+        ):
+            return None
+
+        return operations
+
+    def _write_plan(self, cache_key: str, options_hash: str) -> None:
+        """
+        _write_plan stores the recorded operations of populating the inventory
+        together with the revision of the cached objects they were derived from.
+        Nothing is written if no plan was recorded.
+        """
+        if self._operations is None:
+            return
+
+        index = self.cache.get(cache_key)
+        if not isinstance(index, dict) or index.get("revision") is None:
+            return
+
+        self.cache[self._get_plan_key(cache_key, options_hash)] = {
+            "version": CACHE_FORMAT_VERSION,
+            "revision": index["revision"],
+            "options_hash": options_hash,
+            "operations": self._operations,
+        }
+
+    def _record(self, *operation: Any) -> None:
+        """
+        _record records an operation of populating the inventory if a plan is
+        recorded.
+        """
+        if self._operations is not None:
+            self._operations.append(list(operation))
+
+    def _connections_compatibility(self, config_data: Dict) -> None:
+        """
+        _connections_compatibility ensures compatibility with the connection
+        parameter found in earlier versions of this inventory plugin (<1.5.0).
+        """
+        collection_name = "kubevirt.core"
+        version_removed_in = "3.0.0"
+
+        if (connections := config_data.get("connections")) is None:
+            return
+
+        self.display.deprecated(
+            msg="The 'connections' parameter is deprecated and now supports only a single list entry.",
+            version=version_removed_in,
+            collection_name=collection_name,
+        )
+
+        if not isinstance(connections, list):
+            raise KubeVirtInventoryException("Expecting connections to be a list.")
+
+        if len(connections) == 1:
+            if not isinstance(connections[0], dict):
+                raise KubeVirtInventoryException(
+                    "Expecting connection to be a dictionary."
+                )
+            # Copy the single connections entry into the top level
+            for k, v in connections[0].items():
+                config_data[k] = v
+            self.display.deprecated(
+                msg="Move all of your connection parameters to the configuration top level.",
+                version=version_removed_in,
+                collection_name=collection_name,
+            )
+        elif len(connections) > 1:
+            self.display.deprecated(
+                msg="Split your connections into multiple configuration files.",
+                version="2.0.0",
+                collection_name=collection_name,
+                removed=True,
+            )
+
+    @staticmethod
+    def _run_concurrently(
+        func: Callable[[Any], Any], items: List[Any], concurrency: int
+    ) -> List[Any]:
+        """
+        _run_concurrently applies func to every item with a bounded pool of
+        worker threads and returns the results in the order of items.
+        The first exception raised by func is re-raised and pending calls
+        are cancelled.
+        """
+        if concurrency < 2 or len(items) < 2:
+            return [func(item) for item in items]
+
+        executor = ThreadPoolExecutor(max_workers=min(concurrency, len(items)))
+        try:
+            return list(executor.map(func, items))
+        finally:
+            executor.shutdown(cancel_futures=True)
+
+    def _fetch_objects(self, client: Any, opts: InventoryOptions) -> Dict:
+        """
+        fetch_objects fetches all relevant objects from the K8S API.
+        """
+        self._resource_versions = {}
+        namespaces = None
+        if not opts.namespaces and opts.cluster_wide_list:
+            namespaces = self._fetch_objects_cluster_wide(client, opts)
+        if namespaces is None:
+            # Drop resource versions of cluster-wide lists fetched before the
+            # fallback, as they would be mistaken for those of all namespaces.
+            self._resource_versions = {}
+            namespaces = self._fetch_objects_per_namespace(client, opts)
+
+        return {
+            "default_hostname": self._get_default_hostname(client.configuration.host),
+            "cluster_domain": self._get_cluster_domain(client, opts),
+            "namespaces": namespaces,
+            "resource_versions": self._get_fetched_resource_versions(),
+        }
+
+    def _fetch_objects_from_snapshot(
+        self, client: K8SClient, opts: InventoryOptions
+    ) -> Optional[Dict]:
+        """
+        _fetch_objects_from_snapshot reads the objects from a snapshot written
+        by the watch process. It returns None if the snapshot cannot be used,
+        e.g. because it was taken of another cluster than the one of client.
+        """
+        snapshot = read_snapshot(opts.snapshot_file, opts.snapshot_max_age)
+        if snapshot is None:
+            self.display.debug(
+                f"Snapshot {opts.snapshot_file} is missing or outdated, fetching objects"
+            )
+            return None
+
+        host = client.configuration.host
+        label_selectors = [opts.label_selector] if opts.label_selector else []
+        vms = find_in_snapshot(
+            snapshot,
+            KIND_VM,
+            opts.api_version,
+            label_selectors=label_selectors,
+            host=host,
+        )
+        vmis = find_in_snapshot(
+            snapshot,
+            KIND_VMI,
+            opts.api_version,
+            label_selectors=label_selectors,
+            host=host,
+        )
+        services = find_in_snapshot(snapshot, KIND_SERVICE, "v1", host=host)
+        if vms is None or vmis is None or services is None:
+            self.display.debug(
+                f"Snapshot {opts.snapshot_file} does not match the options, fetching objects"
+            )
+            return None
+        vms = [self._prune_object(KIND_VM, vm) for vm in vms]
+        vmis = [self._prune_object(KIND_VMI, vmi) for vmi in vmis]
+        services = [self._prune_object(KIND_SERVICE, service) for service in services]
+
+        namespaces = self._group_objects_by_namespace(vms, vmis, services)
+        if opts.namespaces:
+            namespaces = {
+                namespace: namespaces[namespace]
+                for namespace in opts.namespaces
+                if namespace in namespaces
+            }
+
+        return {
+            "default_hostname": self._get_default_hostname(snapshot.get("host", "")),
+            "cluster_domain": snapshot.get("cluster_domain"),
+            "namespaces": namespaces,
+        }
+
+    def _get_fetched_resource_versions(self) -> Dict[str, Dict[str, str]]:
+        """
+        _get_fetched_resource_versions returns the recorded resource versions
+        of the VM, VMI and Service lists and of the namespace list.
+        """
+        return {
+            kind: dict(versions)
+            for kind, versions in self._resource_versions.items()
+            if kind in (KIND_VM, KIND_VMI, KIND_SERVICE, KIND_NAMESPACE, KIND_PROJECT)
+        }
+
+    def _refresh_objects(
+        self, client: Any, cached: Dict, opts: InventoryOptions
+    ) -> Dict:
+        """
+        _refresh_objects brings previously fetched objects up to date by watching
+        for changes since the resource versions recorded with them. Lists without
+        a recorded or with an expired resource version are fetched again.
+        """
+        if not (resource_versions := cached.get("resource_versions")):
+            return self._fetch_objects(client, opts)
+
+        self._resource_versions = {}
+        cached_namespaces = cached.get("namespaces", {})
+        namespaces = None
+        # Only refresh cluster wide if the cached objects were listed cluster wide
+        if (
+            not opts.namespaces
+            and opts.cluster_wide_list
+            and "" in resource_versions.get(KIND_VM, {})
+        ):
+            namespaces = self._refresh_objects_cluster_wide(
+                client, cached_namespaces, resource_versions, opts
+            )
+        if namespaces is None:
+            # Drop resource versions of cluster-wide lists fetched before the
+            # fallback, as they would be mistaken for those of all namespaces.
+            self._resource_versions = {}
+            namespaces = self._refresh_objects_per_namespace(
+                client, cached_namespaces, resource_versions, opts
+            )
+
+        return {
+            "default_hostname": cached.get(
+                "default_hostname",
+                self._get_default_hostname(client.configuration.host),
+            ),
+            "cluster_domain": cached.get("cluster_domain"),
+            "namespaces": namespaces,
+            "resource_versions": self._get_fetched_resource_versions(),
+        }
+
+    def _refetch_expired_objects(
+        self,
+        client: Any,
+        cached: Dict,
+        expired: List[Tuple[str, str]],
+        opts: InventoryOptions,
+    ) -> Dict:
+        """
+        _refetch_expired_objects fetches the objects of expired cache entries
+        again and keeps the objects of all other entries. With
+        incremental_refresh the expired entries are refreshed by a watch.
+        """
+        self._resource_versions = {}
+        namespaces = cached["namespaces"]
+        resource_versions = cached.get("resource_versions") or {}
+        kinds = {"vms": KIND_VM, "vmis": KIND_VMI, "services": KIND_SERVICE}
+
+        def refetch(args: Tuple[str, str]) -> Any:
+            namespace, key = args
+            kind = kinds[key]
+            if kind == KIND_SERVICE and not self._services_needed(
+                namespaces[namespace]["vmis"], opts
+            ):
+                return {}
+            versions = resource_versions.get(kind, {})
+            objects = self._watch_resources(
+                client,
+                "v1" if kind == KIND_SERVICE else opts.api_version,
+                kind,
+                (
+                    self._flatten_services(namespaces[namespace][key])
+                    if kind == KIND_SERVICE
+                    else namespaces[namespace][key]
+                ),
+                (
+                    versions.get(namespace, versions.get(""))
+                    if opts.incremental_refresh
+                    else None
+                ),
+                opts,
+                namespace=namespace,
+                label_selector=None if kind == KIND_SERVICE else opts.label_selector,
+            )
+            return (
+                self._map_services_to_domains(objects)
+                if kind == KIND_SERVICE
+                else objects
+            )
+
+        self._resolve_resources(client, opts)
+        # Services are refetched last as they depend on the refetched VMIs
+        for batch in (
+            [entry for entry in expired if entry[1] != "services"],
+            [entry for entry in expired if entry[1] == "services"],
+        ):
+            results = self._run_concurrently(refetch, batch, opts.fetch_concurrency)
+            for (namespace, key), objects in zip(batch, results):
+                namespaces[namespace][key] = objects
+
+        for kind, versions in self._get_fetched_resource_versions().items():
+            resource_versions.setdefault(kind, {}).update(versions)
+
+        return {
+            **cached,
+            # Skip namespaces without VMs and VMIs to avoid adding empty groups.
+            "namespaces": {
+                namespace: data
+                for namespace, data in namespaces.items()
+                if data["vms"] or data["vmis"]
+            },
+            "resource_versions": resource_versions,
+        }
+
+    def _probe_resource_versions(
+        self,
+        client: Any,
+        resource_versions: Dict[str, Dict[str, str]],
+        expired: Optional[List[Tuple[str, str]]],
+        opts: InventoryOptions,
+    ) -> bool:
+        """
+        _probe_resource_versions watches every list recorded in
+        resource_versions from its resource version and checks that no
+        objects were added, modified or deleted since. If expired is passed
+        only the lists of these cache entries are probed. If namespaces are
+        listed per namespace and were discovered, the namespace list is
+        probed as well.
+        """
+        kinds = {"vms": KIND_VM, "vmis": KIND_VMI, "services": KIND_SERVICE}
+        if expired is None:
+            probes = {
+                (kind, namespace): version
+                for kind, versions in resource_versions.items()
+                if kind not in (KIND_NAMESPACE, KIND_PROJECT)
+                for namespace, version in versions.items()
+            }
+        else:
+            probes = {}
+            for namespace, key in expired:
+                versions = resource_versions.get(kinds[key], {})
+                # Lists across all namespaces are recorded without a namespace
+                namespace = namespace if namespace in versions else ""
+                if not versions.get(namespace):
+                    return False
+                probes[(kinds[key], namespace)] = versions[namespace]
+        if not opts.namespaces and any(namespace for _, namespace in probes):
+            # New namespaces are only found by listing the namespaces again
+            kind = KIND_PROJECT if KIND_PROJECT in resource_versions else KIND_NAMESPACE
+            probes[(kind, "")] = resource_versions.get(kind, {}).get("")
+        if not probes or not all(probes.values()):
+            return False
+
+        api_versions = {
+            KIND_SERVICE: "v1",
+            KIND_NAMESPACE: "v1",
+            KIND_PROJECT: "project.openshift.io/v1",
+        }
+
+        def probe(args: Tuple[Tuple[str, str], str]) -> bool:
+            (kind, namespace), resource_version = args
+            kwargs = {"allow_watch_bookmarks": True}
+            if namespace:
+                kwargs["namespace"] = namespace
+            if kind in (KIND_VM, KIND_VMI) and opts.label_selector:
+                kwargs["label_selector"] = opts.label_selector
+            try:
+                for event in self._watch_events(
+                    client,
+                    api_versions.get(kind, opts.api_version),
+                    kind,
+                    resource_version,
+                    opts,
+                    **kwargs,
+                ):
+                    # All changes before a bookmark were already sent
+                    return event["type"] == "BOOKMARK"
+            except (ApiException, DynamicApiError, ResourceNotFoundError) as exc:
+                # An expired resource version means the list changed meanwhile
+                self.display.debug(f"Failed to probe {kind} list: {exc}")
+                return False
+            return True
+
+        self._resolve_resources(client, opts)
+        return all(
+            self._run_concurrently(
+                probe,
+                list(probes.items()),
+                max(opts.fetch_concurrency, FRESHNESS_PROBE_CONCURRENCY),
+            )
+        )
+
+    def _refresh_objects_per_namespace(
+        self,
+        client: Any,
+        cached_namespaces: Dict[str, Dict],
+        resource_versions: Dict[str, Dict[str, str]],
+        opts: InventoryOptions,
+    ) -> Dict[str, Dict]:
+        """
+        _refresh_objects_per_namespace refreshes the cached objects of every
+        namespace separately.
+        """
+        available_namespaces = (
+            opts.namespaces
+            if opts.namespaces
+            else self._get_available_namespaces(client, opts)
+        )
+
+        def refresh(namespace: str) -> Optional[Dict]:
+            cached = cached_namespaces.get(namespace, {})
+            vms = self._watch_resources(
+                client,
+                opts.api_version,
+                KIND_VM,
+                cached.get("vms", []),
+                resource_versions.get(KIND_VM, {}).get(namespace),
+                opts,
+                namespace=namespace,
+                label_selector=opts.label_selector,
+            )
+            vmis = self._watch_resources(
+                client,
+                opts.api_version,
+                KIND_VMI,
+                cached.get("vmis", []),
+                resource_versions.get(KIND_VMI, {}).get(namespace),
+                opts,
+                namespace=namespace,
+                label_selector=opts.label_selector,
+            )
+            if not vms and not vmis:
+                return None
+
+            if not self._services_needed(vmis, opts):
+                return {"vms": vms, "vmis": vmis, "services": {}}
+
+            services = self._watch_resources(
+                client,
+                "v1",
+                KIND_SERVICE,
+                self._flatten_services(cached.get("services", {})),
+                resource_versions.get(KIND_SERVICE, {}).get(namespace),
+                opts,
+                namespace=namespace,
+            )
+            return {
+                "vms": vms,
+                "vmis": vmis,
+                "services": self._map_services_to_domains(services),
+            }
+
+        self._resolve_resources(client, opts)
+        results = self._run_concurrently(
+            refresh, available_namespaces, opts.fetch_concurrency
+        )
+
+        return {
+            namespace: data
+            for namespace, data in zip(available_namespaces, results)
+            if data is not None
+        }
+
+    def _refresh_objects_cluster_wide(
+        self,
+        client: Any,
+        cached_namespaces: Dict[str, Dict],
+        resource_versions: Dict[str, Dict[str, str]],
+        opts: InventoryOptions,
+    ) -> Optional[Dict[str, Dict]]:
+        """
+        _refresh_objects_cluster_wide refreshes the cached objects of all
+        namespaces with a single watch per kind. It returns None if watching
+        or listing any kind cluster wide is forbidden.
+        """
+        cached = {"vms": [], "vmis": [], "services": []}
+        for data in cached_namespaces.values():
+            cached["vms"].extend(data.get("vms", []))
+            cached["vmis"].extend(data.get("vmis", []))
+            cached["services"].extend(self._flatten_services(data.get("services", {})))
+
+        def refresh(args: Tuple[str, str, str, Dict]) -> List[Dict]:
+            api_version, kind, key, kwargs = args
+            return self._watch_resources(
+                client,
+                api_version,
+                kind,
+                cached[key],
+                resource_versions.get(kind, {}).get(""),
+                opts,
+                **kwargs,
+            )
+
+        self._resolve_resources(client, opts)
+        try:
+            vms, vmis = self._run_concurrently(
+                refresh,
+                [
+                    (
+                        opts.api_version,
+                        KIND_VM,
+                        "vms",
+                        {"label_selector": opts.label_selector},
+                    ),
+                    (
+                        opts.api_version,
+                        KIND_VMI,
+                        "vmis",
+                        {"label_selector": opts.label_selector},
+                    ),
+                ],
+                opts.fetch_concurrency,
+            )
+            services = (
+                refresh(("v1", KIND_SERVICE, "services", {}))
+                if self._services_needed(vmis, opts)
+                else []
+            )
+        except KubeVirtInventoryException as exc:
+            if getattr(exc.__cause__, "status", None) != 403:
+                raise
+            self.display.debug(
+                f"Falling back to refreshing objects per namespace: {exc}"
+            )
+            return None
+
+        return self._group_objects_by_namespace(vms, vmis, services)
+
+    def _watch_events(
+        self,
+        client: K8SClient,
+        api_version: str,
+        kind: str,
+        resource_version: str,
+        opts: InventoryOptions,
+        **kwargs,
+    ) -> Iterator[Dict]:
+        """
+        _watch_events yields the watch events of a kind since resource_version
+        for at most opts.watch_timeout seconds.
+        """
+        resource = self._get_resource(client, api_version, kind, opts)
+        yield from resource.watch(
+            resource_version=resource_version,
+            timeout=opts.watch_timeout,
+            **kwargs,
+        )
+
+    def _watch_resources(
+        self,
+        client: K8SClient,
+        api_version: str,
+        kind: str,
+        items: List[Dict],
+        resource_version: Optional[str],
+        opts: InventoryOptions,
+        namespace: Optional[str] = None,
+        label_selector: Optional[str] = None,
+    ) -> List[Dict]:
+        """
+        _watch_resources applies the changes made since resource_version to the
+        passed in items by watching the K8S API for opts.watch_timeout seconds.
+        It lists the resources again if no resource version is known or the
+        resource version expired. Any other error, also if reported by an ERROR
+        event, fails the refresh.
+        """
+        kwargs = {"label_selector": label_selector} if label_selector else {}
+        if namespace:
+            kwargs["namespace"] = namespace
+        if resource_version is None:
+            return self._get_resources(client, api_version, kind, opts, **kwargs)
+
+        objs = {item.get("metadata", {}).get("uid"): item for item in items}
+        try:
+            for event in self._watch_events(
+                client, api_version, kind, resource_version, opts, **kwargs
+            ):
+                if event["type"] == "ERROR":
+                    # Status objects of errors not raised by the watch itself
+                    status = event["raw_object"]
+                    raise ApiException(
+                        status=status.get("code"), reason=status.get("message")
+                    )
+                obj = self._prune_object(kind, event["raw_object"])
+                metadata = obj.get("metadata", {})
+                if event["type"] in ("ADDED", "MODIFIED"):
+                    objs[metadata.get("uid")] = obj
+                elif event["type"] == "DELETED":
+                    objs.pop(metadata.get("uid"), None)
+                resource_version = metadata.get("resourceVersion", resource_version)
+        except ApiException as exc:
+            if exc.status == HTTP_STATUS_GONE:
+                self.display.debug(
+                    f"Resource version of {kind} list expired, fetching it again"
+                )
+                return self._get_resources(client, api_version, kind, opts, **kwargs)
+            self.display.debug(exc)
+            raise KubeVirtInventoryException(
+                f"Error watching {kind} list: {self._format_dynamic_api_exc(exc)}"
+            ) from exc
+
+        self._resource_versions.setdefault(kind, {})[namespace or ""] = resource_version
+
+        # Keep the order of objects returned by a list
+        return sorted(
+            objs.values(),
+            key=lambda obj: (
+                obj["metadata"].get("namespace", ""),
+                obj["metadata"].get("name", ""),
+            ),
+        )
+
+    @staticmethod
+    def _services_needed(vmis: List[Dict], opts: InventoryOptions) -> bool:
+        """
+        _services_needed checks if Services can be used to set ansible_host and
+        ansible_port of any of the passed in VMIs. This requires use_service,
+        no network_name and at least one VMI with a reported interface.
+        """
+        return bool(
+            opts.use_service
+            and not opts.network_name
+            and any(vmi.get("status", {}).get("interfaces") for vmi in vmis)
+        )
+
+    @staticmethod
+    def _flatten_services(services: Dict[str, List[Dict]]) -> List[Dict]:
+        """
+        _flatten_services turns services mapped to domains back into a list.
+        """
+        return [service for items in services.values() for service in items]
+
+    def _fetch_objects_per_namespace(
+        self, client: Any, opts: InventoryOptions
+    ) -> Dict[str, Dict]:
+        """
+        _fetch_objects_per_namespace fetches all relevant objects with separate
+        list calls for every namespace.
+        """
+        available_namespaces = (
+            opts.namespaces
+            if opts.namespaces
+            else self._get_available_namespaces(client, opts)
+        )
+        self._resolve_resources(client, opts)
+        results = self._run_concurrently(
+            lambda namespace: self._fetch_objects_for_namespace(
+                client, namespace, opts
+            ),
+            available_namespaces,
+            opts.fetch_concurrency,
+        )
+
+        namespaces = {}
+        for namespace, data in zip(available_namespaces, results):
+            # Skip namespaces without VMs and VMIs to avoid adding empty groups.
+            if data is not None:
+                namespaces[namespace] = data
+
+        return namespaces
+
+    def _fetch_objects_cluster_wide(
+        self, client: Any, opts: InventoryOptions
+    ) -> Optional[Dict[str, Dict]]:
+        """
+        _fetch_objects_cluster_wide fetches all relevant objects with a single
+        list call per kind across all namespaces and groups them by namespace.
+        It returns None if listing any kind cluster wide is forbidden.
+        """
+        try:
+            vms = self._get_resources(
+                client,
+                opts.api_version,
+                KIND_VM,
+                opts,
+                label_selector=opts.label_selector,
+            )
+            vmis = self._get_resources(
+                client,
+                opts.api_version,
+                KIND_VMI,
+                opts,
+                label_selector=opts.label_selector,
+            )
+            services = (
+                self._get_resources(client, "v1", KIND_SERVICE, opts)
+                if self._services_needed(vmis, opts)
+                else []
+            )
+        except KubeVirtInventoryException as exc:
+            if getattr(exc.__cause__, "status", None) != 403:
+                raise
+            self.display.debug(f"Falling back to listing objects per namespace: {exc}")
+            return None
+
+        return self._group_objects_by_namespace(vms, vmis, services)
+
+    def _group_objects_by_namespace(
+        self, vms: List[Dict], vmis: List[Dict], services: List[Dict]
+    ) -> Dict[str, Dict]:
+        """
+        _group_objects_by_namespace groups objects listed across all namespaces
+        by their namespace. Services are only kept for namespaces containing
+        VMs or VMIs.
+        """
+        namespaces = {}
+        for key, items in (("vms", vms), ("vmis", vmis)):
+            for item in items:
+                if not (namespace := item.get("metadata", {}).get("namespace")):
+                    continue
+                if namespace not in namespaces:
+                    namespaces[namespace] = {"vms": [], "vmis": [], "services": []}
+                namespaces[namespace][key].append(item)
+
+        for service in services:
+            namespace = service.get("metadata", {}).get("namespace")
+            if namespace in namespaces:
+                namespaces[namespace]["services"].append(service)
+
+        for data in namespaces.values():
+            data["services"] = self._map_services_to_domains(data["services"])
+
+        return dict(sorted(namespaces.items()))
+
+    def _fetch_objects_for_namespace(
+        self, client: Any, namespace: str, opts: InventoryOptions
+    ) -> Optional[Dict]:
+        """
+        _fetch_objects_for_namespace fetches the VMs, VMIs and Services of a
+        single namespace. It returns None if no VMs and VMIs were found.
+        """
+        vms = self._get_vms_for_namespace(client, namespace, opts)
+        vmis = self._get_vmis_for_namespace(client, namespace, opts)
+
+        if not vms and not vmis:
+            return None
+
+        return {
+            "vms": vms,
+            "vmis": vmis,
+            "services": (
+                self._get_services_for_namespace(client, namespace, opts)
+                if self._services_needed(vmis, opts)
+                else {}
+            ),
+        }
+
+    def _get_cluster_domain(
+        self, client: K8SClient, opts: Optional[InventoryOptions] = None
+    ) -> Optional[str]:
+        """
+        _get_cluster_domain tries to get the base domain of an OpenShift cluster.
+        """
+        try:
+            v1_dns = self._get_resource(client, "config.openshift.io/v1", "DNS", opts)
+        except Exception:
+            # If resource not found return None
+            return None
+        try:
+            obj = v1_dns.get(name="cluster")
+        except DynamicApiError as exc:
+            self.display.debug(
+                f"Failed to fetch cluster DNS config: {self._format_dynamic_api_exc(exc)}"
+            )
+            return None
+        return obj.get("spec", {}).get("baseDomain")
+
+    def _get_resources(
+        self,
+        client: K8SClient,
+        api_version: str,
+        kind: str,
+        opts: Optional[InventoryOptions] = None,
+        **kwargs,
+    ) -> List[Dict]:
+        """
+        _get_resources uses a dynamic K8SClient to fetch resources from the K8S API.
+        """
+        return list(self._iter_resources(client, api_version, kind, opts, **kwargs))
+
+    def _iter_resources(
+        self,
+        client: K8SClient,
+        api_version: str,
+        kind: str,
+        opts: Optional[InventoryOptions] = None,
+        **kwargs,
+    ) -> Iterator[Dict]:
+        """
+        _iter_resources uses a dynamic K8SClient to fetch resources from the K8S API
+        and yields them one by one as dicts. If chunking is enabled the list is fetched
+        in chunks and the next chunk is only fetched once the previous one
+        was consumed.
+        """
+        chunk_size = opts.chunk_size if opts is not None else 0
+        if chunk_size > 0:
+            kwargs["limit"] = chunk_size
+        if opts is not None and opts.resource_version is not None:
+            kwargs["resource_version"] = opts.resource_version
+            kwargs["resource_version_match"] = "NotOlderThan"
+
+        resource = self._get_resource(client, api_version, kind, opts)
+        rediscovered = False
+        while True:
+            try:
+                # Skip the conversion into a ResourceInstance and decode the raw
+                # response body directly, as the objects are needed as dicts anyway.
+                result = loads(resource.get(serialize=False, **kwargs).data)
+            except DynamicApiError as exc:
+                if (
+                    exc.status == HTTP_STATUS_NOT_FOUND
+                    and self._discovery is not None
+                    and not rediscovered
+                ):
+                    # The discovered resource is outdated, discover it again
+                    with self._resources_lock:
+                        self._discovery.refresh(client)
+                        self._resources.pop((api_version, kind), None)
+                        resource = self._get_resource(client, api_version, kind, opts)
+                    rediscovered = True
+                    continue
+                self.display.debug(exc)
+                raise KubeVirtInventoryException(
+                    f"Error fetching {kind} list: {self._format_dynamic_api_exc(exc)}"
+                ) from exc
+
+            if "_continue" not in kwargs:
+                # All chunks of a list share the resource version of the first one
+                self._resource_versions.setdefault(kind, {})[
+                    kwargs.get("namespace") or ""
+                ] = result.get("metadata", {}).get("resourceVersion")
+
+            for item in result.get("items") or []:
+                yield self._prune_object(kind, item)
+
+            if chunk_size <= 0 or not (
+                _continue := result.get("metadata", {}).get("continue")
+            ):
+                return
+            kwargs["_continue"] = _continue
+            # The resource version of a list is encoded in its continue token
+            kwargs.pop("resource_version", None)
+            kwargs.pop("resource_version_match", None)
+
+    def _get_available_namespaces(
+        self, client: K8SClient, opts: InventoryOptions
+    ) -> List[str]:
+        """
+        _get_available_namespaces lists all namespaces accessible with the
+        configured credentials and returns them.
+        """
+
+        namespaces = []
+        try:
+            namespaces = self._get_resources(
+                client, "project.openshift.io/v1", KIND_PROJECT, opts
+            )
+        except ResourceNotFoundError:
+            namespaces = self._get_resources(client, "v1", KIND_NAMESPACE, opts)
 
         return [
             namespace["metadata"]["name"]
@@ -625,7 +2674,8 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         return self._get_resources(
             client,
             opts.api_version,
-            "VirtualMachine",
+            KIND_VM,
+            opts,
             namespace=namespace,
             label_selector=opts.label_selector,
         )
@@ -639,25 +2689,35 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         return self._get_resources(
             client,
             opts.api_version,
-            "VirtualMachineInstance",
+            KIND_VMI,
+            opts,
             namespace=namespace,
             label_selector=opts.label_selector,
         )
 
     def _get_services_for_namespace(
-        self, client: K8SClient, namespace: str
+        self, client: K8SClient, namespace: str, opts: InventoryOptions
     ) -> Dict[str, List[Dict]]:
         """
         _get_services_for_namespace retrieves all services of a namespace exposing ssh or winrm.
         The services are mapped to the name of the corresponding domain.
         """
-        items = self._get_resources(
-            client,
-            "v1",
-            "Service",
-            namespace=namespace,
+        return self._map_services_to_domains(
+            self._get_resources(
+                client,
+                "v1",
+                KIND_SERVICE,
+                opts,
+                namespace=namespace,
+            )
         )
 
+    @staticmethod
+    def _map_services_to_domains(items: List[Dict]) -> Dict[str, List[Dict]]:
+        """
+        _map_services_to_domains filters the passed in services for services
+        exposing ssh or winrm and maps them to the name of the corresponding domain.
+        """
         services = {}
         for service in items:
             # Continue if service is not of type LoadBalancer or NodePort
@@ -696,13 +2756,48 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         """
         _populate_inventory populates the inventory by completing the InventoryOptions
         and invoking populate_inventory_from_namespace for every namespace in results.
+        The objects of every namespace are removed from results once its hosts were
+        added, so they can be freed while the remaining namespaces are populated.
+        """
+        self._prepare_populate(results, opts)
+        namespaces = results["namespaces"]
+        for namespace in list(namespaces):
+            self._populate_inventory_from_namespace(
+                namespace, namespaces.pop(namespace), opts
+            )
+
+    def _populate_inventory_from_plan(
+        self, results: Dict, opts: InventoryOptions, plan: List[List]
+    ) -> None:
+        """
+        _populate_inventory_from_plan populates the inventory by replaying the
+        cached operations of a previous run. Only constructed vars and groups
+        are evaluated again.
+        """
+        self._prepare_populate(results, opts)
+        for operation, *args in plan:
+            if operation == "group":
+                self.inventory.add_group(*args)
+            elif operation == "child":
+                self.inventory.add_child(*args)
+            elif operation == "host":
+                self.inventory.add_host(*args)
+            elif operation == "vars":
+                self._set_host_vars(*args)
+            elif operation == "composable":
+                self._set_composable_vars(*args)
+
+    def _prepare_populate(self, results: Dict, opts: InventoryOptions) -> None:
+        """
+        _prepare_populate completes the InventoryOptions and reads the options
+        of Constructable before populating the inventory.
         """
         if opts.base_domain is None:
             opts.base_domain = results["cluster_domain"]
         if opts.name is None:
             opts.name = results["default_hostname"]
-        for namespace, data in results["namespaces"].items():
-            self._populate_inventory_from_namespace(namespace, data, opts)
+        self._constructed = self._get_constructed_options()
+        self._hostvar_names = {}
 
     def _populate_inventory_from_namespace(
         self, namespace: str, data: Dict, opts: InventoryOptions
@@ -711,23 +2806,14 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         _populate_inventory_from_namespace adds groups and hosts from a
         namespace to the inventory.
         """
-        vms = {
-            vm["metadata"]["name"]: vm for vm in data["vms"] if self._obj_is_valid(vm)
-        }
-        vmis = {
-            vmi["metadata"]["name"]: vmi
-            for vmi in data["vmis"]
-            if self._obj_is_valid(vmi)
-        }
+        vms = self._get_records(data["vms"])
+        vmis = self._get_records(data["vmis"])
 
         if not vms and not vmis:
             # Return early if no VMs and VMIs were found to avoid adding empty groups.
             return
 
-        services = {
-            domain: [service for service in services if self._obj_is_valid(service)]
-            for domain, services in data["services"].items()
-        }
+        services = self._index_services(data["services"])
 
         name = self._sanitize_group_name(opts.name)
         namespace_group = self._sanitize_group_name(f"namespace_{namespace}")
@@ -735,61 +2821,84 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         self.inventory.add_group(name)
         self.inventory.add_group(namespace_group)
         self.inventory.add_child(name, namespace_group)
+        self._record("group", name)
+        self._record("group", namespace_group)
+        self._record("child", name, namespace_group)
 
         # Add found VMs and optionally enhance with VMI data
         for name, vm in vms.items():
-            hostname = self._add_host(vm["metadata"], opts.host_format, namespace_group)
-            self._set_vars_from_vm(hostname, vm, opts)
+            hostname = self._add_host(vm, opts.host_format, namespace_group)
+            hostvars = {}
+            self._set_vars_from_vm(hostname, hostvars, vm, opts)
             if name in vmis:
-                self._set_vars_from_vmi(hostname, vmis[name], services, opts)
+                self._set_vars_from_vmi(hostname, hostvars, vmis[name], services, opts)
+            self._set_host_vars(hostname, hostvars)
             self._set_composable_vars(hostname)
 
         # Add remaining VMIs without VM
         for name, vmi in vmis.items():
             if name in vms:
                 continue
-            hostname = self._add_host(
-                vmi["metadata"], opts.host_format, namespace_group
-            )
-            self._set_vars_from_vmi(hostname, vmi, services, opts)
+            hostname = self._add_host(vmi, opts.host_format, namespace_group)
+            hostvars = {}
+            self._set_vars_from_vmi(hostname, hostvars, vmi, services, opts)
+            self._set_host_vars(hostname, hostvars)
             self._set_composable_vars(hostname)
 
-    def _add_host(self, metadata: Dict, host_format: str, namespace_group: str) -> str:
+    def _add_host(
+        self, record: ObjectRecord, host_format: str, namespace_group: str
+    ) -> str:
         """
         _add_host adds a host to the inventory.
         """
         hostname = host_format.format(
-            namespace=metadata["namespace"],
-            name=metadata["name"],
-            uid=metadata["uid"],
+            namespace=record.namespace,
+            name=record.name,
+            uid=record.uid,
         )
+        if self._operations is not None and hostname in self.inventory.hosts:
+            # Variables of hosts added by other sources can affect the plan
+            self._operations = None
         self.inventory.add_host(hostname)
         self.inventory.add_child(namespace_group, hostname)
+        self._record("host", hostname)
+        self._record("child", namespace_group, hostname)
 
         return hostname
 
+    def _set_host_vars(self, hostname: str, hostvars: Dict) -> None:
+        """
+        _set_host_vars writes the assembled variables of a host to the inventory.
+        Every variable goes through the inventory, which validates its name and
+        merges it with the variables the host already has.
+        """
+        self._record("vars", hostname, dict(hostvars))
+        for key, value in hostvars.items():
+            self.inventory.set_variable(hostname, key, value)
+
     def _set_vars_from_vm(
-        self, hostname: str, vm: Dict, opts: InventoryOptions
+        self, hostname: str, hostvars: Dict, vm: ObjectRecord, opts: InventoryOptions
     ) -> None:
         """
-        _set_vars_from_vm sets inventory variables from a VM prefixed with vm_.
+        _set_vars_from_vm sets host variables from a VM prefixed with vm_.
         """
-        self._set_common_vars(hostname, "vm", vm, opts)
+        self._set_common_vars(hostname, hostvars, "vm", vm, opts)
 
     def _set_vars_from_vmi(
         self,
         hostname: str,
-        vmi: Dict,
-        services: Dict[str, List[Dict]],
+        hostvars: Dict,
+        vmi: ObjectRecord,
+        services: Dict[Tuple[str, int], Dict],
         opts: InventoryOptions,
     ) -> None:
         """
-        _set_vars_from_vmi sets inventory variables from a VMI prefixed with vmi_ and
+        _set_vars_from_vmi sets host variables from a VMI prefixed with vmi_ and
         looks up the interface to set ansible_host and ansible_port.
         """
-        self._set_common_vars(hostname, "vmi", vmi, opts)
+        self._set_common_vars(hostname, hostvars, "vmi", vmi, opts)
 
-        if not (interfaces := vmi["status"].get("interfaces")):
+        if not (interfaces := vmi.status.get("interfaces")):
             return
 
         if opts.network_name is None:
@@ -806,76 +2915,94 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         if not interface or not interface.get("ipAddress"):
             return
 
-        _services = services.get(
-            vmi["metadata"].get("labels", {}).get(LABEL_KUBEVIRT_IO_DOMAIN), []
-        )
+        domain = vmi.labels.get(LABEL_KUBEVIRT_IO_DOMAIN)
 
-        # Set up the connection
-        ansible_connection = (
-            self.inventory.get_host(hostname).get_vars().get("ansible_connection")
+        # Set up the connection, respecting a connection the host already has
+        ansible_connection = self.inventory.get_host(hostname).vars.get(
+            "ansible_connection"
         )
         if ansible_connection is None and self._is_windows(
-            vmi["status"].get("guestOSInfo", {}),
-            vmi["metadata"].get("annotations", {}),
+            vmi.status.get("guestOSInfo", {}), vmi.annotations
         ):
             ansible_connection = opts.default_win_ansible_connection
-            self.inventory.set_variable(
-                hostname, "ansible_connection", ansible_connection
-            )
+            hostvars["ansible_connection"] = ansible_connection
 
         service = None
         if ansible_connection in (None, "ssh", "ansible.builtin.ssh"):
-            service = self._find_service_with_target_port(
-                _services, SERVICE_TARGET_PORT_SSH
-            )
+            service = services.get((domain, SERVICE_TARGET_PORT_SSH))
         elif ansible_connection in (
             "winrm",
             "ansible.builtin.winrm",
             "psrp",
             "ansible.builtin.psrp",
         ):
-            service = self._find_service_with_target_port(
-                _services, SERVICE_TARGET_PORT_WIN_MGMT_HTTPS
-            )
+            service = services.get((domain, SERVICE_TARGET_PORT_WIN_MGMT_HTTPS))
             if service is None:
-                service = self._find_service_with_target_port(
-                    _services, SERVICE_TARGET_PORT_WIN_MGMT_HTTP
-                )
+                service = services.get((domain, SERVICE_TARGET_PORT_WIN_MGMT_HTTP))
 
         self._set_ansible_host_and_port(
             vmi,
-            hostname,
+            hostvars,
             interface["ipAddress"],
             service,
             opts,
         )
 
     def _set_common_vars(
-        self, hostname: str, prefix: str, obj: Dict, opts: InventoryOptions
+        self,
+        hostname: str,
+        hostvars: Dict,
+        prefix: str,
+        obj: ObjectRecord,
+        opts: InventoryOptions,
     ):
         """
-        _set_common_vars sets common inventory variables from VMs or VMIs.
+        _set_common_vars sets common host variables from VMs or VMIs.
         """
+        # Create label groups and add vm to it if enabled
+        if obj.labels and opts.create_groups:
+            self._set_groups_from_labels(hostname, obj.labels)
+
         # Add hostvars from metadata
-        if annotations := obj["metadata"].get("annotations"):
-            self.inventory.set_variable(hostname, f"{prefix}_annotations", annotations)
-        if labels := obj["metadata"].get("labels"):
-            self.inventory.set_variable(hostname, f"{prefix}_labels", labels)
-            # Create label groups and add vm to it if enabled
-            if opts.create_groups:
-                self._set_groups_from_labels(hostname, labels)
-        if resource_version := obj["metadata"].get("resourceVersion"):
-            self.inventory.set_variable(
-                hostname, f"{prefix}_resource_version", resource_version
-            )
-        if uid := obj["metadata"].get("uid"):
-            self.inventory.set_variable(hostname, f"{prefix}_uid", uid)
+        for key, value in (
+            ("annotations", obj.annotations),
+            ("labels", obj.labels),
+            ("resourceVersion", obj.resource_version),
+            ("uid", obj.uid),
+        ):
+            if value and (name := self._get_hostvar_name(prefix, key, opts)):
+                hostvars[name] = value
 
         # Add hostvars from status
-        for key, value in obj["status"].items():
-            self.inventory.set_variable(
-                hostname, f"{prefix}_{self._format_var_name(key)}", value
+        for key, value in obj.status.items():
+            if name := self._get_hostvar_name(prefix, key, opts):
+                hostvars[name] = value
+
+    def _get_hostvar_name(
+        self, prefix: str, key: str, opts: InventoryOptions
+    ) -> Optional[str]:
+        """
+        _get_hostvar_name returns the name of the host variable of a field of
+        a VM or VMI or None if the variable is filtered out by hostvars_include,
+        hostvars_exclude or hostvars_annotations. Names are only formatted and
+        matched once per field.
+        """
+        if (prefix, key) in self._hostvar_names:
+            return self._hostvar_names[(prefix, key)]
+
+        name = f"{prefix}_{self._format_var_name(key)}"
+        if (
+            (key == "annotations" and not opts.hostvars_annotations)
+            or (
+                opts.hostvars_include
+                and not any(fnmatchcase(name, p) for p in opts.hostvars_include)
             )
+            or any(fnmatchcase(name, p) for p in opts.hostvars_exclude or [])
+        ):
+            name = None
+
+        self._hostvar_names[(prefix, key)] = name
+        return name
 
     def _set_groups_from_labels(self, hostname: str, labels: Dict) -> None:
         """
@@ -891,11 +3018,13 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         for group in groups:
             self.inventory.add_group(group)
             self.inventory.add_child(group, hostname)
+            self._record("group", group)
+            self._record("child", group, hostname)
 
     def _set_ansible_host_and_port(
         self,
-        vmi: Dict,
-        hostname: str,
+        vmi: ObjectRecord,
+        hostvars: Dict,
         ip_address: str,
         service: Optional[Dict],
         opts: InventoryOptions,
@@ -909,13 +3038,13 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         if opts.kube_secondary_dns and opts.network_name:
             # Set ansible_host to the kubesecondarydns derived host name if enabled
             # See https://github.com/kubevirt/kubesecondarydns#parameters
-            ansible_host = f"{opts.network_name}.{vmi['metadata']['name']}.{vmi['metadata']['namespace']}.vm"
+            ansible_host = f"{opts.network_name}.{vmi.name}.{vmi.namespace}.vm"
             if opts.base_domain:
                 ansible_host += f".{opts.base_domain}"
         elif opts.use_service and service and not opts.network_name:
             # Set ansible_host and ansible_port to the host and port from the LoadBalancer
             # or NodePort service exposing SSH
-            node_name = vmi["status"].get("nodeName")
+            node_name = vmi.status.get("nodeName")
             if node_name and opts.append_base_domain and opts.base_domain:
                 node_name += f".{opts.base_domain}"
             host = self._get_host_from_service(service, node_name)
@@ -928,43 +3057,328 @@ class InventoryModule(BaseInventoryPlugin, Constructable, Cacheable):
         if ansible_host is None:
             ansible_host = ip_address
 
-        self.inventory.set_variable(hostname, "ansible_host", ansible_host)
+        hostvars["ansible_host"] = ansible_host
         if opts.unset_ansible_port or ansible_port is not None:
-            self.inventory.set_variable(hostname, "ansible_port", ansible_port)
+            hostvars["ansible_port"] = ansible_port
 
-    def _set_composable_vars(self, hostname: str) -> None:
+    def _get_constructed_options(self) -> ConstructedOptions:
         """
-        _set_composable_vars sets vars per
-        https://docs.ansible.com/ansible/latest/dev_guide/developing_inventory.html
+        _get_constructed_options reads the options of Constructable and marks
+        their expressions as trusted templates.
         """
-        hostvars = self.inventory.get_host(hostname).get_vars()
-        strict = self.get_option("strict")
+        compose = self.get_option("compose")
+        groups = self.get_option("groups")
+        keyed_groups = self.get_option("keyed_groups")
+
+        simple_expressions = {}
+        referenced_variables = {}
+        if trust_as_template is not None:
+            compose = {k: trust_as_template(v) for k, v in compose.items()}
+            groups = {k: trust_as_template(v) for k, v in groups.items()}
+            keyed_groups = [
+                {**d, "key": trust_as_template(d["key"])} for d in keyed_groups
+            ]
+            # Simple expressions are only evaluated natively on ansible-core
+            # >= 2.19, as older releases render expressions to strings. Extra
+            # vars take precedence over the vars of a host, so they disable it.
+            try:
+                use_extra_vars = self.get_option("use_extra_vars")
+            except Exception:
+                use_extra_vars = False
+            if not use_extra_vars:
+                expressions = list(compose.values()) + [d["key"] for d in keyed_groups]
+                for expression in expressions:
+                    if isinstance(expression, str) and (
+                        path := self._parse_simple_expression(expression)
+                    ):
+                        simple_expressions[expression] = path
+                for expression in expressions + list(groups.values()):
+                    if (
+                        isinstance(expression, str)
+                        and (names := self._get_referenced_variables(expression))
+                        is not None
+                    ):
+                        referenced_variables[expression] = names
+
+        return ConstructedOptions(
+            compose=compose,
+            groups=groups,
+            keyed_groups=keyed_groups,
+            strict=self.get_option("strict"),
+            simple_expressions=simple_expressions,
+            referenced_variables=referenced_variables,
+            template_results=TemplateResultsCache(TEMPLATE_RESULTS_CACHE_SIZE),
+        )
 
-        def trust_compose_groups(data: Dict) -> Dict:
-            if trust_as_template is not None:
-                return {k: trust_as_template(v) for k, v in data.items()}
-            return data
+    @staticmethod
+    def _get_referenced_variables(expression: str) -> Optional[Tuple[str, ...]]:
+        """
+        _get_referenced_variables returns the names of the variables an
+        expression references. It returns None if the expression cannot be
+        analyzed or if its result could depend on more than the values of
+        these variables, e.g. because it calls lookups or random filters.
+        """
+        if any(d in expression for d in ("{{", "}}", "{%", "%}", "{#", "#}")):
+            return None
+        try:
+            ast = Environment().parse(f"{{{{ {expression} }}}}")
+        except TemplateSyntaxError:
+            return None
 
-        def trust_keyed_groups(data: List) -> List:
-            if trust_as_template is not None:
-                return [{**d, "key": trust_as_template(d["key"])} for d in data]
-            return data
+        if any(isinstance(call.node, nodes.Name) for call in ast.find_all(nodes.Call)):
+            return None
+        if any(
+            f.name.rpartition(".")[2] in NONDETERMINISTIC_FILTERS
+            for f in ast.find_all(nodes.Filter)
+        ):
+            return None
 
-        self._set_composite_vars(
-            trust_compose_groups(self.get_option("compose")),
-            hostvars,
-            hostname,
-            strict=strict,
+        return tuple(
+            sorted({n.name for n in ast.find_all(nodes.Name) if n.ctx == "load"})
         )
+
+    @staticmethod
+    def _freeze(value: Any) -> Any:
+        """
+        _freeze turns a value into a hashable key. Types are part of the key
+        so that e.g. True and 1 are not confused.
+        """
+        if isinstance(value, dict):
+            return (
+                dict,
+                tuple(
+                    (InventoryModule._freeze(k), InventoryModule._freeze(v))
+                    for k, v in value.items()
+                ),
+            )
+        if isinstance(value, list):
+            return (list, tuple(InventoryModule._freeze(v) for v in value))
+        return (type(value), value)
+
+    def _get_template_result_key(
+        self, kind: str, expression: Any, variables: Dict
+    ) -> Optional[Tuple]:
+        """
+        _get_template_result_key returns the key of the memoized result of an
+        expression, made of the expression and the values of the variables it
+        references. It returns None if the result cannot be memoized.
+        """
+        if self._constructed is None or not isinstance(expression, str):
+            return None
+        if (names := self._constructed.referenced_variables.get(expression)) is None:
+            return None
+
+        values = []
+        for name in names:
+            if name not in variables or self._contains_template(variables[name]):
+                return None
+            values.append(self._freeze(variables[name]))
+
+        key = (kind, expression, tuple(values))
+        try:
+            hash(key)
+        except TypeError:
+            return None
+        return key
+
+    @staticmethod
+    def _parse_simple_expression(expression: str) -> Optional[Tuple]:
+        """
+        _parse_simple_expression parses an expression consisting only of a
+        variable name followed by attribute or key lookups, e.g.
+        vm_labels['app'] or vmi_interfaces[0].ipAddress. It returns the name
+        and the lookups or None if the expression is not that simple.
+        """
+        if not (match := SIMPLE_EXPRESSION_ROOT_PATTERN.match(expression)):
+            return None
+        name = match.group(1)
+        if name in SIMPLE_EXPRESSION_LITERALS:
+            return None
+
+        lookups = []
+        pos = match.end()
+        rest = expression.rstrip()
+        while pos < len(rest):
+            if not (match := SIMPLE_EXPRESSION_SEGMENT_PATTERN.match(rest, pos)):
+                return None
+            attr, single_quoted, double_quoted, index = match.groups()
+            if attr is not None:
+                lookups.append(("attr", attr))
+            elif index is not None:
+                lookups.append(("item", int(index)))
+            else:
+                lookups.append(
+                    (
+                        "item",
+                        single_quoted if single_quoted is not None else double_quoted,
+                    )
+                )
+            pos = match.end()
+
+        return name, tuple(lookups)
+
+    @staticmethod
+    def _evaluate_simple_expression(path: Tuple, variables: Dict) -> Any:
+        """
+        _evaluate_simple_expression evaluates a parsed simple expression with
+        the passed in variables. It returns UNRESOLVED whenever the result
+        could differ from the result of the templar, e.g. if a lookup fails,
+        an attribute of a dict shadows one of its keys or a template would
+        need to be rendered.
+        """
+        name, lookups = path
+        if name not in variables:
+            return UNRESOLVED
+
+        value = variables[name]
+        for kind, key in lookups:
+            if isinstance(value, dict):
+                if kind == "attr" and hasattr(value, key):
+                    return UNRESOLVED
+                if isinstance(key, int) or key not in value:
+                    return UNRESOLVED
+                value = value[key]
+            elif isinstance(value, list) and kind == "item" and isinstance(key, int):
+                if key >= len(value):
+                    return UNRESOLVED
+                value = value[key]
+            else:
+                return UNRESOLVED
+
+        if InventoryModule._contains_template(value):
+            return UNRESOLVED
+
+        return deepcopy(value) if isinstance(value, (dict, list)) else value
+
+    @staticmethod
+    def _contains_template(value: Any) -> bool:
+        """
+        _contains_template returns whether a value contains strings the
+        templar would render as templates.
+        """
+        if isinstance(value, str):
+            return is_trusted_as_template(value)
+        if isinstance(value, dict):
+            return any(
+                InventoryModule._contains_template(k)
+                or InventoryModule._contains_template(v)
+                for k, v in value.items()
+            )
+        if isinstance(value, list):
+            return any(InventoryModule._contains_template(v) for v in value)
+        return False
+
+    def _compose(self, template: Any, variables: Dict, *args, **kwargs) -> Any:
+        """
+        _compose evaluates simple expressions of compose and keyed_groups
+        directly and leaves all other expressions to the templar. The templar
+        compiles an expression every time it evaluates it, as ansible-core has
+        no public API to reuse compiled expressions, so its results are
+        memoized where the referenced variables allow it.
+        """
+        if (
+            self._constructed is not None
+            and isinstance(template, str)
+            and (path := self._constructed.simple_expressions.get(template))
+        ):
+            value = self._evaluate_simple_expression(path, variables)
+            if value is not UNRESOLVED:
+                return value
+
+        key = self._get_template_result_key("compose", template, variables)
+        if key is not None:
+            value = self._constructed.template_results.get(key)
+            if value is not UNRESOLVED:
+                return value
+
+        value = super()._compose(template, variables, *args, **kwargs)
+        if key is not None:
+            self._constructed.template_results.set(key, value)
+        return value
+
+    def _add_host_to_composed_groups(
+        self,
+        groups: Dict,
+        variables: Dict,
+        host: str,
+        strict: bool = False,
+        fetch_hostvars: bool = True,
+    ) -> None:
+        """
+        _add_host_to_composed_groups works like the method of Constructable
+        but memoizes the results of the conditionals on ansible-core >= 2.19.
+        """
+        if trust_as_template is None or self._constructed is None:
+            super()._add_host_to_composed_groups(
+                groups, variables, host, strict=strict, fetch_hostvars=fetch_hostvars
+            )
+            return
+
+        if not groups or not isinstance(groups, dict):
+            return
+
+        if fetch_hostvars:
+            variables = combine_vars(
+                variables, self.inventory.get_host(host).get_vars()
+            )
+        self.templar.available_variables = variables
+        for group_name, conditional in groups.items():
+            group_name = self._sanitize_group_name(group_name)
+            key = self._get_template_result_key("conditional", conditional, variables)
+            result = UNRESOLVED
+            if key is not None:
+                result = self._constructed.template_results.get(key)
+            if result is UNRESOLVED:
+                try:
+                    result = self.templar.evaluate_conditional(conditional)
+                except Exception as e:
+                    if strict:
+                        raise AnsibleParserError(
+                            f"Could not add host {host} to group {group_name}: {to_native(e)}"
+                        )
+                    continue
+                if key is not None:
+                    self._constructed.template_results.set(key, result)
+
+            if result:
+                group_name = self.inventory.add_group(group_name)
+                self.inventory.add_child(group_name, host)
+
+    def _set_composable_vars(self, hostname: str) -> None:
+        """
+        _set_composable_vars sets vars per
+        https://docs.ansible.com/ansible/latest/dev_guide/developing_inventory.html
+        """
+        self._record("composable", hostname)
+        constructed = self._constructed
+        if (
+            not constructed.compose
+            and not constructed.groups
+            and not constructed.keyed_groups
+        ):
+            # Skip combining the vars of the host if nothing is composed
+            return
+
+        hostvars = self.inventory.get_host(hostname).get_vars()
+        if constructed.compose:
+            self._set_composite_vars(
+                constructed.compose,
+                hostvars,
+                hostname,
+                strict=constructed.strict,
+            )
+            # Composed vars can be used by groups and keyed_groups
+            hostvars = self.inventory.get_host(hostname).get_vars()
         self._add_host_to_composed_groups(
-            trust_compose_groups(self.get_option("groups")),
+            constructed.groups,
             hostvars,
             hostname,
-            strict=strict,
+            strict=constructed.strict,
+            fetch_hostvars=False,
         )
         self._add_host_to_keyed_groups(
-            trust_keyed_groups(self.get_option("keyed_groups")),
+            constructed.keyed_groups,
             hostvars,
             hostname,
-            strict=strict,
+            strict=constructed.strict,
         )
@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+"""
+Persistent state of the API discovery of a cluster.
+
+The dynamic client of kubernetes.core already stores discovered resources on
+disk, but it never expires them and it rediscovers all API groups whenever a
+lookup does not find a resource. Looking up optional resources like the
+OpenShift Project or DNS kinds therefore triggers a full discovery on every
+run against clusters without them. DiscoveryCache remembers such missing
+resources and expires the discovery of the client after a timeout.
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import tempfile
+from hashlib import sha256
+from json import dump, load
+from threading import Lock
+from time import time
+from typing import (
+    Any,
+    Optional,
+)
+
+# Handle import errors of python kubernetes client.
+try:
+    from kubernetes.dynamic.exceptions import ResourceNotFoundError
+except ImportError:
+
+    class ResourceNotFoundError(Exception):
+        """
+        Dummy class, mainly used for ansible-test sanity.
+        """
+
+
+class DiscoveryCache:
+    """
+    This class persists the resources missing on a cluster and the time the
+    discovery of the client was last refreshed.
+    """
+
+    def __init__(
+        self, host: str, timeout: int, cache_dir: Optional[str] = None
+    ) -> None:
+        self.path = os.path.join(
+            cache_dir or tempfile.gettempdir(),
+            f"kubevirt-discovery-{sha256(str(host).encode()).hexdigest()}.json",
+        )
+        self.timeout = timeout
+        self.timestamp = None
+        self.missing = set()
+        self._lock = Lock()
+        self._changed = False
+        # Whether any state was persisted, also if it expired
+        self._found = False
+        self._load()
+
+    def _load(self) -> None:
+        """
+        _load reads the persisted state if it exists and did not expire.
+        """
+        try:
+            with open(self.path, "r") as f:
+                data = load(f)
+        except (OSError, ValueError):
+            return
+
+        if not isinstance(data, dict) or not isinstance(
+            data.get("timestamp"), (int, float)
+        ):
+            return
+        self._found = True
+        if self.timeout and time() - data["timestamp"] > self.timeout:
+            return
+
+        self.timestamp = data["timestamp"]
+        self.missing = set(data.get("missing", []))
+
+    @property
+    def expired(self) -> bool:
+        """
+        expired returns whether the discovery of the client needs a refresh.
+        """
+        return self.timestamp is None
+
+    def refresh(self, client: Any) -> None:
+        """
+        refresh invalidates the discovery of the client and forgets about
+        missing resources. Without any persisted state, the discovery of the
+        client is kept and only the state is created.
+        """
+        if self._found:
+            client.resources.invalidate_cache()
+        with self._lock:
+            self.timestamp = time()
+            self.missing = set()
+            self._changed = True
+            self._found = True
+
+    def get(self, client: Any, api_version: str, kind: str) -> Any:
+        """
+        get looks up a resource with the discovery of the client. Resources
+        known to be missing raise ResourceNotFoundError without a lookup.
+        """
+        key = f"{api_version}/{kind}"
+        if key in self.missing:
+            raise ResourceNotFoundError(f"No matches found for {key}")
+
+        try:
+            return client.resources.get(api_version=api_version, kind=kind)
+        except ResourceNotFoundError:
+            with self._lock:
+                self.missing.add(key)
+                self._changed = True
+            raise
+
+    def save(self) -> None:
+        """
+        save atomically writes the state if it changed.
+        """
+        if not self._changed:
+            return
+
+        # Failing to persist the state only costs another discovery
+        tmp_path = None
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path))
+            with os.fdopen(fd, "w") as f:
+                dump({"timestamp": self.timestamp, "missing": sorted(self.missing)}, f)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            if tmp_path is not None and os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            return
+        self._changed = False
@@ -11,6 +11,12 @@ from ansible_collections.kubernetes.core.plugins.module_utils.k8s.exceptions imp
 )
 from ansible_collections.kubernetes.core.plugins.module_utils.k8s.service import (
     K8sService,
+    hide_fields,
+)
+
+from ansible_collections.kubevirt.core.plugins.module_utils.snapshot import (
+    find_in_snapshot,
+    read_snapshot,
 )
 
 INFO_ARG_SPEC = {
@@ -22,15 +28,50 @@ INFO_ARG_SPEC = {
     "wait": {"type": "bool"},
     "wait_sleep": {"type": "int", "default": 5},
     "wait_timeout": {"type": "int", "default": 120},
+    "snapshot_file": {"type": "path"},
+    "snapshot_max_age": {"type": "int", "default": 60},
+    "resource_version": {},
 }
 
 
+class ResourceVersionClient:
+    """
+    This class wraps a client and passes a resource version to all reads, so
+    they can be served from the watch cache of the API server.
+    """
+
+    def __init__(self, client, resource_version):
+        self._client = client
+        self._resource_version = resource_version
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def get(self, resource, **params):
+        """
+        get reads resources at the resource version. Lists are served at the
+        resource version or a newer one.
+        """
+        params["resource_version"] = self._resource_version
+        # resourceVersionMatch is only supported by lists
+        if not params.get("name"):
+            params["resource_version_match"] = "NotOlderThan"
+        return self._client.get(resource, **params)
+
+
 def execute_info_module(module, kind, wait_condition):
     """
     execute_info_module runs the lookup of resources.
     """
     try:
         client = get_api_client(module)
+        resources = find_resources_in_snapshot(module, kind, client.configuration.host)
+        if resources is not None:
+            module.exit_json(changed=False, resources=resources, api_found=True)
+            return
+
+        if module.params["resource_version"] is not None:
+            client = ResourceVersionClient(client, module.params["resource_version"])
         svc = K8sService(client, module)
         facts = svc.find(
             kind=kind,
@@ -48,3 +89,36 @@ def execute_info_module(module, kind, wait_condition):
         module.exit_json(changed=False, **facts)
     except CoreException as exc:
         module.fail_from_exception(exc)
+
+
+def find_resources_in_snapshot(module, kind, host):
+    """
+    find_resources_in_snapshot looks up resources in the snapshot configured
+    with snapshot_file if it was taken of the cluster at host. It returns None
+    if the lookup has to be run against the API server.
+    """
+    if not module.params["snapshot_file"] or module.params["wait"]:
+        return None
+
+    snapshot = read_snapshot(
+        module.params["snapshot_file"], module.params["snapshot_max_age"]
+    )
+    if snapshot is None:
+        return None
+
+    resources = find_in_snapshot(
+        snapshot,
+        kind,
+        module.params["api_version"],
+        name=module.params["name"],
+        namespace=module.params["namespace"],
+        label_selectors=module.params["label_selectors"],
+        field_selectors=module.params["field_selectors"],
+        host=host,
+    )
+    if resources is None:
+        return None
+
+    return [
+        hide_fields(resource, module.params["hidden_fields"]) for resource in resources
+    ]
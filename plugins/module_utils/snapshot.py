@@ -0,0 +1,433 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+"""
+Local snapshots of KubeVirt objects.
+
+A snapshot is written by a long-running watch process and can be read by the
+kubevirt inventory and the kubevirt_vm_info and kubevirt_vmi_info modules
+instead of listing objects from the API server on every run.
+
+Start the watch process with:
+
+    PYTHONPATH=~/.ansible/collections python -m \\
+        ansible_collections.kubevirt.core.plugins.module_utils.snapshot \\
+        --output /var/cache/kubevirt/snapshot.json
+"""
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import os
+import sys
+import tempfile
+from argparse import ArgumentParser
+from json import dump, load, loads
+from re import compile as re_compile
+from threading import Event, Lock, Thread
+from time import time
+from typing import (
+    Any,
+    Dict,
+    List,
+    Optional,
+)
+
+# Handle import errors of python kubernetes client.
+try:
+    from kubernetes.client.rest import ApiException
+except ImportError:
+
+    class ApiException(Exception):
+        """
+        Dummy class, mainly used for ansible-test sanity.
+        """
+
+
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_KINDS = ("VirtualMachine", "VirtualMachineInstance", "Service")
+HTTP_STATUS_GONE = 410
+
+# Requirements of a label selector, e.g. 'app=test', 'app!=test', 'app',
+# '!app', 'app in (a, b)' or 'app notin (a, b)'
+_LABEL_REQUIREMENT_PATTERN = re_compile(
+    r"^(?P<not>!)?(?P<key>[\w./-]+)"
+    r"(?:(?P<op>==|=|!=)(?P<value>[\w.-]*)"
+    r"|\s+(?P<set_op>in|notin)\s*\((?P<values>[^)]*)\))?$"
+)
+
+
+class SnapshotStore:
+    """
+    This class holds the objects of all watched kinds in memory, similar to
+    the store of an informer.
+    """
+
+    def __init__(self, kinds: List[str]) -> None:
+        self._lock = Lock()
+        self._objects = {kind: {} for kind in kinds}
+        self._synced = set()
+
+    def replace(self, kind: str, items: List[Dict]) -> None:
+        """
+        replace sets the objects of a kind from a full list.
+        """
+        with self._lock:
+            self._objects[kind] = {
+                item.get("metadata", {}).get("uid"): item for item in items
+            }
+            self._synced.add(kind)
+
+    def apply(self, kind: str, event_type: str, obj: Dict) -> None:
+        """
+        apply updates the objects of a kind with a watch event.
+        """
+        uid = obj.get("metadata", {}).get("uid")
+        with self._lock:
+            if event_type in ("ADDED", "MODIFIED"):
+                self._objects[kind][uid] = obj
+            elif event_type == "DELETED":
+                self._objects[kind].pop(uid, None)
+
+    def is_synced(self) -> bool:
+        """
+        is_synced returns whether all kinds were listed at least once.
+        """
+        with self._lock:
+            return self._synced == set(self._objects)
+
+    def snapshot(self, **fields) -> Dict:
+        """
+        snapshot returns the current objects of all kinds in the order a list
+        would return them together with the passed in fields.
+        """
+        with self._lock:
+            objects = {
+                kind: sorted(
+                    objs.values(),
+                    key=lambda obj: (
+                        obj["metadata"].get("namespace", ""),
+                        obj["metadata"].get("name", ""),
+                    ),
+                )
+                for kind, objs in self._objects.items()
+            }
+        return {
+            "version": SNAPSHOT_FORMAT_VERSION,
+            "timestamp": time(),
+            **fields,
+            "objects": objects,
+        }
+
+
+def write_snapshot(path: str, snapshot: Dict) -> None:
+    """
+    write_snapshot atomically writes a snapshot to path.
+    """
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)))
+    try:
+        with os.fdopen(fd, "w") as f:
+            dump(snapshot, f)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def read_snapshot(path: str, max_age: int) -> Optional[Dict]:
+    """
+    read_snapshot reads a snapshot from path. It returns None if the snapshot
+    does not exist, cannot be read, has an unknown format or is older than
+    max_age seconds.
+    """
+    try:
+        with open(path, "r") as f:
+            snapshot = load(f)
+    except (OSError, ValueError):
+        return None
+
+    if not isinstance(snapshot, dict):
+        return None
+    if snapshot.get("version") != SNAPSHOT_FORMAT_VERSION:
+        return None
+    if time() - snapshot.get("timestamp", 0) > max_age:
+        return None
+
+    return snapshot
+
+
+def _split_label_selector(selector: str) -> List[str]:
+    """
+    _split_label_selector splits a label selector into its requirements.
+    Commas within parentheses do not separate requirements.
+    """
+    requirements = []
+    depth = 0
+    current = ""
+    for char in selector:
+        if char == "(":
+            depth += 1
+        elif char == ")":
+            depth -= 1
+        if char == "," and depth == 0:
+            requirements.append(current.strip())
+            current = ""
+        else:
+            current += char
+    requirements.append(current.strip())
+    return [requirement for requirement in requirements if requirement]
+
+
+def parse_label_selector(selector: Optional[str]) -> Optional[List[Dict]]:
+    """
+    parse_label_selector parses a label selector into a list of requirements.
+    It returns None if the selector cannot be parsed.
+    """
+    requirements = []
+    for requirement in _split_label_selector(selector or ""):
+        if not (match := _LABEL_REQUIREMENT_PATTERN.match(requirement)):
+            return None
+        if match.group("not") and (match.group("op") or match.group("set_op")):
+            return None
+        if match.group("op"):
+            op = "!=" if match.group("op") == "!=" else "="
+            values = [match.group("value")]
+        elif match.group("set_op"):
+            op = match.group("set_op")
+            values = [v.strip() for v in match.group("values").split(",")]
+        else:
+            op = "!exists" if match.group("not") else "exists"
+            values = []
+        requirements.append({"key": match.group("key"), "op": op, "values": values})
+
+    return requirements
+
+
+def match_labels(requirements: List[Dict], labels: Optional[Dict]) -> bool:
+    """
+    match_labels returns whether labels satisfy all parsed requirements.
+    """
+    labels = labels or {}
+    for requirement in requirements:
+        key = requirement["key"]
+        op = requirement["op"]
+        if op == "exists" and key not in labels:
+            return False
+        if op == "!exists" and key in labels:
+            return False
+        if op in ("=", "in") and labels.get(key) not in requirement["values"]:
+            return False
+        if (
+            op in ("!=", "notin")
+            and key in labels
+            and labels[key] in requirement["values"]
+        ):
+            return False
+
+    return True
+
+
+def find_in_snapshot(
+    snapshot: Dict,
+    kind: str,
+    api_version: str,
+    name: Optional[str] = None,
+    namespace: Optional[str] = None,
+    label_selectors: Optional[List[str]] = None,
+    field_selectors: Optional[List[str]] = None,
+    host: Optional[str] = None,
+) -> Optional[List[Dict]]:
+    """
+    find_in_snapshot looks up objects of a kind in a snapshot. It returns None
+    if the lookup cannot be answered from the snapshot, e.g. because the
+    snapshot was taken of another cluster than host, with a different label
+    selector or field selectors were requested. Services are watched without
+    a label selector, so any label selector can be answered for them.
+    """
+    if kind not in snapshot.get("objects", {}) or field_selectors:
+        return None
+    # Never answer lookups of one cluster with the objects of another one
+    snapshot_host = (snapshot.get("host") or "").rstrip("/")
+    if host is not None and snapshot_host != host.rstrip("/"):
+        return None
+    if kind != "Service" and snapshot.get("api_version") != api_version:
+        return None
+
+    label_selector = ",".join(label_selectors or [])
+    if (
+        kind != "Service"
+        and snapshot.get("label_selector")
+        and snapshot["label_selector"] != label_selector
+    ):
+        return None
+    if (requirements := parse_label_selector(label_selector)) is None:
+        return None
+
+    return [
+        obj
+        for obj in snapshot["objects"][kind]
+        if (name is None or obj["metadata"].get("name") == name)
+        and (namespace is None or obj["metadata"].get("namespace") == namespace)
+        and match_labels(requirements, obj["metadata"].get("labels"))
+    ]
+
+
+def _sync_kind(
+    client: Any,
+    store: SnapshotStore,
+    api_version: str,
+    kind: str,
+    label_selector: Optional[str],
+    watch_timeout: int,
+    stop: Event,
+) -> None:
+    """
+    _sync_kind lists the objects of a kind and keeps them up to date by
+    watching for changes until stop is set. The objects are listed again if
+    the watched resource version expired or after any other error, e.g. when
+    the API server is restarted.
+    """
+    kwargs = {"label_selector": label_selector} if label_selector else {}
+    resource = None
+    resource_version = None
+    while not stop.is_set():
+        try:
+            if resource is None:
+                resource = client.resources.get(api_version=api_version, kind=kind)
+            if resource_version is None:
+                result = loads(resource.get(serialize=False, **kwargs).data)
+                store.replace(kind, result.get("items") or [])
+                resource_version = result.get("metadata", {}).get("resourceVersion")
+
+            for event in resource.watch(
+                resource_version=resource_version, timeout=watch_timeout, **kwargs
+            ):
+                obj = event["raw_object"]
+                store.apply(kind, event["type"], obj)
+                resource_version = obj.get("metadata", {}).get(
+                    "resourceVersion", resource_version
+                )
+                if stop.is_set():
+                    return
+        except ApiException as exc:
+            if exc.status != HTTP_STATUS_GONE:
+                print(
+                    f"Error watching {kind} list: {exc.status} {exc.reason}",
+                    file=sys.stderr,
+                )
+                stop.wait(watch_timeout)
+            resource_version = None
+        except Exception as exc:
+            print(f"Error watching {kind} list: {exc}", file=sys.stderr)
+            stop.wait(watch_timeout)
+            resource_version = None
+
+
+def _get_cluster_domain(client: Any) -> Optional[str]:
+    """
+    _get_cluster_domain tries to get the base domain of an OpenShift cluster.
+    """
+    try:
+        v1_dns = client.resources.get(api_version="config.openshift.io/v1", kind="DNS")
+        return v1_dns.get(name="cluster").get("spec", {}).get("baseDomain")
+    except Exception:
+        return None
+
+
+def run(
+    client: Any,
+    output: str,
+    api_version: str = "kubevirt.io/v1",
+    label_selector: Optional[str] = None,
+    write_interval: int = 5,
+    watch_timeout: int = 300,
+    stop: Optional[Event] = None,
+) -> None:
+    """
+    run watches VMs, VMIs and Services and writes a snapshot to output every
+    write_interval seconds, so readers can tell it is still up to date. It
+    stops writing and raises RuntimeError if watching any kind stopped.
+    """
+    stop = stop or Event()
+    store = SnapshotStore(list(SNAPSHOT_KINDS))
+    fields = {
+        "host": client.configuration.host,
+        "api_version": api_version,
+        "label_selector": label_selector,
+        "cluster_domain": _get_cluster_domain(client),
+    }
+
+    threads = [
+        Thread(
+            target=_sync_kind,
+            args=(
+                client,
+                store,
+                "v1" if kind == "Service" else api_version,
+                kind,
+                None if kind == "Service" else label_selector,
+                watch_timeout,
+                stop,
+            ),
+            daemon=True,
+        )
+        for kind in SNAPSHOT_KINDS
+    ]
+    for thread in threads:
+        thread.start()
+
+    try:
+        while not stop.wait(write_interval):
+            if not all(thread.is_alive() for thread in threads):
+                raise RuntimeError("Watching objects stopped unexpectedly")
+            if store.is_synced():
+                write_snapshot(output, store.snapshot(**fields))
+    finally:
+        stop.set()
+
+
+def main() -> None:
+    """
+    main parses the command line arguments and runs the watch process.
+    """
+    # Import here to allow reading snapshots without kubernetes.core
+    from ansible_collections.kubernetes.core.plugins.module_utils.k8s.client import (
+        get_api_client,
+    )
+
+    parser = ArgumentParser(
+        description="Watch KubeVirt objects and keep a local snapshot of them."
+    )
+    parser.add_argument("--output", required=True, help="Path of the snapshot file")
+    parser.add_argument("--kubeconfig", help="Path to an existing kubeconfig file")
+    parser.add_argument("--context", help="Name of the kubeconfig context to use")
+    parser.add_argument("--host", help="URL of the API server")
+    parser.add_argument("--api-version", default="kubevirt.io/v1")
+    parser.add_argument("--label-selector", help="Only watch matching VMs and VMIs")
+    parser.add_argument("--write-interval", type=int, default=5)
+    parser.add_argument("--watch-timeout", type=int, default=300)
+    args = parser.parse_args()
+
+    client = get_api_client(
+        kubeconfig=args.kubeconfig, context=args.context, host=args.host
+    )
+    try:
+        run(
+            client,
+            args.output,
+            api_version=args.api_version,
+            label_selector=args.label_selector,
+            write_interval=args.write_interval,
+            watch_timeout=args.watch_timeout,
+        )
+    except KeyboardInterrupt:
+        pass
+    except RuntimeError as exc:
+        # Exit with an error so a supervisor restarts the watch process
+        sys.exit(f"Error: {exc}")
+
+
+if __name__ == "__main__":
+    main()
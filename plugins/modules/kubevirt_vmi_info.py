@@ -75,6 +75,32 @@ options:
     elements: str
     default: ['metadata.annotations[kubemacpool.io/transaction-timestamp]', metadata.managedFields]
     version_added: 2.2.0
+  snapshot_file:
+    description:
+    - Path to a snapshot written by the watch process shipped in C(kubevirt.core.plugins.module_utils.snapshot).
+    - If set, C(VirtualMachineInstances) are looked up in the snapshot instead of the API server.
+    - The API server is queried if the snapshot is missing, older than O(snapshot_max_age),
+      was taken of another cluster or with different label selectors or if O(wait) or
+      O(field_selectors) are set.
+    - Objects are read with the permissions of the watch process instead of the configured
+      credentials, so restrict access to the snapshot file accordingly.
+    type: path
+    version_added: 2.4.0
+  snapshot_max_age:
+    description:
+    - Maximum age in seconds of a snapshot read from O(snapshot_file).
+    default: 60
+    type: int
+    version_added: 2.4.0
+  resource_version:
+    description:
+    - Resource version to look up C(VirtualMachineInstances) at. Lists are requested with
+      C(resourceVersionMatch=NotOlderThan).
+    - Set to V("0") to serve the lookup from the watch cache of the API server instead of reading it
+      from etcd. This lowers the load of the API server and etcd, but returned resources may be
+      slightly out of date.
+    type: str
+    version_added: 2.4.0
 
 requirements:
   - "python >= 3.9"
@@ -0,0 +1,181 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible.inventory.data import InventoryData
+from ansible.plugins.inventory import Cacheable
+
+from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    InventoryOptions,
+)
+
+from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants import (
+    DEFAULT_NAMESPACE,
+)
+
+VM = {
+    "metadata": {
+        "name": "testvm",
+        "namespace": DEFAULT_NAMESPACE,
+        "uid": "940003aa-0160-4b7e-9e55-8ec3df72047f",
+        "labels": {"app": "test"},
+    },
+    "spec": {},
+    "status": {"printableStatus": "Running"},
+}
+
+VMI = {
+    "metadata": {
+        "name": "testvm",
+        "namespace": DEFAULT_NAMESPACE,
+        "uid": "a84319a9-db31-4a36-9b66-3e387578f871",
+        "labels": {"app": "test", "kubevirt.io/domain": "testvm"},
+    },
+    "spec": {},
+    "status": {
+        "interfaces": [{"ipAddress": "10.10.10.10"}],
+        "nodeName": "test-node",
+        "guestOSInfo": {"id": "mswindows"},
+    },
+}
+
+SERVICE = {
+    "metadata": {
+        "name": "testsvc",
+        "namespace": DEFAULT_NAMESPACE,
+        "uid": "6ffdef43-6c39-4441-a088-82d319ea5c13",
+    },
+    "spec": {
+        "type": "NodePort",
+        "ports": [{"targetPort": 5986, "nodePort": 31986}],
+        "selector": {"kubevirt.io/domain": "testvm"},
+    },
+    "status": {},
+}
+
+RESULTS = {
+    "default_hostname": "test",
+    "cluster_domain": "example.com",
+    "namespaces": {
+        DEFAULT_NAMESPACE: {
+            "vms": [VM],
+            "vmis": [VMI],
+            "services": {"testvm": [SERVICE]},
+        },
+    },
+}
+
+HOST = f"{DEFAULT_NAMESPACE}-testvm"
+
+
+@pytest.fixture
+def cache(mocker, inventory):
+    cache = {}
+    mocker.patch.object(
+        Cacheable, "cache", new_callable=mocker.PropertyMock, return_value=cache
+    )
+    mocker.patch.object(
+        inventory,
+        "get_option",
+        side_effect=lambda option: {"cache": True, "cache_timeout": 3600}.get(
+            option, inventory._options.get(option)
+        ),
+    )
+    return cache
+
+
+def opts():
+    return InventoryOptions(create_groups=True)
+
+
+def record_plan(inventory):
+    inventory._write_cache("key", RESULTS)
+    cached, _ = inventory._read_cache("key", opts())
+    options_hash = inventory._get_options_hash(opts())
+    inventory._operations = []
+    inventory._populate_inventory(cached, opts())
+    inventory._write_plan("key", options_hash)
+    inventory._operations = None
+    return cached
+
+
+def dump(data):
+    return {
+        "hosts": {
+            name: (host.vars, sorted(group.name for group in host.groups))
+            for name, host in data.hosts.items()
+        },
+        "groups": {
+            name: sorted(child.name for child in group.child_groups)
+            for name, group in data.groups.items()
+        },
+    }
+
+
+def test_populate_inventory_from_plan(mocker, inventory, cache):
+    inventory._options = {
+        "compose": {"node": "vmi_node_name | upper"},
+        "groups": {"running": "vm_printable_status == 'Running'"},
+        "keyed_groups": [{"prefix": "app", "key": "vmi_labels['app']"}],
+        "strict": True,
+    }
+    inventory.inventory = InventoryData()
+    cached = record_plan(inventory)
+    expected = dump(inventory.inventory)
+
+    assert expected["hosts"][HOST][0]["ansible_connection"] == "winrm"
+    assert expected["hosts"][HOST][0]["ansible_port"] == 31986
+    assert expected["hosts"][HOST][0]["node"] == "TEST-NODE"
+
+    inventory.inventory = InventoryData()
+    populate_inventory_from_namespace = mocker.spy(
+        inventory, "_populate_inventory_from_namespace"
+    )
+    plan = inventory._read_plan("key", cached, opts())
+    assert plan is not None
+    inventory._populate_inventory_from_plan(cached, opts(), plan)
+
+    populate_inventory_from_namespace.assert_not_called()
+    assert dump(inventory.inventory) == expected
+
+
+def test_read_plan_revision_changed(inventory, cache):
+    inventory.inventory = InventoryData()
+    record_plan(inventory)
+
+    inventory._write_cache("key", RESULTS)
+    cached, _ = inventory._read_cache("key", opts())
+    assert inventory._read_plan("key", cached, opts()) is None
+
+
+def test_read_plan_options_changed(inventory, cache):
+    inventory.inventory = InventoryData()
+    cached = record_plan(inventory)
+
+    inventory.inventory = InventoryData()
+    assert inventory._read_plan("key", cached, InventoryOptions()) is None
+
+
+def test_read_plan_host_exists(inventory, cache):
+    inventory.inventory = InventoryData()
+    cached = record_plan(inventory)
+
+    inventory.inventory = InventoryData()
+    inventory.inventory.add_host(HOST)
+    assert inventory._read_plan("key", cached, opts()) is None
+
+
+def test_no_plan_for_existing_hosts(inventory, cache):
+    inventory.inventory = InventoryData()
+    inventory.inventory.add_host(HOST)
+    inventory.inventory.set_variable(HOST, "ansible_connection", "ssh")
+
+    record_plan(inventory)
+
+    assert not any(key.startswith("key_plan") for key in cache)
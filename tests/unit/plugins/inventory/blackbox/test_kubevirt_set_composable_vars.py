@@ -88,3 +88,86 @@ def test_set_composable_vars_strict_false_ignores_compose_errors(
     host = f"{DEFAULT_NAMESPACE}-testvmi"
     assert host in hosts
     assert "custom_label" not in hosts[host]
+
+
+def test_set_composable_vars_skipped_without_options(mocker, inventory):
+    get_host = mocker.patch.object(inventory.inventory, "get_host")
+    inventory._constructed = inventory._get_constructed_options()
+
+    inventory._set_composable_vars(f"{DEFAULT_NAMESPACE}-testvmi")
+
+    get_host.assert_not_called()
+
+
+def test_set_composable_vars_multiple_hosts(inventory, groups, hosts):
+    inventory._options = {
+        "compose": {"set_from_another_var": "vmi_node_name | upper"},
+        "groups": {},
+        "keyed_groups": [],
+        "strict": True,
+    }
+    vmis = [
+        {
+            **VMI,
+            "metadata": {**VMI["metadata"], "name": f"testvmi{i}"},
+            "status": {**VMI["status"], "nodeName": f"test-node{i}"},
+        }
+        for i in range(3)
+    ]
+    inventory._populate_inventory(
+        {
+            "default_hostname": "test",
+            "cluster_domain": "test.com",
+            "namespaces": {
+                "default": {"vms": [], "vmis": vmis, "services": {}},
+            },
+        },
+        InventoryOptions(),
+    )
+
+    for i in range(3):
+        assert (
+            hosts[f"{DEFAULT_NAMESPACE}-testvmi{i}"]["set_from_another_var"]
+            == f"TEST-NODE{i}"
+        )
+
+
+def test_set_composable_vars_memoizes_conditionals(mocker, inventory, groups, hosts):
+    inventory._options = {
+        "compose": {},
+        "groups": {
+            "block_migratable_vmis": "vmi_migration_method == 'BlockMigration'",
+            "node0_vmis": "vmi_node_name == 'test-node0'",
+        },
+        "keyed_groups": [],
+        "strict": True,
+    }
+    vmis = [
+        {
+            **VMI,
+            "metadata": {**VMI["metadata"], "name": f"testvmi{i}"},
+            "status": {**VMI["status"], "nodeName": f"test-node{i % 2}"},
+        }
+        for i in range(4)
+    ]
+    evaluate_conditional = mocker.spy(inventory.templar, "evaluate_conditional")
+    inventory._populate_inventory(
+        {
+            "default_hostname": "test",
+            "cluster_domain": "test.com",
+            "namespaces": {
+                "default": {"vms": [], "vmis": vmis, "services": {}},
+            },
+        },
+        InventoryOptions(),
+    )
+
+    assert groups["block_migratable_vmis"]["children"] == [
+        f"{DEFAULT_NAMESPACE}-testvmi{i}" for i in range(4)
+    ]
+    assert groups["node0_vmis"]["children"] == [
+        f"{DEFAULT_NAMESPACE}-testvmi0",
+        f"{DEFAULT_NAMESPACE}-testvmi2",
+    ]
+    # One evaluation of the first group and one per node of the second group
+    assert evaluate_conditional.call_count == 3
@@ -6,6 +6,9 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+import tempfile
+from json import dumps
+
 import pytest
 
 from kubernetes.dynamic.exceptions import ResourceNotFoundError
@@ -23,6 +26,14 @@ from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants im
 )
 
 
+@pytest.fixture(autouse=True)
+def tempdir(monkeypatch, tmp_path):
+    # Keep files persisted by the inventory, e.g. the discovery cache,
+    # out of the temporary directory of the system.
+    monkeypatch.setattr(tempfile, "tempdir", str(tmp_path))
+    return tmp_path
+
+
 @pytest.fixture(scope="function")
 def inventory(mocker):
     inventory = InventoryModule()
@@ -59,6 +70,7 @@ def inventory_data(mocker, inventory):
 
     def get_host(hostname):
         host = mocker.Mock()
+        host.vars = hosts[hostname]
         host.get_vars = mocker.Mock(return_value=hosts[hostname])
         return host
 
@@ -92,30 +104,29 @@ def client(mocker, request):
     if hasattr(request, "param"):
         param = request.param
 
-    namespaces = mocker.Mock()
+    def list_response(items):
+        response = mocker.Mock()
+        response.data = dumps({"metadata": {}, "items": items}).encode()
+        return response
+
     if "namespaces" in param:
         items = param["namespaces"]
     else:
         items = [{"metadata": {"name": DEFAULT_NAMESPACE}}]
-    namespaces.items = [ResourceField(item) for item in items]
+    namespaces = list_response(items)
 
-    vms = mocker.Mock()
-    vms.items = [ResourceField(item) for item in param.get("vms", [])]
-    vmis = mocker.Mock()
-    vmis.items = [ResourceField(item) for item in param.get("vmis", [])]
-    services = mocker.Mock()
-    services.items = [ResourceField(item) for item in param.get("services", [])]
+    vms = list_response(param.get("vms", []))
+    vmis = list_response(param.get("vmis", []))
+    services = list_response(param.get("services", []))
 
-    dns = mocker.Mock()
     if "base_domain" in param:
         base_domain = param["base_domain"]
     else:
         base_domain = DEFAULT_BASE_DOMAIN
     dns_obj = ResourceField({"spec": {"baseDomain": base_domain}})
-    dns.items = [dns_obj]
+    dns = list_response([{"spec": {"baseDomain": base_domain}}])
 
-    projects = mocker.Mock()
-    projects.items = [ResourceField(item) for item in param.get("projects", [])]
+    projects = param.get("projects", [])
 
     namespace_client = mocker.Mock()
     namespace_client.get = mocker.Mock(return_value=namespaces)
@@ -134,10 +145,10 @@ def client(mocker, request):
     dns_client = mocker.Mock()
     dns_client.get = dns_client_get
 
-    def project_client_get():
-        if not projects.items:
+    def project_client_get(**kwargs):
+        if not projects:
             raise ResourceNotFoundError
-        return projects
+        return list_response(projects)
 
     project_client = mocker.Mock()
     project_client.get = project_client_get
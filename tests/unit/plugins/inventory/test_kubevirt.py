@@ -6,11 +6,14 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+from copy import deepcopy
+
 import pytest
 
 from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
     InventoryModule,
     InventoryOptions,
+    ObjectRecord,
 )
 
 from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants import (
@@ -97,53 +100,152 @@ def test_obj_is_valid(obj, expected):
 
 
 @pytest.mark.parametrize(
-    "services,target_port,expected",
+    "kind,spec",
     [
-        ([], 1234, None),
-        ([{"spec": {"something": "something"}}], 1234, None),
-        ([{"spec": {"ports": []}}], 1234, None),
-        ([{"spec": {"ports": [{"port": 1234}]}}], 1234, None),
-        ([{"spec": {"ports": [{"targetPort": 2222}]}}], 1234, None),
+        ("VirtualMachine", {}),
+        ("VirtualMachineInstance", {}),
+        ("Service", {"type": "NodePort", "ports": [{"nodePort": 31422}]}),
+    ],
+)
+def test_prune_object(kind, spec):
+    obj = {
+        "metadata": {
+            "name": "testvm",
+            "namespace": "default",
+            "uid": "f8abae7c-d792-4b9b-af95-62d322ae5bc1",
+            "labels": {"app": "test"},
+            "annotations": {
+                "kubectl.kubernetes.io/last-applied-configuration": "{}",
+                "testanno": "testval",
+            },
+            "resourceVersion": "123",
+            "generation": 2,
+            "managedFields": [{"manager": "test"}],
+        },
+        "spec": {"type": "NodePort", "ports": [{"nodePort": 31422}]},
+        "status": {"ready": True},
+    }
+
+    assert InventoryModule._prune_object(kind, obj) == {
+        "metadata": {
+            "name": "testvm",
+            "namespace": "default",
+            "uid": "f8abae7c-d792-4b9b-af95-62d322ae5bc1",
+            "labels": {"app": "test"},
+            "annotations": {
+                "kubectl.kubernetes.io/last-applied-configuration": "{}",
+                "testanno": "testval",
+            },
+            "resourceVersion": "123",
+        },
+        "spec": spec,
+        "status": {"ready": True},
+    }
+    assert "managedFields" in obj["metadata"]
+
+
+def test_prune_object_other_kinds():
+    obj = {"metadata": {"name": "test", "managedFields": []}, "spec": {"a": "b"}}
+
+    assert InventoryModule._prune_object("Namespace", obj) is obj
+    assert InventoryModule._prune_object("VirtualMachine", {}) == {}
+
+
+def test_object_record_from_obj():
+    record = ObjectRecord.from_obj(
+        {
+            "metadata": {
+                "name": "testvm",
+                "namespace": "default",
+                "uid": "f8abae7c-d792-4b9b-af95-62d322ae5bc1",
+                "labels": {"app": "test"},
+                "resourceVersion": "123",
+                "managedFields": [{"manager": "test"}],
+            },
+            "spec": {"running": True},
+            "status": {"ready": True},
+        }
+    )
+
+    assert record == ObjectRecord(
+        name="testvm",
+        namespace="default",
+        uid="f8abae7c-d792-4b9b-af95-62d322ae5bc1",
+        labels={"app": "test"},
+        annotations={},
+        resource_version="123",
+        status={"ready": True},
+    )
+    assert not hasattr(record, "__dict__")
+
+
+def test_get_records(inventory):
+    valid = {
+        "metadata": {"name": "testvm", "namespace": "default", "uid": "1"},
+        "spec": {},
+        "status": {},
+    }
+
+    assert inventory._get_records([valid, {"metadata": {"name": "invalid"}}]) == {
+        "testvm": ObjectRecord.from_obj(valid)
+    }
+
+
+def service(name, ports):
+    return {
+        "metadata": {"name": name, "namespace": "test", "uid": name},
+        "spec": {"ports": ports},
+        "status": {},
+    }
+
+
+@pytest.mark.parametrize(
+    "services,expected",
+    [
+        ({}, {}),
+        ({"testdomain": []}, {}),
+        ({"testdomain": [{"spec": {"ports": [{"targetPort": 1234}]}}]}, {}),
+        ({"testdomain": [service("first", None)]}, {}),
+        ({"testdomain": [service("first", [])]}, {}),
         (
-            [{"spec": {"ports": [{"targetPort": 1234}]}}],
-            1234,
-            {"spec": {"ports": [{"targetPort": 1234}]}},
+            {"testdomain": [service("first", [{"targetPort": 22}, {"port": 80}])]},
+            {},
         ),
         (
-            [
-                {
-                    "metadata": {"name": "first"},
-                    "spec": {"ports": [{"targetPort": 1234}]},
-                },
-                {
-                    "metadata": {"name": "second"},
-                    "spec": {"ports": [{"targetPort": 1234}]},
-                },
-            ],
-            1234,
-            {"metadata": {"name": "first"}, "spec": {"ports": [{"targetPort": 1234}]}},
+            {"testdomain": [service("first", [{"port": 1234}])]},
+            {("testdomain", 0): service("first", [{"port": 1234}])},
         ),
         (
-            [
-                {
-                    "metadata": {"name": "first"},
-                    "spec": {"ports": [{"targetPort": 2222}]},
-                },
-                {
-                    "metadata": {"name": "second"},
-                    "spec": {"ports": [{"targetPort": 1234}]},
-                },
-            ],
-            1234,
-            {"metadata": {"name": "second"}, "spec": {"ports": [{"targetPort": 1234}]}},
+            {"testdomain": [service("first", [{"targetPort": 1234}])]},
+            {("testdomain", 1234): service("first", [{"targetPort": 1234}])},
+        ),
+        (
+            {
+                "testdomain": [
+                    service("first", [{"targetPort": 1234}]),
+                    service("second", [{"targetPort": 1234}]),
+                ]
+            },
+            {("testdomain", 1234): service("first", [{"targetPort": 1234}])},
+        ),
+        (
+            {
+                "testdomain": [
+                    service("first", [{"targetPort": 2222}]),
+                    service("second", [{"targetPort": 1234}]),
+                ],
+                "otherdomain": [service("third", [{"targetPort": 1234}])],
+            },
+            {
+                ("testdomain", 2222): service("first", [{"targetPort": 2222}]),
+                ("testdomain", 1234): service("second", [{"targetPort": 1234}]),
+                ("otherdomain", 1234): service("third", [{"targetPort": 1234}]),
+            },
         ),
     ],
 )
-def test_find_service_with_target_port(services, target_port, expected):
-    assert (
-        InventoryModule._find_service_with_target_port(services, target_port)
-        == expected
-    )
+def test_index_services(services, expected):
+    assert InventoryModule._index_services(services) == expected
 
 
 @pytest.mark.parametrize(
@@ -345,17 +447,21 @@ def test_populate_inventory(mocker, inventory, results, expected):
         inventory, "_populate_inventory_from_namespace"
     )
 
+    results = deepcopy(results)
+    namespaces = deepcopy(results["namespaces"])
+
     inventory._populate_inventory(results, InventoryOptions())
 
     opts = InventoryOptions(
         base_domain=results["cluster_domain"], name=results["default_hostname"]
     )
     calls = [
-        mocker.call(namespace, data, opts)
-        for namespace, data in results["namespaces"].items()
+        mocker.call(namespace, data, opts) for namespace, data in namespaces.items()
     ]
     populate_inventory_from_namespace.assert_has_calls(calls)
     assert len(calls) == expected
+    # The objects of populated namespaces are released
+    assert results["namespaces"] == {}
 
 
 @pytest.mark.parametrize(
@@ -8,6 +8,9 @@ __metaclass__ = type
 
 import pytest
 
+from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    ObjectRecord,
+)
 from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants import (
     DEFAULT_NAMESPACE,
 )
@@ -63,11 +66,15 @@ def test_add_host(inventory, groups, hosts, host_format, expected):
     inventory.inventory.add_group(namespace_group)
 
     inventory._add_host(
-        {
-            "name": "testvm",
-            "namespace": DEFAULT_NAMESPACE,
-            "uid": "f8abae7c-d792-4b9b-af95-62d322ae5bc1",
-        },
+        ObjectRecord.from_obj(
+            {
+                "metadata": {
+                    "name": "testvm",
+                    "namespace": DEFAULT_NAMESPACE,
+                    "uid": "f8abae7c-d792-4b9b-af95-62d322ae5bc1",
+                }
+            }
+        ),
         host_format,
         namespace_group,
     )
@@ -0,0 +1,504 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import fcntl
+import os
+from threading import Timer
+from time import time
+
+import pytest
+
+from ansible.plugins.inventory import Cacheable
+
+from ansible_collections.kubevirt.core.plugins.inventory import (
+    kubevirt,
+)
+
+from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    InventoryOptions,
+)
+
+
+class RecordingCache(dict):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.loaded = []
+
+    def get(self, key, default=None):
+        self.loaded.append(key)
+        return super().get(key, default)
+
+
+def vm(name):
+    return {"metadata": {"name": name, "uid": name}}
+
+
+RESULTS = {
+    "default_hostname": "test",
+    "cluster_domain": "example.com",
+    "namespaces": {
+        "ns1": {"vms": [vm("vm1")], "vmis": [vm("vm1")], "services": {}},
+        "ns2": {"vms": [vm("vm2")], "vmis": [], "services": {}},
+    },
+    "resource_versions": {"VirtualMachine": {"ns1": "1", "ns2": "2"}},
+}
+
+
+@pytest.fixture
+def cache(mocker, inventory):
+    cache = RecordingCache()
+    mocker.patch.object(
+        Cacheable, "cache", new_callable=mocker.PropertyMock, return_value=cache
+    )
+    mocker.patch.object(
+        inventory,
+        "get_option",
+        side_effect=lambda option: {"cache": True, "cache_timeout": 3600}[option],
+    )
+    return cache
+
+
+def test_write_and_read_cache(inventory, cache):
+    inventory._write_cache("key", RESULTS)
+
+    assert sorted(cache) == [
+        "key",
+        "key_ns1_services",
+        "key_ns1_vmis",
+        "key_ns1_vms",
+        "key_ns2_services",
+        "key_ns2_vmis",
+        "key_ns2_vms",
+    ]
+    assert cache["key"]["namespaces"] == ["ns1", "ns2"]
+    assert cache["key_ns1_vms"]["objects"] == [vm("vm1")]
+
+    cached, expired = inventory._read_cache("key", InventoryOptions())
+
+    assert expired == []
+    assert {
+        key: cached[key] for key in ("default_hostname", "cluster_domain", "namespaces")
+    } == {
+        key: RESULTS[key]
+        for key in ("default_hostname", "cluster_domain", "namespaces")
+    }
+    assert cached["resource_versions"] == RESULTS["resource_versions"]
+
+
+def test_write_cache_entries(inventory, cache):
+    cache["key_ns1_vms"] = {"timestamp": 0, "objects": []}
+    cache["key_ns1_vmis"] = {"timestamp": 0, "objects": []}
+
+    inventory._write_cache("key", RESULTS | {"timestamp": 10}, [("ns1", "vms")])
+
+    assert cache["key"]["timestamp"] == 10
+    assert cache["key_ns1_vms"]["objects"] == [vm("vm1")]
+    assert cache["key_ns1_vms"]["timestamp"] > 0
+    assert cache["key_ns1_vmis"] == {"timestamp": 0, "objects": []}
+    assert "key_ns2_vms" not in cache
+
+
+@pytest.mark.parametrize(
+    "opts",
+    [InventoryOptions(), InventoryOptions(incremental_refresh=True)],
+)
+@pytest.mark.parametrize("version", [None, kubevirt.CACHE_FORMAT_VERSION + 1])
+def test_read_cache_other_format_version(inventory, cache, opts, version):
+    inventory._write_cache("key", RESULTS)
+    if version is None:
+        del cache["key"]["version"]
+    else:
+        cache["key"]["version"] = version
+    cache.loaded = []
+
+    assert inventory._read_cache("key", opts) == (None, None)
+    assert cache.loaded == ["key"]
+
+
+@pytest.mark.parametrize(
+    "opts,expired",
+    [
+        (InventoryOptions(), []),
+        (InventoryOptions(vmi_cache_timeout=60), [("ns1", "vmis"), ("ns2", "vmis")]),
+        (InventoryOptions(vmi_cache_timeout=0), []),
+    ],
+)
+def test_read_cache_expired_entries(inventory, cache, opts, expired):
+    inventory._write_cache("key", RESULTS)
+    for namespace in ("ns1", "ns2"):
+        cache[f"key_{namespace}_vmis"]["timestamp"] = time() - 120
+
+    cached, result = inventory._read_cache("key", opts)
+
+    assert cached is not None
+    assert result == expired
+
+
+@pytest.mark.parametrize(
+    "opts,loaded",
+    [
+        (InventoryOptions(), ["key"]),
+        (
+            InventoryOptions(incremental_refresh=True),
+            ["key"]
+            + [f"key_ns{i}_{k}" for i in (1, 2) for k in ("vms", "vmis", "services")],
+        ),
+    ],
+)
+def test_read_cache_index_expired(inventory, cache, opts, loaded):
+    inventory._write_cache("key", RESULTS)
+    cache["key"]["timestamp"] = time() - 7200
+    cache.loaded = []
+
+    cached, expired = inventory._read_cache("key", opts)
+
+    assert expired is None
+    assert (cached is not None) == opts.incremental_refresh
+    assert cache.loaded == loaded
+
+
+@pytest.mark.parametrize(
+    "opts",
+    [
+        InventoryOptions(cache_mode="stale_while_revalidate"),
+        InventoryOptions(freshness_probe=True),
+    ],
+)
+def test_read_cache_index_expired_stale(inventory, cache, opts):
+    inventory._write_cache("key", RESULTS)
+    cache["key"]["timestamp"] = time() - 7200
+
+    cached, expired = inventory._read_cache("key", opts)
+
+    assert cached["namespaces"] == RESULTS["namespaces"]
+    assert expired is None
+
+
+@pytest.mark.parametrize(
+    "opts,age,expected",
+    [
+        (InventoryOptions(cache_max_stale=3600), 0, True),
+        (InventoryOptions(cache_max_stale=3600), 7000, True),
+        (InventoryOptions(cache_max_stale=3600), 7300, False),
+        (InventoryOptions(cache_max_stale=0), 3000, True),
+        (InventoryOptions(cache_max_stale=0), 3700, False),
+        (InventoryOptions(cache_max_stale=60, vmi_cache_timeout=60), 100, True),
+        (InventoryOptions(cache_max_stale=60, vmi_cache_timeout=60), 200, False),
+        (InventoryOptions(cache_max_stale=0, vmi_cache_timeout=0), 3000, True),
+    ],
+)
+def test_cache_within_max_stale(inventory, cache, opts, age, expected):
+    inventory._write_cache("key", RESULTS)
+    for key in cache:
+        cache[key]["timestamp"] = time() - age
+
+    assert inventory._cache_within_max_stale("key", opts) == expected
+
+
+@pytest.mark.parametrize(
+    "opts,expected",
+    [
+        (InventoryOptions(), 3600),
+        (InventoryOptions(vmi_cache_timeout=60), 60),
+        (InventoryOptions(vmi_cache_timeout=7200), 3600),
+        (InventoryOptions(vmi_cache_timeout=0), 3600),
+    ],
+)
+def test_get_cache_timeouts(inventory, cache, opts, expected):
+    timeouts = inventory._get_cache_timeouts(opts)
+
+    assert timeouts["index"] == 3600
+    assert timeouts["vmis"] == expected
+    assert timeouts["vms"] == 3600
+
+
+@pytest.mark.parametrize(
+    "opts,warned",
+    [
+        (InventoryOptions(), False),
+        (InventoryOptions(vmi_cache_timeout=60), False),
+        (InventoryOptions(vmi_cache_timeout=3600), False),
+        (InventoryOptions(vmi_cache_timeout=7200), True),
+        (InventoryOptions(vmi_cache_timeout=0), True),
+    ],
+)
+def test_check_cache_timeouts(mocker, inventory, cache, opts, warned):
+    warning = mocker.patch.object(inventory.display, "warning")
+
+    inventory._check_cache_timeouts(opts)
+
+    if warned:
+        warning.assert_called_once()
+        assert "vmi_cache_timeout" in warning.call_args.args[0]
+    else:
+        warning.assert_not_called()
+
+
+@pytest.mark.parametrize("missing", ["key", "key_ns2_services"])
+def test_cache_within_max_stale_missing(inventory, cache, missing):
+    inventory._write_cache("key", RESULTS)
+    del cache[missing]
+
+    assert not inventory._cache_within_max_stale("key", InventoryOptions())
+
+
+def test_write_cache_other_cache(inventory, cache):
+    other = {}
+    inventory._write_cache("key", RESULTS, cache=other)
+
+    assert not cache
+    assert other["key"]["namespaces"] == ["ns1", "ns2"]
+    assert other["key_ns1_vms"]["objects"] == [vm("vm1")]
+
+
+@pytest.mark.parametrize(
+    "cache_timeout,expected",
+    [
+        (3600, 3900),
+        (0, 0),
+    ],
+)
+def test_load_cache_plugin(mocker, inventory, cache_timeout, expected):
+    options = {
+        "cache_plugin": "jsonfile",
+        "cache_timeout": cache_timeout,
+        "cache_connection": "/tmp/cache",
+        "cache_prefix": None,
+    }
+    mocker.patch.object(inventory, "get_option", side_effect=options.get)
+    get_cache_plugin = mocker.patch.object(kubevirt, "get_cache_plugin")
+
+    cache_plugin = inventory._load_cache_plugin(300)
+
+    assert cache_plugin is get_cache_plugin.return_value
+    get_cache_plugin.assert_called_once_with(
+        "jsonfile", _uri="/tmp/cache", _timeout=expected
+    )
+
+
+@pytest.mark.parametrize("is_dir", [True, False])
+def test_get_cache_lock_path(mocker, inventory, tmp_path, is_dir):
+    cache_connection = tmp_path if is_dir else tmp_path / "missing"
+    mocker.patch.object(inventory, "get_option", return_value=str(cache_connection))
+    mocker.patch.object(kubevirt.tempfile, "gettempdir", return_value="/tmp/test")
+
+    assert inventory._get_cache_lock_path("key") == (
+        str(tmp_path / "key.lock") if is_dir else "/tmp/test/key.lock"
+    )
+
+
+def test_lock_cache_disabled(mocker, inventory):
+    get_cache_lock_path = mocker.patch.object(inventory, "_get_cache_lock_path")
+
+    with inventory._lock_cache("key", None) as waited:
+        assert not waited
+
+    get_cache_lock_path.assert_not_called()
+
+
+@pytest.fixture
+def lock_path(mocker, inventory, tmp_path):
+    path = tmp_path / "key.lock"
+    mocker.patch.object(inventory, "_get_cache_lock_path", return_value=str(path))
+    return path
+
+
+def hold_lock(path):
+    fd = os.open(path, os.O_RDWR | os.O_CREAT)
+    fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    return fd
+
+
+def release_lock(fd):
+    fcntl.flock(fd, fcntl.LOCK_UN)
+    os.close(fd)
+
+
+def test_lock_cache(inventory, lock_path):
+    with inventory._lock_cache("key", 10) as waited:
+        assert not waited
+        # The lock is held until the context is left
+        with pytest.raises(BlockingIOError):
+            hold_lock(lock_path)
+
+    release_lock(hold_lock(lock_path))
+
+
+def test_lock_cache_wait(inventory, lock_path):
+    fd = hold_lock(lock_path)
+    Timer(0.2, release_lock, args=(fd,)).start()
+
+    with inventory._lock_cache("key", 10) as waited:
+        assert waited
+        with pytest.raises(BlockingIOError):
+            hold_lock(lock_path)
+
+
+def test_lock_cache_timeout(inventory, lock_path):
+    fd = hold_lock(lock_path)
+    try:
+        with inventory._lock_cache("key", 0) as waited:
+            assert waited
+    finally:
+        release_lock(fd)
+
+
+def test_lock_cache_open_failed(mocker, inventory):
+    mocker.patch.object(
+        inventory, "_get_cache_lock_path", return_value="/nonexistent/key.lock"
+    )
+
+    with inventory._lock_cache("key", 10) as waited:
+        assert not waited
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {},
+        {"something": "something"},
+    ],
+)
+def test_read_cache_missing_or_old_format(inventory, cache, data):
+    if data:
+        cache["key"] = data
+
+    assert inventory._read_cache("key", InventoryOptions()) == (None, None)
+
+
+@pytest.mark.parametrize("incremental_refresh", [True, False])
+def test_refetch_expired_objects(mocker, inventory, incremental_refresh):
+    opts = InventoryOptions(incremental_refresh=incremental_refresh)
+    cached = {
+        "timestamp": 10,
+        "namespaces": {
+            "ns1": {"vms": [vm("vm1")], "vmis": [vm("vm1")], "services": {}},
+            "ns2": {"vms": [vm("vm2")], "vmis": [], "services": {}},
+        },
+        "resource_versions": {"VirtualMachine": {"ns1": "1", "ns2": "2"}},
+    }
+
+    def watch_resources(
+        client, api_version, kind, items, resource_version, opts, **kwargs
+    ):
+        inventory._resource_versions.setdefault(kind, {})[kwargs["namespace"]] = "3"
+        return [] if kwargs["namespace"] == "ns2" else [vm("vm3")]
+
+    watch = mocker.patch.object(
+        inventory, "_watch_resources", side_effect=watch_resources
+    )
+
+    results = inventory._refetch_expired_objects(
+        mocker.Mock(), cached, [("ns1", "vms"), ("ns2", "vms")], opts
+    )
+
+    assert watch.call_count == 2
+    assert watch.call_args_list[0].args[4] == ("1" if incremental_refresh else None)
+    assert watch.call_args_list[0].kwargs == {
+        "namespace": "ns1",
+        "label_selector": None,
+    }
+    assert results["timestamp"] == 10
+    assert results["namespaces"] == {
+        "ns1": {"vms": [vm("vm3")], "vmis": [vm("vm1")], "services": {}},
+    }
+    assert results["resource_versions"] == {"VirtualMachine": {"ns1": "3", "ns2": "3"}}
+
+
+def test_parse_refetches_expired_entries(mocker, inventory, cache):
+    config_data = {"vmi_cache_timeout": 60}
+    inventory._write_cache("test-key", RESULTS)
+    cache["test-key_ns1_vmis"]["timestamp"] = time() - 120
+
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    get_api_client = mocker.patch.object(kubevirt, "get_api_client")
+    fetch_objects = mocker.patch.object(inventory, "_fetch_objects")
+    refetch = mocker.patch.object(
+        inventory, "_refetch_expired_objects", side_effect=lambda c, r, e, o: r
+    )
+    populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
+
+    inventory.parse(None, None, "/testpath")
+
+    get_api_client.assert_called_once_with(**config_data)
+    fetch_objects.assert_not_called()
+    refetch.assert_called_once_with(
+        get_api_client.return_value,
+        mocker.ANY,
+        [("ns1", "vmis")],
+        InventoryOptions(config_data=config_data),
+    )
+    populate_inventory.assert_called_once()
+    assert cache["test-key_ns1_vmis"]["timestamp"] > time() - 60
+
+
+def test_refetch_expired_services_after_vmis(mocker, inventory):
+    cached = {
+        "namespaces": {
+            "ns1": {"vms": [], "vmis": [vm("vm1")], "services": {"vm1": []}},
+        },
+    }
+    refetched_vmi = vm("vm1") | {"status": {"interfaces": [{}]}}
+
+    def watch_resources(
+        client, api_version, kind, items, resource_version, opts, **kwargs
+    ):
+        return [refetched_vmi] if kind == "VirtualMachineInstance" else []
+
+    watch = mocker.patch.object(
+        inventory, "_watch_resources", side_effect=watch_resources
+    )
+
+    results = inventory._refetch_expired_objects(
+        mocker.Mock(),
+        cached,
+        [("ns1", "services"), ("ns1", "vmis")],
+        InventoryOptions(),
+    )
+
+    assert [c.args[2] for c in watch.call_args_list] == [
+        "VirtualMachineInstance",
+        "Service",
+    ]
+    assert results["namespaces"]["ns1"]["services"] == {}
+
+
+@pytest.mark.parametrize(
+    "other,shared",
+    [
+        ({}, True),
+        ({"host_format": "{name}", "create_groups": True}, True),
+        ({"network_name": "default", "use_service": False}, True),
+        ({"namespaces": ["ns2", "ns1"]}, True),
+        ({"compose": {"test": "vmi_node_name"}, "cache_plan": True}, True),
+        ({"use_service": True, "network_name": "default"}, True),
+        ({"use_service": True}, False),
+        ({"namespaces": ["ns1"]}, False),
+        ({"label_selector": "app=other"}, False),
+        ({"api_version": "kubevirt.io/v1alpha3"}, False),
+        ({"host": "https://other"}, False),
+        ({"context": "other"}, False),
+        ({"impersonate_user": "other"}, False),
+    ],
+)
+def test_get_fetch_fingerprint(inventory, other, shared):
+    config_data = {
+        "host": "https://test",
+        "namespaces": ["ns1", "ns2"],
+        "label_selector": "app=test",
+        "use_service": False,
+    }
+    other = {**config_data, **other}
+
+    assert (
+        inventory._get_fetch_fingerprint(
+            config_data, InventoryOptions(config_data=config_data)
+        )
+        == inventory._get_fetch_fingerprint(other, InventoryOptions(config_data=other))
+    ) == shared
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible.plugins.inventory import Constructable
+
+from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    InventoryModule,
+    TemplateResultsCache,
+    UNRESOLVED,
+    trust_as_template,
+)
+
+VARIABLES = {
+    "vmi_node_name": "test-node",
+    "vmi_labels": {"app": "test", "kubevirt.io/domain": "testvm", "items": "x"},
+    "vmi_interfaces": [{"ipAddress": "10.10.10.10", "name": "default"}],
+    "vmi_guest_os_info": {"id": "fedora", "versionId": "40"},
+    "vmi_ready": True,
+    "vmi_phase": None,
+}
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("vmi_node_name", ("vmi_node_name", ())),
+        ("  vmi_node_name  ", ("vmi_node_name", ())),
+        ("vmi_guest_os_info.id", ("vmi_guest_os_info", (("attr", "id"),))),
+        ("vmi_labels['app']", ("vmi_labels", (("item", "app"),))),
+        (
+            'vmi_labels["kubevirt.io/domain"]',
+            ("vmi_labels", (("item", "kubevirt.io/domain"),)),
+        ),
+        (
+            "vmi_interfaces[0].ipAddress",
+            ("vmi_interfaces", (("item", 0), ("attr", "ipAddress"))),
+        ),
+        ("vmi_interfaces[ 0 ]", ("vmi_interfaces", (("item", 0),))),
+        ("vmi_node_name | upper", None),
+        ("vmi_labels[key]", None),
+        ("vmi_interfaces[-1]", None),
+        ("vmi_labels.app == 'test'", None),
+        ("'vmi_node_name'", None),
+        ("true", None),
+        ("None", None),
+        ("vmi_labels.keys()", None),
+        ("vmi_labels['a\\'b']", None),
+        ("", None),
+    ],
+)
+def test_parse_simple_expression(expression, expected):
+    assert InventoryModule._parse_simple_expression(expression) == expected
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("vmi_node_name", "test-node"),
+        ("vmi_guest_os_info.versionId", "40"),
+        ("vmi_labels['kubevirt.io/domain']", "testvm"),
+        ("vmi_interfaces[0].ipAddress", "10.10.10.10"),
+        ("vmi_ready", True),
+        ("vmi_phase", None),
+        ("vmi_labels", VARIABLES["vmi_labels"]),
+        ("vmi_missing", UNRESOLVED),
+        ("vmi_labels.missing", UNRESOLVED),
+        ("vmi_labels.items", UNRESOLVED),
+        ("vmi_interfaces[1]", UNRESOLVED),
+        ("vmi_interfaces.name", UNRESOLVED),
+        ("vmi_node_name.name", UNRESOLVED),
+        ("vmi_node_name[0]", UNRESOLVED),
+    ],
+)
+def test_evaluate_simple_expression(expression, expected):
+    path = InventoryModule._parse_simple_expression(expression)
+    assert InventoryModule._evaluate_simple_expression(path, VARIABLES) == expected
+
+
+def test_evaluate_simple_expression_copies_containers():
+    path = InventoryModule._parse_simple_expression("vmi_labels")
+    value = InventoryModule._evaluate_simple_expression(path, VARIABLES)
+
+    assert value == VARIABLES["vmi_labels"]
+    assert value is not VARIABLES["vmi_labels"]
+
+
+@pytest.mark.skipif(trust_as_template is None, reason="requires ansible-core >= 2.19")
+def test_evaluate_simple_expression_leaves_templates_to_templar():
+    path = InventoryModule._parse_simple_expression("test_var")
+    variables = {"test_var": [trust_as_template("{{ vmi_node_name }}")]}
+
+    assert InventoryModule._evaluate_simple_expression(path, variables) is UNRESOLVED
+
+
+@pytest.mark.skipif(trust_as_template is None, reason="requires ansible-core >= 2.19")
+@pytest.mark.parametrize(
+    "expression",
+    [
+        "vmi_node_name",
+        "vmi_guest_os_info.versionId",
+        "vmi_labels['kubevirt.io/domain']",
+        'vmi_labels["app"]',
+        "vmi_interfaces[0].ipAddress",
+        "vmi_interfaces[0]",
+        "vmi_labels",
+        "vmi_labels.items",
+        "vmi_ready",
+        "vmi_phase",
+    ],
+)
+def test_compose_matches_templar(mocker, inventory, expression):
+    def compose(func):
+        try:
+            return func(template, VARIABLES)
+        except Exception as exc:
+            return type(exc)
+
+    inventory._options = {
+        **inventory._options,
+        "compose": {"test_var": expression},
+    }
+    inventory._constructed = inventory._get_constructed_options()
+    template = inventory._constructed.compose["test_var"]
+
+    expected = compose(lambda *args: Constructable._compose(inventory, *args))
+    templar_compose = mocker.spy(Constructable, "_compose")
+
+    assert compose(inventory._compose) == expected
+    # Simple expressions resolvable from the variables skip the templar
+    path = inventory._constructed.simple_expressions[template]
+    if InventoryModule._evaluate_simple_expression(path, VARIABLES) is UNRESOLVED:
+        templar_compose.assert_called_once()
+    else:
+        templar_compose.assert_not_called()
+
+
+@pytest.mark.skipif(trust_as_template is None, reason="requires ansible-core >= 2.19")
+@pytest.mark.parametrize(
+    "options,expected",
+    [
+        (
+            {
+                "compose": {"a": "vmi_node_name", "b": "vmi_node_name | upper"},
+                "keyed_groups": [{"key": "vmi_labels['app']"}],
+            },
+            {"vmi_node_name", "vmi_labels['app']"},
+        ),
+        (
+            {
+                "compose": {"a": "vmi_node_name"},
+                "use_extra_vars": True,
+            },
+            set(),
+        ),
+    ],
+)
+def test_get_constructed_options_simple_expressions(inventory, options, expected):
+    inventory._options = {**inventory._options, **options}
+
+    assert set(inventory._get_constructed_options().simple_expressions) == expected
+
+
+@pytest.mark.parametrize(
+    "expression,expected",
+    [
+        ("vmi_node_name", ("vmi_node_name",)),
+        (
+            "vmi_labels.app ~ '-' ~ vmi_node_name | upper",
+            ("vmi_labels", "vmi_node_name"),
+        ),
+        ("vmi_phase == 'Running' and vmi_ready", ("vmi_phase", "vmi_ready")),
+        ("vmi_node_name.split('-')[0]", ("vmi_node_name",)),
+        ("vmi_labels | dict2items | map(attribute='key') | list", ("vmi_labels",)),
+        ("lookup('env', 'HOME')", None),
+        ("query('inventory_hostnames', 'all')", None),
+        ("now()", None),
+        ("vmi_interfaces | random", None),
+        ("vmi_interfaces | ansible.builtin.shuffle", None),
+        ("'%Y' | strftime", None),
+        ("{{ vmi_node_name }}", None),
+        ("vmi_node_name }} {{ vmi_phase", None),
+        ("vmi_node_name |", None),
+    ],
+)
+def test_get_referenced_variables(expression, expected):
+    assert InventoryModule._get_referenced_variables(expression) == expected
+
+
+def test_freeze():
+    assert InventoryModule._freeze(True) != InventoryModule._freeze(1)
+    assert InventoryModule._freeze({"a": [1, {"b": None}]}) == InventoryModule._freeze(
+        {"a": [1, {"b": None}]}
+    )
+    assert InventoryModule._freeze([1]) != InventoryModule._freeze({1: None})
+
+
+def test_template_results_cache():
+    cache = TemplateResultsCache(2)
+    value = {"a": ["b"]}
+    cache.set(("first",), value)
+    cache.set(("second",), "second")
+    value["a"].append("c")
+
+    assert cache.get(("first",)) == {"a": ["b"]}
+    cache.get(("first",))["a"].append("c")
+    assert cache.get(("first",)) == {"a": ["b"]}
+
+    # first was used more recently than second
+    cache.set(("third",), "third")
+    assert cache.get(("second",)) is UNRESOLVED
+    assert cache.get(("first",)) == {"a": ["b"]}
+    assert cache.get(("third",)) == "third"
+
+
+@pytest.mark.skipif(trust_as_template is None, reason="requires ansible-core >= 2.19")
+def test_compose_memoizes_results(mocker, inventory):
+    inventory._options = {
+        **inventory._options,
+        "compose": {"test_var": "vmi_node_name | upper"},
+    }
+    inventory._constructed = inventory._get_constructed_options()
+    template = inventory._constructed.compose["test_var"]
+    templar_compose = mocker.spy(Constructable, "_compose")
+
+    for node_name in ["node1", "node1", "node2", "node1"]:
+        assert (
+            inventory._compose(
+                template, {"vmi_node_name": node_name, "inventory_hostname": "x"}
+            )
+            == node_name.upper()
+        )
+
+    assert templar_compose.call_count == 2
+
+
+@pytest.mark.skipif(trust_as_template is None, reason="requires ansible-core >= 2.19")
+def test_compose_does_not_memoize_unsafe_results(mocker, inventory):
+    inventory._options = {
+        **inventory._options,
+        "compose": {"test_var": "[vmi_node_name] | random"},
+    }
+    inventory._constructed = inventory._get_constructed_options()
+    template = inventory._constructed.compose["test_var"]
+    templar_compose = mocker.spy(Constructable, "_compose")
+
+    for _ in range(2):
+        inventory._compose(template, {"vmi_node_name": "node1"})
+
+    assert templar_compose.call_count == 2
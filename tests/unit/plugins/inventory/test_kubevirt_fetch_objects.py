@@ -8,9 +8,13 @@ __metaclass__ = type
 
 import pytest
 
+from kubernetes.client.rest import ApiException
+from kubernetes.dynamic.exceptions import DynamicApiError
 
 from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
     InventoryOptions,
+    KubeVirtInventoryException,
+    LABEL_KUBEVIRT_IO_DOMAIN,
 )
 
 from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants import (
@@ -43,7 +47,9 @@ def test_fetch_objects(mocker, inventory, opts, namespaces):
         inventory, "_get_vms_for_namespace", return_value=[{}]
     )
     get_vmis_for_namespace = mocker.patch.object(
-        inventory, "_get_vmis_for_namespace", return_value=[{}]
+        inventory,
+        "_get_vmis_for_namespace",
+        return_value=[{"status": {"interfaces": [{}]}}],
     )
     get_services_for_namespace = mocker.patch.object(
         inventory, "_get_services_for_namespace", return_value=[]
@@ -69,7 +75,7 @@ def test_fetch_objects(mocker, inventory, opts, namespaces):
         [mocker.call(mocker.ANY, namespace, opts) for namespace in namespaces]
     )
     get_services_for_namespace.assert_has_calls(
-        [mocker.call(mocker.ANY, namespace) for namespace in namespaces]
+        [mocker.call(mocker.ANY, namespace, opts) for namespace in namespaces]
     )
     get_default_hostname.assert_called_once()
     get_cluster_domain.assert_called_once()
@@ -107,3 +113,261 @@ def test_fetch_objects_early_return(mocker, inventory):
     get_services_for_namespace.assert_not_called()
     get_default_hostname.assert_called_once()
     get_cluster_domain.assert_called_once()
+
+
+@pytest.mark.parametrize(
+    "fetch_concurrency",
+    [1, 2, 8],
+)
+def test_fetch_objects_concurrency(mocker, inventory, fetch_concurrency):
+    namespaces = [f"test{i}" for i in range(10)]
+    opts = InventoryOptions(namespaces=namespaces, fetch_concurrency=fetch_concurrency)
+
+    def fetch_objects_for_namespace(client, namespace, opts):
+        if namespace in ("test3", "test7"):
+            return None
+        return {"vms": [namespace], "vmis": [], "services": {}}
+
+    mocker.patch.object(
+        inventory,
+        "_fetch_objects_for_namespace",
+        side_effect=fetch_objects_for_namespace,
+    )
+    mocker.patch.object(
+        inventory, "_get_default_hostname", return_value="default-hostname"
+    )
+    mocker.patch.object(inventory, "_get_cluster_domain", return_value="test.com")
+
+    result = inventory._fetch_objects(mocker.Mock(), opts)
+
+    expected = [ns for ns in namespaces if ns not in ("test3", "test7")]
+    assert list(result["namespaces"].keys()) == expected
+    for namespace in expected:
+        assert result["namespaces"][namespace]["vms"] == [namespace]
+
+
+def test_fetch_objects_concurrency_resolves_resources(mocker, inventory):
+    opts = InventoryOptions(namespaces=["test1", "test2"], fetch_concurrency=2)
+    client = mocker.Mock()
+    resolved = []
+
+    def fetch_objects_for_namespace(client, namespace, opts):
+        resolved.append(
+            inventory._get_resource(client, opts.api_version, "VirtualMachine")
+        )
+        return None
+
+    mocker.patch.object(
+        inventory,
+        "_fetch_objects_for_namespace",
+        side_effect=fetch_objects_for_namespace,
+    )
+    mocker.patch.object(inventory, "_get_cluster_domain", return_value=None)
+
+    inventory._fetch_objects(client, opts)
+
+    # The workers only use resources resolved before the pool was started
+    assert client.resources.get.call_count == 3
+    assert resolved == [client.resources.get.return_value] * 2
+
+
+@pytest.mark.parametrize(
+    "fetch_concurrency",
+    [1, 4],
+)
+def test_fetch_objects_concurrency_error(mocker, inventory, fetch_concurrency):
+    opts = InventoryOptions(
+        namespaces=["test1", "test2", "test3"], fetch_concurrency=fetch_concurrency
+    )
+
+    def get_vms_for_namespace(client, namespace, opts):
+        if namespace == "test2":
+            raise KubeVirtInventoryException("Error fetching VirtualMachine list")
+        return []
+
+    mocker.patch.object(
+        inventory, "_get_vms_for_namespace", side_effect=get_vms_for_namespace
+    )
+    mocker.patch.object(inventory, "_get_vmis_for_namespace", return_value=[])
+    get_cluster_domain = mocker.patch.object(inventory, "_get_cluster_domain")
+
+    with pytest.raises(
+        KubeVirtInventoryException, match="Error fetching VirtualMachine list"
+    ):
+        inventory._fetch_objects(mocker.Mock(), opts)
+
+    get_cluster_domain.assert_not_called()
+
+
+SSH_SERVICE = {
+    "metadata": {"name": "testsvc", "namespace": "test1"},
+    "spec": {
+        "type": "NodePort",
+        "ports": [{"targetPort": 22, "nodePort": 31234}],
+        "selector": {LABEL_KUBEVIRT_IO_DOMAIN: "testvm"},
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "client",
+    [
+        {
+            "vms": [
+                {"metadata": {"name": "testvm", "namespace": "test1"}},
+                {"metadata": {"name": "testvm", "namespace": "test2"}},
+            ],
+            "vmis": [
+                {"metadata": {"name": "testvm", "namespace": "test3"}},
+                {
+                    "metadata": {"name": "testvm", "namespace": "test2"},
+                    "status": {"interfaces": [{}]},
+                },
+            ],
+            "services": [
+                SSH_SERVICE,
+                {**SSH_SERVICE, "metadata": {"name": "testsvc", "namespace": "test4"}},
+            ],
+        },
+    ],
+    indirect=["client"],
+)
+def test_fetch_objects_cluster_wide(mocker, inventory, client):
+    get_available_namespaces = mocker.patch.object(
+        inventory, "_get_available_namespaces"
+    )
+
+    result = inventory._fetch_objects(client, InventoryOptions(cluster_wide_list=True))
+
+    get_available_namespaces.assert_not_called()
+    assert list(result["namespaces"].keys()) == ["test1", "test2", "test3"]
+    assert result["namespaces"]["test1"] == {
+        "vms": [{"metadata": {"name": "testvm", "namespace": "test1"}}],
+        "vmis": [],
+        "services": {"testvm": [SSH_SERVICE]},
+    }
+    assert len(result["namespaces"]["test2"]["vms"]) == 1
+    assert len(result["namespaces"]["test2"]["vmis"]) == 1
+    assert result["namespaces"]["test2"]["services"] == {}
+    assert result["namespaces"]["test3"]["vms"] == []
+
+
+@pytest.mark.parametrize(
+    "opts,vmis",
+    [
+        (InventoryOptions(use_service=False), [{"status": {"interfaces": [{}]}}]),
+        (InventoryOptions(network_name="test"), [{"status": {"interfaces": [{}]}}]),
+        (InventoryOptions(), [{"status": {}}]),
+        (InventoryOptions(), [{"status": {"interfaces": []}}]),
+    ],
+)
+def test_fetch_objects_skips_services(mocker, inventory, opts, vmis):
+    mocker.patch.object(inventory, "_get_vms_for_namespace", return_value=[{}])
+    mocker.patch.object(inventory, "_get_vmis_for_namespace", return_value=vmis)
+    get_services_for_namespace = mocker.patch.object(
+        inventory, "_get_services_for_namespace"
+    )
+
+    result = inventory._fetch_objects_for_namespace(
+        mocker.Mock(), DEFAULT_NAMESPACE, opts
+    )
+
+    get_services_for_namespace.assert_not_called()
+    assert result == {"vms": [{}], "vmis": vmis, "services": {}}
+
+
+@pytest.mark.parametrize(
+    "opts,services",
+    [
+        (InventoryOptions(cluster_wide_list=True), True),
+        (InventoryOptions(cluster_wide_list=True, use_service=False), False),
+    ],
+)
+def test_fetch_objects_cluster_wide_skips_services(mocker, inventory, opts, services):
+    vmi = {
+        "metadata": {"name": "testvm", "namespace": "test"},
+        "status": {"interfaces": [{}]},
+    }
+    get_resources = mocker.patch.object(
+        inventory,
+        "_get_resources",
+        side_effect=lambda client, api_version, kind, *args, **kwargs: (
+            [vmi] if kind == "VirtualMachineInstance" else []
+        ),
+    )
+
+    inventory._fetch_objects_cluster_wide(mocker.Mock(), opts)
+
+    kinds = [c.args[2] for c in get_resources.call_args_list]
+    assert ("Service" in kinds) == services
+
+
+def test_fetch_objects_cluster_wide_not_used_with_namespaces(mocker, inventory):
+    fetch_objects_cluster_wide = mocker.patch.object(
+        inventory, "_fetch_objects_cluster_wide"
+    )
+    fetch_objects_per_namespace = mocker.patch.object(
+        inventory, "_fetch_objects_per_namespace", return_value={}
+    )
+    mocker.patch.object(inventory, "_get_cluster_domain")
+
+    opts = InventoryOptions(namespaces=["test"], cluster_wide_list=True)
+    inventory._fetch_objects(mocker.Mock(), opts)
+
+    fetch_objects_cluster_wide.assert_not_called()
+    fetch_objects_per_namespace.assert_called_once_with(mocker.ANY, opts)
+
+
+@pytest.mark.parametrize(
+    "status,fallback",
+    [
+        (403, True),
+        (500, False),
+    ],
+)
+def test_fetch_objects_cluster_wide_fallback(mocker, inventory, status, fallback):
+    def get_resources(*args, **kwargs):
+        exc = DynamicApiError(ApiException(status=status, reason="Reason"))
+        raise KubeVirtInventoryException("Error fetching list") from exc
+
+    mocker.patch.object(inventory, "_get_resources", side_effect=get_resources)
+    fetch_objects_per_namespace = mocker.patch.object(
+        inventory, "_fetch_objects_per_namespace", return_value={}
+    )
+    mocker.patch.object(inventory, "_get_cluster_domain")
+
+    opts = InventoryOptions(cluster_wide_list=True)
+    if fallback:
+        inventory._fetch_objects(mocker.Mock(), opts)
+        fetch_objects_per_namespace.assert_called_once_with(mocker.ANY, opts)
+    else:
+        with pytest.raises(KubeVirtInventoryException, match="Error fetching list"):
+            inventory._fetch_objects(mocker.Mock(), opts)
+        fetch_objects_per_namespace.assert_not_called()
+
+
+def test_fetch_objects_cluster_wide_fallback_resource_versions(mocker, inventory):
+    def get_resources(client, api_version, kind, *args, **kwargs):
+        if kind == "VirtualMachineInstance":
+            exc = DynamicApiError(ApiException(status=403, reason="Forbidden"))
+            raise KubeVirtInventoryException("Error fetching list") from exc
+        inventory._resource_versions.setdefault(kind, {})[""] = "100"
+        return []
+
+    def fetch_objects_per_namespace(client, opts):
+        inventory._resource_versions.setdefault("VirtualMachine", {})["test"] = "5"
+        return {}
+
+    mocker.patch.object(inventory, "_get_resources", side_effect=get_resources)
+    mocker.patch.object(
+        inventory,
+        "_fetch_objects_per_namespace",
+        side_effect=fetch_objects_per_namespace,
+    )
+    mocker.patch.object(inventory, "_get_cluster_domain")
+
+    result = inventory._fetch_objects(
+        mocker.Mock(), InventoryOptions(cluster_wide_list=True)
+    )
+
+    assert result["resource_versions"] == {"VirtualMachine": {"test": "5"}}
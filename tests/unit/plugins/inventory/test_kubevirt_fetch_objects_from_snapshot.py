@@ -0,0 +1,169 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.kubevirt.core.plugins.inventory import (
+    kubevirt,
+)
+
+from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    InventoryOptions,
+    LABEL_KUBEVIRT_IO_DOMAIN,
+)
+
+from ansible_collections.kubevirt.core.plugins.module_utils.snapshot import (
+    SnapshotStore,
+    write_snapshot,
+)
+
+
+def obj(name, namespace, labels=None):
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"{namespace}-{name}",
+            "labels": labels or {},
+        }
+    }
+
+
+SERVICE = obj("testsvc", "ns1") | {
+    "spec": {
+        "type": "NodePort",
+        "selector": {LABEL_KUBEVIRT_IO_DOMAIN: "testvm"},
+        "ports": [{"targetPort": 22}],
+    }
+}
+
+
+def write_test_snapshot(tmp_path, label_selector=None):
+    path = str(tmp_path / "snapshot.json")
+    store = SnapshotStore(["VirtualMachine", "VirtualMachineInstance", "Service"])
+    store.replace(
+        "VirtualMachine",
+        [obj("testvm", "ns1", {"app": "test"}), obj("othervm", "ns2")],
+    )
+    store.replace("VirtualMachineInstance", [obj("testvm", "ns1", {"app": "test"})])
+    store.replace("Service", [SERVICE, obj("othersvc", "ns3")])
+    write_snapshot(
+        path,
+        store.snapshot(
+            host="https://test:8443",
+            api_version="kubevirt.io/v1",
+            label_selector=label_selector,
+            cluster_domain="example.com",
+        ),
+    )
+    return path
+
+
+@pytest.fixture
+def client(mocker):
+    client = mocker.Mock()
+    client.configuration.host = "https://test:8443"
+    return client
+
+
+@pytest.fixture
+def snapshot_file(tmp_path):
+    return write_test_snapshot(tmp_path)
+
+
+@pytest.mark.parametrize(
+    "opts,expected_namespaces",
+    [
+        (InventoryOptions(), ["ns1", "ns2"]),
+        (InventoryOptions(namespaces=["ns2", "ns4"]), ["ns2"]),
+        (InventoryOptions(label_selector="app=test"), ["ns1"]),
+    ],
+)
+def test_fetch_objects_from_snapshot(
+    inventory, client, snapshot_file, opts, expected_namespaces
+):
+    opts.snapshot_file = snapshot_file
+
+    results = inventory._fetch_objects_from_snapshot(client, opts)
+
+    assert results["default_hostname"] == "test_8443"
+    assert results["cluster_domain"] == "example.com"
+    assert list(results["namespaces"]) == expected_namespaces
+    if "ns1" in expected_namespaces:
+        assert results["namespaces"]["ns1"]["services"] == {"testvm": [SERVICE]}
+
+
+def test_fetch_objects_from_snapshot_with_label_selector(inventory, client, tmp_path):
+    # Services are watched without the label selector of the snapshot
+    opts = InventoryOptions(
+        label_selector="app=test",
+        snapshot_file=write_test_snapshot(tmp_path, label_selector="app=test"),
+    )
+
+    results = inventory._fetch_objects_from_snapshot(client, opts)
+
+    assert list(results["namespaces"]) == ["ns1"]
+    assert results["namespaces"]["ns1"]["services"] == {"testvm": [SERVICE]}
+
+
+@pytest.mark.parametrize(
+    "opts",
+    [
+        InventoryOptions(api_version="kubevirt.io/v1alpha3"),
+        InventoryOptions(label_selector="app in (test"),
+        InventoryOptions(snapshot_max_age=-1),
+    ],
+)
+def test_fetch_objects_from_snapshot_unusable(inventory, client, snapshot_file, opts):
+    opts.snapshot_file = snapshot_file
+
+    assert inventory._fetch_objects_from_snapshot(client, opts) is None
+
+
+def test_fetch_objects_from_snapshot_other_cluster(inventory, client, snapshot_file):
+    client.configuration.host = "https://other:8443"
+
+    assert (
+        inventory._fetch_objects_from_snapshot(
+            client, InventoryOptions(snapshot_file=snapshot_file)
+        )
+        is None
+    )
+
+
+def test_parse_falls_back_to_api(mocker, inventory, tmp_path):
+    config_data = {"snapshot_file": str(tmp_path / "missing.json")}
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    mocker.patch.object(inventory, "get_option", return_value=False)
+    get_api_client = mocker.patch.object(kubevirt, "get_api_client")
+    fetch_objects = mocker.patch.object(inventory, "_fetch_objects")
+    populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
+
+    inventory.parse(None, None, "/testpath")
+
+    opts = InventoryOptions(config_data=config_data)
+    get_api_client.assert_called_once_with(**config_data)
+    fetch_objects.assert_called_once_with(get_api_client.return_value, opts)
+    populate_inventory.assert_called_once_with(fetch_objects.return_value, opts)
+
+
+def test_parse_uses_snapshot(mocker, inventory, snapshot_file):
+    config_data = {"snapshot_file": snapshot_file}
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    mocker.patch.object(inventory, "get_option", return_value=False)
+    get_api_client = mocker.patch.object(kubevirt, "get_api_client")
+    get_api_client.return_value.configuration.host = "https://test:8443"
+    fetch_objects = mocker.patch.object(inventory, "_fetch_objects")
+    populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
+
+    inventory.parse(None, None, "/testpath")
+
+    fetch_objects.assert_not_called()
+    populate_inventory.assert_called_once()
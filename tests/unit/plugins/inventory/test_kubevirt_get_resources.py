@@ -6,10 +6,24 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+from json import dumps
+
 import pytest
 
+from kubernetes.client.rest import ApiException
+from kubernetes.dynamic.exceptions import (
+    DynamicApiError,
+    NotFoundError,
+    ResourceNotFoundError,
+)
+
 from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    DirectResource,
     InventoryOptions,
+    KubeVirtInventoryException,
+)
+from ansible_collections.kubevirt.core.plugins.module_utils.discovery import (
+    DiscoveryCache,
 )
 
 from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants import (
@@ -88,7 +102,7 @@ def test_get_resources(inventory, client):
     indirect=["client"],
 )
 def test_get_available_namespaces(inventory, client, expected):
-    assert inventory._get_available_namespaces(client) == expected
+    assert inventory._get_available_namespaces(client, InventoryOptions()) == expected
 
 
 @pytest.mark.parametrize(
@@ -125,3 +139,307 @@ def test_get_vmis_for_namespace(inventory, client):
     assert inventory._get_vmis_for_namespace(
         client, DEFAULT_NAMESPACE, InventoryOptions()
     ) == [{"metadata": {"name": "testvmi1"}}, {"metadata": {"name": "testvmi2"}}]
+
+
+@pytest.mark.parametrize(
+    "chunk_size,expected_calls",
+    [
+        (0, 1),
+        (2, 3),
+    ],
+)
+def test_get_resources_chunked(mocker, inventory, chunk_size, expected_calls):
+    items = [{"metadata": {"name": f"testvm{i}"}} for i in range(5)]
+
+    def get(**kwargs):
+        start = int(kwargs.get("_continue") or 0)
+        end = start + kwargs["limit"] if "limit" in kwargs else len(items)
+        response = mocker.Mock()
+        response.data = dumps(
+            {
+                "metadata": {"continue": str(end) if end < len(items) else None},
+                "items": items[start:end],
+            }
+        ).encode()
+        return response
+
+    vm_client = mocker.Mock()
+    vm_client.get = mocker.Mock(side_effect=get)
+    client = mocker.Mock()
+    client.resources.get = mocker.Mock(return_value=vm_client)
+
+    assert (
+        inventory._get_resources(
+            client,
+            "kubevirt.io/v1",
+            "VirtualMachine",
+            InventoryOptions(chunk_size=chunk_size),
+            namespace=DEFAULT_NAMESPACE,
+        )
+        == items
+    )
+    assert vm_client.get.call_count == expected_calls
+
+
+def test_iter_resources_is_lazy(mocker, inventory):
+    pages = {
+        None: {"metadata": {"continue": "next"}, "items": [{"name": "first"}]},
+        "next": {"metadata": {}, "items": [{"name": "second"}]},
+    }
+
+    vm_client = mocker.Mock()
+    vm_client.get = mocker.Mock(
+        side_effect=lambda **kwargs: mocker.Mock(
+            data=dumps(pages[kwargs.get("_continue")]).encode()
+        )
+    )
+    client = mocker.Mock()
+    client.resources.get = mocker.Mock(return_value=vm_client)
+
+    resources = inventory._iter_resources(
+        client, "kubevirt.io/v1", "VirtualMachine", InventoryOptions(chunk_size=1)
+    )
+    assert next(resources) == {"name": "first"}
+    vm_client.get.assert_called_once_with(serialize=False, limit=1)
+    assert next(resources) == {"name": "second"}
+    vm_client.get.assert_called_with(serialize=False, limit=1, _continue="next")
+
+
+def test_iter_resources_resource_version(mocker, inventory):
+    pages = {
+        None: {"metadata": {"continue": "next"}, "items": [{"name": "first"}]},
+        "next": {"metadata": {}, "items": [{"name": "second"}]},
+    }
+
+    vm_client = mocker.Mock()
+    vm_client.get = mocker.Mock(
+        side_effect=lambda **kwargs: mocker.Mock(
+            data=dumps(pages[kwargs.get("_continue")]).encode()
+        )
+    )
+    client = mocker.Mock()
+    client.resources.get = mocker.Mock(return_value=vm_client)
+
+    assert inventory._get_resources(
+        client,
+        "kubevirt.io/v1",
+        "VirtualMachine",
+        InventoryOptions(chunk_size=1, resource_version="0"),
+    ) == [{"name": "first"}, {"name": "second"}]
+    assert vm_client.get.call_args_list == [
+        mocker.call(
+            serialize=False,
+            limit=1,
+            resource_version="0",
+            resource_version_match="NotOlderThan",
+        ),
+        # The continue token already holds the resource version
+        mocker.call(serialize=False, limit=1, _continue="next"),
+    ]
+
+
+def test_iter_resources_prunes_objects(mocker, inventory):
+    vm_client = mocker.Mock()
+    vm_client.get = mocker.Mock(
+        return_value=mocker.Mock(
+            data=dumps(
+                {
+                    "metadata": {},
+                    "items": [
+                        {
+                            "metadata": {"name": "testvm", "managedFields": []},
+                            "spec": {"running": True},
+                            "status": {},
+                        }
+                    ],
+                }
+            ).encode()
+        )
+    )
+    client = mocker.Mock()
+    client.resources.get = mocker.Mock(return_value=vm_client)
+
+    assert inventory._get_resources(client, "kubevirt.io/v1", "VirtualMachine") == [
+        {"metadata": {"name": "testvm"}, "spec": {}, "status": {}}
+    ]
+
+
+def test_get_resources_records_resource_version(mocker, inventory):
+    vm_client = mocker.Mock()
+    vm_client.get = mocker.Mock(
+        return_value=mocker.Mock(
+            data=dumps({"metadata": {"resourceVersion": "123"}, "items": []}).encode()
+        )
+    )
+    client = mocker.Mock()
+    client.resources.get = mocker.Mock(return_value=vm_client)
+
+    inventory._get_resources(
+        client, "kubevirt.io/v1", "VirtualMachine", namespace=DEFAULT_NAMESPACE
+    )
+    inventory._get_resources(client, "kubevirt.io/v1", "VirtualMachine")
+
+    assert inventory._resource_versions == {
+        "VirtualMachine": {DEFAULT_NAMESPACE: "123", "": "123"}
+    }
+
+
+@pytest.mark.parametrize("second_status", [None, 404])
+def test_iter_resources_rediscovers_not_found(mocker, inventory, second_status):
+    def get(**kwargs):
+        if responses:
+            status = responses.pop(0)
+            if status is not None:
+                raise DynamicApiError(ApiException(status=status))
+        return mocker.Mock(data=dumps({"metadata": {}, "items": [{}]}).encode())
+
+    responses = [404, second_status]
+    vm_client = mocker.Mock()
+    vm_client.get = mocker.Mock(side_effect=get)
+    client = mocker.Mock()
+    client.resources.get = mocker.Mock(return_value=vm_client)
+    inventory._discovery = DiscoveryCache("https://test", 3600)
+    refresh = mocker.patch.object(inventory._discovery, "refresh")
+
+    if second_status is None:
+        assert inventory._get_resources(client, "kubevirt.io/v1", "VirtualMachine") == [
+            {}
+        ]
+    else:
+        with pytest.raises(KubeVirtInventoryException, match="Error fetching"):
+            inventory._get_resources(client, "kubevirt.io/v1", "VirtualMachine")
+
+    refresh.assert_called_once_with(client)
+    assert client.resources.get.call_count == 2
+
+
+@pytest.mark.parametrize(
+    "api_version,name,namespaced,namespace,obj_name,expected",
+    [
+        ("v1", "namespaces", False, None, None, "/api/v1/namespaces"),
+        ("v1", "services", True, None, None, "/api/v1/services"),
+        (
+            "v1",
+            "services",
+            True,
+            DEFAULT_NAMESPACE,
+            None,
+            f"/api/v1/namespaces/{DEFAULT_NAMESPACE}/services",
+        ),
+        (
+            "kubevirt.io/v1",
+            "virtualmachines",
+            True,
+            DEFAULT_NAMESPACE,
+            "testvm",
+            f"/apis/kubevirt.io/v1/namespaces/{DEFAULT_NAMESPACE}/virtualmachines/testvm",
+        ),
+        (
+            "config.openshift.io/v1",
+            "dnses",
+            False,
+            DEFAULT_NAMESPACE,
+            "cluster",
+            "/apis/config.openshift.io/v1/dnses/cluster",
+        ),
+    ],
+)
+def test_direct_resource_path(
+    api_version, name, namespaced, namespace, obj_name, expected
+):
+    resource = DirectResource(None, api_version, name, namespaced)
+    assert resource.path(name=obj_name, namespace=namespace) == expected
+
+
+def test_direct_resource_get(mocker):
+    client = mocker.Mock()
+    resource = DirectResource(client, "kubevirt.io/v1", "virtualmachines", True)
+
+    assert (
+        resource.get(namespace=DEFAULT_NAMESPACE, serialize=False, limit=1)
+        == client.request.return_value
+    )
+    client.request.assert_called_once_with(
+        "get",
+        f"/apis/kubevirt.io/v1/namespaces/{DEFAULT_NAMESPACE}/virtualmachines",
+        serialize=False,
+        limit=1,
+    )
+
+
+def test_direct_resource_get_not_found(mocker):
+    client = mocker.Mock()
+    client.request.side_effect = NotFoundError(ApiException(status=404))
+    resource = DirectResource(client, "project.openshift.io/v1", "projects", False)
+
+    with pytest.raises(ResourceNotFoundError):
+        resource.get()
+    with pytest.raises(NotFoundError):
+        resource.get(name="test")
+
+
+def test_direct_resource_watch(mocker):
+    client = mocker.Mock()
+    resource = DirectResource(client, "kubevirt.io/v1", "virtualmachines", True)
+
+    assert (
+        resource.watch(namespace=DEFAULT_NAMESPACE, timeout=1)
+        == client.watch.return_value
+    )
+    client.watch.assert_called_once_with(
+        resource, namespace=DEFAULT_NAMESPACE, timeout=1
+    )
+
+
+@pytest.mark.parametrize(
+    "api_version,kind,direct_api_paths,expected_path",
+    [
+        (
+            "kubevirt.io/v1",
+            "VirtualMachine",
+            True,
+            "/apis/kubevirt.io/v1/virtualmachines",
+        ),
+        ("v1", "Service", True, "/api/v1/services"),
+        ("v1", "Namespace", True, "/api/v1/namespaces"),
+        ("kubevirt.io/v1", "VirtualMachine", False, None),
+        ("test.io/v1", "VirtualMachine", True, None),
+        ("v1", "ConfigMap", True, None),
+    ],
+)
+def test_get_resource(
+    mocker, inventory, api_version, kind, direct_api_paths, expected_path
+):
+    client = mocker.Mock()
+
+    resource = inventory._get_resource(
+        client, api_version, kind, InventoryOptions(direct_api_paths=direct_api_paths)
+    )
+
+    if expected_path is None:
+        assert resource == client.resources.get.return_value
+        client.resources.get.assert_called_once_with(api_version=api_version, kind=kind)
+    else:
+        assert isinstance(resource, DirectResource)
+        assert resource.client == client.client
+        assert resource.path() == expected_path
+        client.resources.get.assert_not_called()
+
+
+def test_get_available_namespaces_direct_api_paths(mocker, inventory):
+    def request(method, path, **kwargs):
+        if path == "/apis/project.openshift.io/v1/projects":
+            raise NotFoundError(ApiException(status=404))
+        return mocker.Mock(
+            data=dumps(
+                {"metadata": {}, "items": [{"metadata": {"name": "test"}}]}
+            ).encode()
+        )
+
+    client = mocker.Mock()
+    client.client.request = mocker.Mock(side_effect=request)
+
+    assert inventory._get_available_namespaces(
+        client, InventoryOptions(direct_api_paths=True)
+    ) == ["test"]
+    client.resources.get.assert_not_called()
@@ -8,6 +8,10 @@ __metaclass__ = type
 
 import pytest
 
+from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    InventoryOptions,
+)
+
 from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants import (
     DEFAULT_NAMESPACE,
 )
@@ -132,7 +136,9 @@ SVC_NP_WINRM_HTTPS = {
     indirect=["client"],
 )
 def test_get_services_for_namespace(inventory, client):
-    assert inventory._get_services_for_namespace(client, DEFAULT_NAMESPACE) == {
+    assert inventory._get_services_for_namespace(
+        client, DEFAULT_NAMESPACE, InventoryOptions()
+    ) == {
         "test-lb-ssh": [SVC_LB_SSH],
         "test-np-ssh": [SVC_NP_SSH],
         "test-lb-winrm-http": [SVC_LB_WINRM_HTTP],
@@ -244,4 +250,6 @@ SVC_NO_SELECTOR = {
     indirect=["client"],
 )
 def test_ignore_unwanted_services(inventory, client):
-    assert not inventory._get_services_for_namespace(client, DEFAULT_NAMESPACE)
+    assert not inventory._get_services_for_namespace(
+        client, DEFAULT_NAMESPACE, InventoryOptions()
+    )
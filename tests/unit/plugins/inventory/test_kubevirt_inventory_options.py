@@ -24,6 +24,28 @@ def test_inventory_options_defaults():
     assert opts.append_base_domain is False
     assert opts.default_win_ansible_connection == "winrm"
     assert opts.host_format == "{namespace}-{name}"
+    assert opts.fetch_concurrency == 1
+    assert opts.cluster_wide_list is False
+    assert opts.chunk_size == 0
+    assert opts.incremental_refresh is False
+    assert opts.watch_timeout == 1
+    assert opts.snapshot_file is None
+    assert opts.snapshot_max_age == 60
+    assert opts.vm_cache_timeout is None
+    assert opts.vmi_cache_timeout is None
+    assert opts.service_cache_timeout is None
+    assert opts.discovery_cache_timeout == 3600
+    assert opts.direct_api_paths is False
+    assert opts.hostvars_include is None
+    assert opts.hostvars_exclude is None
+    assert opts.hostvars_annotations is True
+    assert opts.cache_plan is False
+    assert opts.fetch_memo_ttl == 0
+    assert opts.cache_mode == "blocking"
+    assert opts.cache_max_stale == 3600
+    assert opts.cache_lock_timeout is None
+    assert opts.freshness_probe is False
+    assert opts.resource_version is None
 
 
 def test_inventory_options_override_defaults():
@@ -38,6 +60,28 @@ def test_inventory_options_override_defaults():
     append_base_domain = True
     default_win_ansible_connection = "psrp"
     host_format = "{name}-testhost"
+    fetch_concurrency = 8
+    cluster_wide_list = True
+    chunk_size = 500
+    incremental_refresh = True
+    watch_timeout = 5
+    snapshot_file = "/tmp/snapshot.json"
+    snapshot_max_age = 10
+    vm_cache_timeout = 3600
+    vmi_cache_timeout = 60
+    service_cache_timeout = 120
+    discovery_cache_timeout = 0
+    direct_api_paths = True
+    hostvars_include = ["vmi_*"]
+    hostvars_exclude = ["vmi_conditions"]
+    hostvars_annotations = False
+    cache_plan = True
+    fetch_memo_ttl = 30
+    cache_mode = "stale_while_revalidate"
+    cache_max_stale = 600
+    cache_lock_timeout = 30
+    freshness_probe = True
+    resource_version = "0"
 
     opts = InventoryOptions(
         api_version=api_version,
@@ -51,6 +95,28 @@ def test_inventory_options_override_defaults():
         append_base_domain=append_base_domain,
         default_win_ansible_connection=default_win_ansible_connection,
         host_format=host_format,
+        fetch_concurrency=fetch_concurrency,
+        cluster_wide_list=cluster_wide_list,
+        chunk_size=chunk_size,
+        incremental_refresh=incremental_refresh,
+        watch_timeout=watch_timeout,
+        snapshot_file=snapshot_file,
+        snapshot_max_age=snapshot_max_age,
+        vm_cache_timeout=vm_cache_timeout,
+        vmi_cache_timeout=vmi_cache_timeout,
+        service_cache_timeout=service_cache_timeout,
+        discovery_cache_timeout=discovery_cache_timeout,
+        direct_api_paths=direct_api_paths,
+        hostvars_include=hostvars_include,
+        hostvars_exclude=hostvars_exclude,
+        hostvars_annotations=hostvars_annotations,
+        cache_plan=cache_plan,
+        fetch_memo_ttl=fetch_memo_ttl,
+        cache_mode=cache_mode,
+        cache_max_stale=cache_max_stale,
+        cache_lock_timeout=cache_lock_timeout,
+        freshness_probe=freshness_probe,
+        resource_version=resource_version,
     )
     assert opts.api_version == api_version
     assert opts.label_selector == label_selector
@@ -63,3 +129,25 @@ def test_inventory_options_override_defaults():
     assert opts.append_base_domain == append_base_domain
     assert opts.default_win_ansible_connection == default_win_ansible_connection
     assert opts.host_format == host_format
+    assert opts.fetch_concurrency == fetch_concurrency
+    assert opts.cluster_wide_list == cluster_wide_list
+    assert opts.chunk_size == chunk_size
+    assert opts.incremental_refresh == incremental_refresh
+    assert opts.watch_timeout == watch_timeout
+    assert opts.snapshot_file == snapshot_file
+    assert opts.snapshot_max_age == snapshot_max_age
+    assert opts.vm_cache_timeout == vm_cache_timeout
+    assert opts.vmi_cache_timeout == vmi_cache_timeout
+    assert opts.service_cache_timeout == service_cache_timeout
+    assert opts.discovery_cache_timeout == discovery_cache_timeout
+    assert opts.direct_api_paths == direct_api_paths
+    assert opts.hostvars_include == hostvars_include
+    assert opts.hostvars_exclude == hostvars_exclude
+    assert opts.hostvars_annotations == hostvars_annotations
+    assert opts.cache_plan == cache_plan
+    assert opts.fetch_memo_ttl == fetch_memo_ttl
+    assert opts.cache_mode == cache_mode
+    assert opts.cache_max_stale == cache_max_stale
+    assert opts.cache_lock_timeout == cache_lock_timeout
+    assert opts.freshness_probe == freshness_probe
+    assert opts.resource_version == resource_version
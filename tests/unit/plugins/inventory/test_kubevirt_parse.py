@@ -6,6 +6,9 @@ from __future__ import absolute_import, division, print_function
 
 __metaclass__ = type
 
+from json import dump
+from time import time
+
 import pytest
 
 from ansible_collections.kubevirt.core.plugins.inventory import (
@@ -13,8 +16,10 @@ from ansible_collections.kubevirt.core.plugins.inventory import (
 )
 
 from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    CACHE_FORMAT_VERSION,
     InventoryOptions,
     KubeVirtInventoryException,
+    REVALIDATE_ENV_VAR,
 )
 
 from ansible.plugins.inventory import Cacheable
@@ -111,17 +116,26 @@ def test_config_data_to_opts(mocker, inventory, config_data, expected):
     populate_inventory.assert_called_once_with(mocker.ANY, expected)
 
 
+CACHE_INDEX = {
+    "version": CACHE_FORMAT_VERSION,
+    "timestamp": 0,
+    "namespaces": [],
+    "resource_versions": {},
+}
+
+
 @pytest.mark.parametrize(
     "cache_parse,cache_option,cache_data,expected",
     [
-        (True, True, {"test-key": {"something": "something"}}, True),
-        (None, True, {"test-key": {"something": "something"}}, True),
-        (False, True, {"test-key": {"something": "something"}}, False),
-        (True, False, {"test-key": {"something": "something"}}, False),
-        (None, False, {"test-key": {"something": "something"}}, False),
-        (False, False, {"test-key": {"something": "something"}}, False),
-        (True, True, {"test-key2": {"something": "something"}}, False),
-        (None, True, {"test-key2": {"something": "something"}}, False),
+        (True, True, {"test-key": CACHE_INDEX}, True),
+        (None, True, {"test-key": CACHE_INDEX}, True),
+        (False, True, {"test-key": CACHE_INDEX}, False),
+        (True, False, {"test-key": CACHE_INDEX}, False),
+        (None, False, {"test-key": CACHE_INDEX}, False),
+        (False, False, {"test-key": CACHE_INDEX}, False),
+        (True, True, {"test-key2": CACHE_INDEX}, False),
+        (None, True, {"test-key2": CACHE_INDEX}, False),
+        (True, True, {"test-key": {"something": "something"}}, False),
     ],
 )
 def test_use_of_cache(
@@ -131,7 +145,10 @@ def test_use_of_cache(
     config_data = {"host_format": "test-format"}
 
     mocker.patch.object(
-        Cacheable, "cache", new_callable=mocker.PropertyMock, return_value=cache_data
+        Cacheable,
+        "cache",
+        new_callable=mocker.PropertyMock,
+        return_value=cache_data.copy(),
     )
 
     read_config_data = mocker.patch.object(
@@ -140,7 +157,11 @@ def test_use_of_cache(
     get_cache_key = mocker.patch.object(
         inventory, "get_cache_key", return_value="test-key"
     )
-    get_option = mocker.patch.object(inventory, "get_option", return_value=cache_option)
+    get_option = mocker.patch.object(
+        inventory,
+        "get_option",
+        side_effect=lambda option: {"cache": cache_option, "cache_timeout": 0}[option],
+    )
     get_api_client = mocker.patch.object(kubevirt, "get_api_client")
     fetch_objects = mocker.patch.object(inventory, "_fetch_objects")
     populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
@@ -151,8 +172,10 @@ def test_use_of_cache(
         inventory.parse(None, None, path, cache_parse)
 
     opts = InventoryOptions(config_data=config_data)
-    get_cache_key.assert_called_once_with(path)
-    get_option.assert_called_once_with("cache")
+    get_cache_key.assert_called_once_with(
+        inventory._get_fetch_fingerprint(config_data, opts)
+    )
+    get_option.assert_any_call("cache")
     read_config_data.assert_called_once_with(path)
     if expected:
         get_api_client.assert_not_called()
@@ -189,3 +212,448 @@ def test_k8s_client_missing(mocker, inventory, present):
         ):
             inventory.parse(None, None, "", False)
         fetch_objects.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "cache_data,refresh",
+    [
+        ({"test-key": CACHE_INDEX}, True),
+        ({}, False),
+    ],
+)
+def test_incremental_refresh(mocker, inventory, cache_data, refresh):
+    config_data = {"incremental_refresh": True}
+
+    mocker.patch.object(
+        Cacheable,
+        "cache",
+        new_callable=mocker.PropertyMock,
+        return_value=cache_data.copy(),
+    )
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    mocker.patch.object(inventory, "get_option", return_value=True)
+    mocker.patch.object(kubevirt, "get_api_client")
+    fetch_objects = mocker.patch.object(inventory, "_fetch_objects")
+    refresh_objects = mocker.patch.object(inventory, "_refresh_objects")
+    mocker.patch.object(inventory, "_populate_inventory")
+
+    inventory.parse(None, None, "/testpath", False)
+
+    opts = InventoryOptions(config_data=config_data)
+    if refresh:
+        refresh_objects.assert_called_once_with(
+            mocker.ANY, CACHE_INDEX | {"namespaces": {}}, opts
+        )
+        fetch_objects.assert_not_called()
+    else:
+        refresh_objects.assert_not_called()
+        fetch_objects.assert_called_once_with(mocker.ANY, opts)
+
+
+@pytest.mark.parametrize("expired_state", [False, True])
+def test_discovery_cache(mocker, inventory, expired_state):
+    mocker.patch.object(inventory, "_read_config_data", return_value={})
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    mocker.patch.object(inventory, "get_option", return_value=False)
+    get_api_client = mocker.patch.object(kubevirt, "get_api_client")
+    get_api_client.return_value.configuration.host = "https://test"
+    mocker.patch.object(inventory, "_fetch_objects")
+    mocker.patch.object(inventory, "_populate_inventory")
+    if expired_state:
+        path = kubevirt.DiscoveryCache("https://test", 3600).path
+        with open(path, "w") as f:
+            dump({"timestamp": time() - 7200, "missing": []}, f)
+
+    inventory.parse(None, None, "/testpath")
+    inventory.parse(None, None, "/testpath")
+
+    # Without persisted state the discovery of the client is kept
+    assert get_api_client.return_value.resources.invalidate_cache.called == (
+        expired_state
+    )
+    assert get_api_client.return_value.resources.invalidate_cache.call_count <= 1
+
+
+@pytest.mark.parametrize("plan", [None, [["host", "default-testvm"]]])
+def test_cache_plan(mocker, inventory, plan):
+    config_data = {"cache_plan": True}
+    index = CACHE_INDEX | {"timestamp": time()}
+
+    mocker.patch.object(
+        Cacheable,
+        "cache",
+        new_callable=mocker.PropertyMock,
+        return_value={"test-key": index},
+    )
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    mocker.patch.object(inventory, "get_option", return_value=True)
+    read_plan = mocker.patch.object(inventory, "_read_plan", return_value=plan)
+    write_plan = mocker.patch.object(inventory, "_write_plan")
+    populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
+    populate_inventory_from_plan = mocker.patch.object(
+        inventory, "_populate_inventory_from_plan"
+    )
+
+    inventory.parse(None, None, "/testpath", True)
+
+    opts = InventoryOptions(config_data=config_data)
+    cached = index | {"namespaces": {}}
+    read_plan.assert_called_once_with("test-key", cached, opts)
+    write_plan.assert_called_once_with("test-key", inventory._get_options_hash(opts))
+    if plan is None:
+        populate_inventory.assert_called_once_with(cached, opts)
+        populate_inventory_from_plan.assert_not_called()
+    else:
+        populate_inventory.assert_not_called()
+        populate_inventory_from_plan.assert_called_once_with(cached, opts, plan)
+
+
+@pytest.mark.parametrize("ttl,fetches", [(0, 2), (30, 1)])
+def test_fetch_memo(mocker, inventory, ttl, fetches):
+    config_data = {"fetch_memo_ttl": ttl}
+    results = {
+        "default_hostname": "test",
+        "cluster_domain": None,
+        "namespaces": {"test": {"vms": [], "vmis": [], "services": {}}},
+    }
+
+    mocker.patch.dict(kubevirt._fetch_memo, clear=True)
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_option", return_value=False)
+    get_api_client = mocker.patch.object(kubevirt, "get_api_client")
+    fetch_objects = mocker.patch.object(
+        inventory, "_fetch_objects", return_value=results
+    )
+    populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
+
+    inventory.parse(None, None, "/testpath")
+    inventory.parse(None, None, "/testpath")
+
+    assert get_api_client.call_count == fetches
+    assert fetch_objects.call_count == fetches
+    populate_inventory.assert_called_with(
+        results, InventoryOptions(config_data=config_data)
+    )
+
+
+def test_fetch_memo_expired(mocker, inventory):
+    config_data = {"fetch_memo_ttl": 30}
+
+    mocker.patch.dict(kubevirt._fetch_memo, clear=True)
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_option", return_value=False)
+    mocker.patch.object(kubevirt, "get_api_client")
+    fetch_objects = mocker.patch.object(
+        inventory, "_fetch_objects", return_value={"namespaces": {}}
+    )
+    mocker.patch.object(inventory, "_populate_inventory")
+    now = time()
+    mocker.patch.object(kubevirt, "time", return_value=now)
+
+    inventory.parse(None, None, "/testpath")
+    kubevirt.time.return_value = now + 31
+    inventory.parse(None, None, "/testpath")
+
+    assert fetch_objects.call_count == 2
+
+
+def test_fetch_memo_evicts_expired(mocker, inventory):
+    mocker.patch.dict(kubevirt._fetch_memo, clear=True)
+    now = time()
+    mocker.patch.object(kubevirt, "time", return_value=now)
+
+    inventory._write_fetch_memo("short", {"namespaces": {}}, 10)
+    inventory._write_fetch_memo("long", {"namespaces": {}}, 60)
+    kubevirt.time.return_value = now + 30
+
+    assert inventory._read_fetch_memo("other", 60) is None
+    assert list(kubevirt._fetch_memo) == ["long"]
+
+
+def test_fetch_memo_size(mocker, inventory):
+    mocker.patch.dict(kubevirt._fetch_memo, clear=True)
+
+    for i in range(kubevirt.FETCH_MEMO_SIZE + 2):
+        inventory._write_fetch_memo(f"fetch{i}", {"namespaces": {}}, 60)
+    inventory._write_fetch_memo("fetch2", {"namespaces": {}}, 60)
+
+    assert len(kubevirt._fetch_memo) == kubevirt.FETCH_MEMO_SIZE
+    assert list(kubevirt._fetch_memo)[0] == "fetch3"
+    assert list(kubevirt._fetch_memo)[-1] == "fetch2"
+
+
+def test_copy_results():
+    results = {
+        "default_hostname": "test",
+        "namespaces": {"test": {"vms": [{"metadata": {}}]}},
+        "resource_versions": {"vms": {"test": "1"}},
+    }
+    copied = kubevirt.InventoryModule._copy_results(results)
+    copied["namespaces"]["test"]["vms"] = []
+    copied["resource_versions"]["vms"]["test"] = "2"
+
+    assert copied["default_hostname"] == "test"
+    assert results["namespaces"]["test"]["vms"] == [{"metadata": {}}]
+    assert results["resource_versions"]["vms"]["test"] == "1"
+
+
+@pytest.mark.parametrize(
+    "age,env,revalidate",
+    [
+        (100, None, "background"),
+        (7200, None, None),
+        (100, "test-key", "now"),
+        (100, "other-key", "background"),
+    ],
+)
+def test_stale_while_revalidate(mocker, inventory, age, env, revalidate):
+    config_data = {"cache_mode": "stale_while_revalidate", "cache_max_stale": 3600}
+    index = CACHE_INDEX | {"timestamp": time() - 3600 - age}
+
+    mocker.patch.object(
+        Cacheable,
+        "cache",
+        new_callable=mocker.PropertyMock,
+        return_value={"test-key": index},
+    )
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    mocker.patch.object(
+        inventory,
+        "get_option",
+        side_effect=lambda option: {"cache": True, "cache_timeout": 3600}[option],
+    )
+    mocker.patch.object(inventory, "_load_cache_plugin")
+    mocker.patch.dict(
+        kubevirt.os.environ, {REVALIDATE_ENV_VAR: env} if env is not None else {}
+    )
+    get_api_client = mocker.patch.object(kubevirt, "get_api_client")
+    fetch_objects = mocker.patch.object(
+        inventory, "_fetch_objects", return_value={"namespaces": {}}
+    )
+    populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
+    start_revalidation = mocker.patch.object(inventory, "_start_revalidation")
+    revalidate_cache = mocker.patch.object(inventory, "_revalidate_cache")
+
+    inventory.parse(None, None, "/testpath", True)
+
+    opts = InventoryOptions(config_data=config_data)
+    cached = index | {"namespaces": {}}
+    if revalidate is None:
+        fetch_objects.assert_called_once_with(mocker.ANY, opts)
+        populate_inventory.assert_called_once_with({"namespaces": {}}, opts)
+        start_revalidation.assert_not_called()
+        revalidate_cache.assert_not_called()
+        return
+
+    get_api_client.assert_not_called()
+    fetch_objects.assert_not_called()
+    populate_inventory.assert_called_once_with(cached, opts)
+    if revalidate == "background":
+        start_revalidation.assert_called_once_with("/testpath", "test-key")
+        revalidate_cache.assert_not_called()
+    else:
+        start_revalidation.assert_not_called()
+        revalidate_cache.assert_called_once_with(
+            config_data,
+            inventory._get_fetch_fingerprint(config_data, opts),
+            "test-key",
+            cached,
+            None,
+            opts,
+        )
+
+
+def test_start_revalidation(mocker, inventory):
+    popen = mocker.patch.object(kubevirt.subprocess, "Popen")
+
+    inventory._start_revalidation("/testpath", "test-key")
+
+    popen.assert_called_once()
+    args, kwargs = popen.call_args
+    assert args[0][1:] == [
+        "-m",
+        "ansible.cli.inventory",
+        "-i",
+        "/testpath",
+        "--list",
+        "--output",
+        kubevirt.os.devnull,
+    ]
+    assert kwargs["env"][REVALIDATE_ENV_VAR] == "test-key"
+    assert kwargs["start_new_session"]
+
+
+def test_start_revalidation_failed(mocker, inventory):
+    mocker.patch.object(kubevirt.subprocess, "Popen", side_effect=OSError("error"))
+    warning = mocker.patch.object(inventory.display, "warning")
+
+    inventory._start_revalidation("/testpath", "test-key")
+
+    warning.assert_called_once_with("Failed to refresh the inventory cache: error")
+
+
+@pytest.mark.parametrize("expired", [None, [("test", "vms")]])
+def test_revalidate_cache(mocker, inventory, expired):
+    opts = InventoryOptions()
+    cached = {"namespaces": {"test": {"vms": [], "vmis": [], "services": {}}}}
+    results = {"namespaces": {"test": {"vms": [{}], "vmis": [], "services": {}}}}
+
+    mocker.patch.object(kubevirt, "get_api_client")
+    mocker.patch.object(inventory, "_load_discovery_cache", return_value=None)
+    fetch_objects = mocker.patch.object(
+        inventory, "_fetch_objects", return_value=results
+    )
+    refetch_expired_objects = mocker.patch.object(
+        inventory, "_refetch_expired_objects", return_value=results
+    )
+    load_cache_plugin = mocker.patch.object(inventory, "_load_cache_plugin")
+    write_cache = mocker.patch.object(inventory, "_write_cache")
+
+    inventory._revalidate_cache({}, "fingerprint", "test-key", cached, expired, opts)
+
+    if expired:
+        refetch_expired_objects.assert_called_once_with(
+            mocker.ANY, cached, expired, opts
+        )
+        fetch_objects.assert_not_called()
+    else:
+        fetch_objects.assert_called_once_with(mocker.ANY, opts)
+    write_cache.assert_called_once_with(
+        "test-key", results, expired, load_cache_plugin.return_value
+    )
+    load_cache_plugin.return_value.set_cache.assert_called_once()
+
+
+def test_revalidate_cache_locked(mocker, inventory):
+    lock_cache = mocker.patch.object(inventory, "_lock_cache")
+    lock_cache.return_value.__enter__.return_value = True
+    fetch_results = mocker.patch.object(inventory, "_fetch_results")
+
+    inventory._revalidate_cache(
+        {}, "fingerprint", "test-key", {}, None, InventoryOptions(cache_lock_timeout=30)
+    )
+
+    lock_cache.assert_called_once_with("test-key", 0)
+    fetch_results.assert_not_called()
+
+
+def test_revalidate_cache_failed(mocker, inventory):
+    mocker.patch.object(kubevirt, "get_api_client", side_effect=Exception("failed"))
+    warning = mocker.patch.object(inventory.display, "warning")
+    write_cache = mocker.patch.object(inventory, "_write_cache")
+
+    inventory._revalidate_cache(
+        {}, "fingerprint", "test-key", {}, None, InventoryOptions()
+    )
+
+    warning.assert_called_once_with("Failed to refresh the inventory cache: failed")
+    write_cache.assert_not_called()
+
+
+@pytest.mark.parametrize(
+    "waited,fresh",
+    [
+        (False, False),
+        (True, True),
+        (True, False),
+    ],
+)
+def test_cache_lock(mocker, inventory, waited, fresh):
+    config_data = {"cache_lock_timeout": 30}
+    index = CACHE_INDEX | {"timestamp": time() if fresh else 0}
+    results = {"namespaces": {}}
+
+    cache = mocker.MagicMock()
+    cache.get.side_effect = {"test-key": index}.get
+    mocker.patch.object(
+        Cacheable, "cache", new_callable=mocker.PropertyMock, return_value=cache
+    )
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    mocker.patch.object(
+        inventory,
+        "get_option",
+        side_effect=lambda option: {"cache": True, "cache_timeout": 3600}[option],
+    )
+    load_cache_plugin = mocker.patch.object(inventory, "_load_cache_plugin")
+    lock_cache = mocker.patch.object(inventory, "_lock_cache")
+    lock_cache.return_value.__enter__.return_value = waited
+    mocker.patch.object(kubevirt, "get_api_client")
+    fetch_objects = mocker.patch.object(
+        inventory, "_fetch_objects", return_value=results
+    )
+    write_cache = mocker.patch.object(inventory, "_write_cache")
+    populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
+
+    inventory.parse(None, None, "/testpath", False)
+
+    opts = InventoryOptions(config_data=config_data)
+    lock_cache.assert_called_once_with("test-key", 30)
+    if waited:
+        load_cache_plugin.assert_called_once_with(0)
+    else:
+        load_cache_plugin.assert_not_called()
+    if fresh:
+        fetch_objects.assert_not_called()
+        write_cache.assert_not_called()
+        populate_inventory.assert_called_once_with(index | {"namespaces": {}}, opts)
+    else:
+        fetch_objects.assert_called_once_with(mocker.ANY, opts)
+        write_cache.assert_called_once_with("test-key", results, None)
+        cache.set_cache.assert_called_once()
+        populate_inventory.assert_called_once_with(results, opts)
+
+
+@pytest.mark.parametrize("unchanged", [True, False])
+def test_freshness_probe(mocker, inventory, unchanged):
+    config_data = {"freshness_probe": True}
+    index = CACHE_INDEX | {
+        "timestamp": time() - 3700,
+        "resource_versions": {"VirtualMachine": {"": "10"}},
+    }
+    results = {"namespaces": {}}
+
+    mocker.patch.object(
+        Cacheable,
+        "cache",
+        new_callable=mocker.PropertyMock,
+        return_value={"test-key": index},
+    )
+    mocker.patch.object(inventory, "_read_config_data", return_value=config_data)
+    mocker.patch.object(inventory, "get_cache_key", return_value="test-key")
+    mocker.patch.object(
+        inventory,
+        "get_option",
+        side_effect=lambda option: {"cache": True, "cache_timeout": 3600}[option],
+    )
+    load_cache_plugin = mocker.patch.object(inventory, "_load_cache_plugin")
+    mocker.patch.object(kubevirt, "get_api_client")
+    mocker.patch.object(inventory, "_load_discovery_cache", return_value=None)
+    probe_resource_versions = mocker.patch.object(
+        inventory, "_probe_resource_versions", return_value=unchanged
+    )
+    fetch_objects = mocker.patch.object(
+        inventory, "_fetch_objects", return_value=results
+    )
+    write_cache = mocker.patch.object(inventory, "_write_cache")
+    populate_inventory = mocker.patch.object(inventory, "_populate_inventory")
+
+    inventory.parse(None, None, "/testpath", True)
+
+    opts = InventoryOptions(config_data=config_data)
+    cached = index | {"namespaces": {}}
+    load_cache_plugin.assert_called_once_with(3600)
+    probe_resource_versions.assert_called_once_with(
+        mocker.ANY, index["resource_versions"], None, opts
+    )
+    if unchanged:
+        fetch_objects.assert_not_called()
+        write_cache.assert_called_once_with("test-key", cached, None)
+        populate_inventory.assert_called_once_with(cached, opts)
+    else:
+        fetch_objects.assert_called_once_with(mocker.ANY, opts)
+        write_cache.assert_called_once_with("test-key", results, None)
+        populate_inventory.assert_called_once_with(results, opts)
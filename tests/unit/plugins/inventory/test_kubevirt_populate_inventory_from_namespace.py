@@ -9,6 +9,7 @@ __metaclass__ = type
 import pytest
 
 from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    ObjectRecord,
     InventoryOptions,
 )
 
@@ -81,20 +82,20 @@ VMI2 = {
 def test_populate_inventory_from_namespace(
     mocker, inventory, groups, vms, vmis, expected
 ):
-    _vms = {vm["metadata"]["name"]: vm for vm in vms}
-    _vmis = {vmi["metadata"]["name"]: vmi for vmi in vmis}
+    _vms = {vm["metadata"]["name"]: ObjectRecord.from_obj(vm) for vm in vms}
+    _vmis = {vmi["metadata"]["name"]: ObjectRecord.from_obj(vmi) for vmi in vmis}
     opts = InventoryOptions(name="test")
 
     def format_hostname(obj):
         return opts.host_format.format(
-            namespace=obj["metadata"]["namespace"],
-            name=obj["metadata"]["name"],
-            uid=obj["metadata"]["uid"],
+            namespace=obj.namespace,
+            name=obj.name,
+            uid=obj.uid,
         )
 
     def add_host_call(obj):
         return mocker.call(
-            obj["metadata"],
+            obj,
             opts.host_format,
             f"namespace_{DEFAULT_NAMESPACE}",
         )
@@ -104,29 +105,36 @@ def test_populate_inventory_from_namespace(
     add_host_calls = []
     set_vars_from_vm_calls = []
     set_vars_from_vmi_calls = []
+    set_host_vars_calls = []
     set_composable_vars_calls = []
 
     # For each VM add the expected calls
     # Also add expected calls for VMIs for which a VM exists
-    for name, vm in _vms.items():
+    for vm in vms:
         obj_is_valid_calls.append(mocker.call(vm))
+    for vmi in vmis:
+        obj_is_valid_calls.append(mocker.call(vmi))
+    for name, vm in _vms.items():
         hostname = format_hostname(vm)
         add_host_side_effects.append(hostname)
         add_host_calls.append(add_host_call(vm))
-        set_vars_from_vm_calls.append(mocker.call(hostname, vm, opts))
+        set_vars_from_vm_calls.append(mocker.call(hostname, {}, vm, opts))
         if name in _vmis.keys():
-            set_vars_from_vmi_calls.append(mocker.call(hostname, _vmis[name], {}, opts))
+            set_vars_from_vmi_calls.append(
+                mocker.call(hostname, {}, _vmis[name], {}, opts)
+            )
+        set_host_vars_calls.append(mocker.call(hostname, {}))
         set_composable_vars_calls.append(mocker.call(hostname))
 
     # For each VMI add the expected calls
     # Do not add for VMIs for which a VM exists
     for name, vmi in _vmis.items():
-        obj_is_valid_calls.append(mocker.call(vmi))
         if name not in _vms.keys():
             hostname = format_hostname(vmi)
             add_host_side_effects.append(hostname)
             add_host_calls.append(add_host_call(vmi))
-            set_vars_from_vmi_calls.append(mocker.call(hostname, vmi, {}, opts))
+            set_vars_from_vmi_calls.append(mocker.call(hostname, {}, vmi, {}, opts))
+            set_host_vars_calls.append(mocker.call(hostname, {}))
             set_composable_vars_calls.append(mocker.call(hostname))
 
     obj_is_valid = mocker.patch.object(inventory, "_obj_is_valid", return_value=True)
@@ -135,6 +143,7 @@ def test_populate_inventory_from_namespace(
     )
     set_vars_from_vm = mocker.patch.object(inventory, "_set_vars_from_vm")
     set_vars_from_vmi = mocker.patch.object(inventory, "_set_vars_from_vmi")
+    set_host_vars = mocker.patch.object(inventory, "_set_host_vars")
     set_composable_vars = mocker.patch.object(inventory, "_set_composable_vars")
 
     inventory._populate_inventory_from_namespace(
@@ -145,6 +154,7 @@ def test_populate_inventory_from_namespace(
     obj_is_valid.assert_has_calls(obj_is_valid_calls)
     set_vars_from_vm.assert_has_calls(set_vars_from_vm_calls)
     set_vars_from_vmi.assert_has_calls(set_vars_from_vmi_calls)
+    set_host_vars.assert_has_calls(set_host_vars_calls)
     set_composable_vars.assert_has_calls(set_composable_vars_calls)
 
     # If no VMs or VMIs were provided the function should not add any groups
@@ -0,0 +1,522 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from kubernetes.client.rest import ApiException
+from kubernetes.dynamic.exceptions import DynamicApiError
+
+from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    InventoryOptions,
+    KubeVirtInventoryException,
+    LABEL_KUBEVIRT_IO_DOMAIN,
+)
+
+from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants import (
+    DEFAULT_NAMESPACE,
+)
+
+
+def vm(name, resource_version="1", namespace=DEFAULT_NAMESPACE):
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": f"uid-{namespace}-{name}",
+            "resourceVersion": resource_version,
+        }
+    }
+
+
+def vmi(name, resource_version="1", namespace=DEFAULT_NAMESPACE):
+    return vm(name, resource_version, namespace) | {
+        "status": {"interfaces": [{"ipAddress": "10.10.10.10"}]}
+    }
+
+
+SERVICE = {
+    "metadata": {
+        "name": "testsvc",
+        "namespace": DEFAULT_NAMESPACE,
+        "uid": "uid-testsvc",
+        "resourceVersion": "1",
+    },
+    "spec": {
+        "type": "NodePort",
+        "ports": [{"targetPort": 22, "nodePort": 31234}],
+        "selector": {LABEL_KUBEVIRT_IO_DOMAIN: "testvm1"},
+    },
+}
+
+
+@pytest.fixture(scope="function")
+def watch_client(mocker):
+    resource = mocker.Mock()
+    client = mocker.Mock()
+    client.resources.get = mocker.Mock(return_value=resource)
+    return client, resource
+
+
+def test_watch_resources_applies_events(mocker, inventory, watch_client):
+    client, resource = watch_client
+    resource.watch = mocker.Mock(
+        return_value=iter(
+            [
+                {"type": "MODIFIED", "raw_object": vm("testvm2", "5")},
+                {"type": "ADDED", "raw_object": vm("testvm0", "6")},
+                {"type": "DELETED", "raw_object": vm("testvm3", "7")},
+                {
+                    "type": "BOOKMARK",
+                    "raw_object": {"metadata": {"resourceVersion": "9"}},
+                },
+            ]
+        )
+    )
+    get_resources = mocker.patch.object(inventory, "_get_resources")
+    opts = InventoryOptions(watch_timeout=3)
+
+    result = inventory._watch_resources(
+        client,
+        "kubevirt.io/v1",
+        "VirtualMachine",
+        [vm("testvm1"), vm("testvm2"), vm("testvm3")],
+        "4",
+        opts,
+        namespace=DEFAULT_NAMESPACE,
+        label_selector="app=test",
+    )
+
+    assert result == [vm("testvm0", "6"), vm("testvm1"), vm("testvm2", "5")]
+    resource.watch.assert_called_once_with(
+        resource_version="4",
+        timeout=3,
+        namespace=DEFAULT_NAMESPACE,
+        label_selector="app=test",
+    )
+    get_resources.assert_not_called()
+    assert inventory._resource_versions == {"VirtualMachine": {DEFAULT_NAMESPACE: "9"}}
+
+
+@pytest.mark.parametrize(
+    "resource_version,status",
+    [
+        (None, None),
+        ("4", 410),
+    ],
+)
+def test_watch_resources_lists_again(
+    mocker, inventory, watch_client, resource_version, status
+):
+    client, resource = watch_client
+
+    def watch(**kwargs):
+        raise ApiException(status=status, reason="Gone")
+
+    resource.watch = mocker.Mock(side_effect=watch)
+    get_resources = mocker.patch.object(
+        inventory, "_get_resources", return_value=[vm("testvm1", "10")]
+    )
+    opts = InventoryOptions()
+
+    result = inventory._watch_resources(
+        client,
+        "kubevirt.io/v1",
+        "VirtualMachine",
+        [vm("testvm1")],
+        resource_version,
+        opts,
+        namespace=DEFAULT_NAMESPACE,
+    )
+
+    assert result == [vm("testvm1", "10")]
+    get_resources.assert_called_once_with(
+        client, "kubevirt.io/v1", "VirtualMachine", opts, namespace=DEFAULT_NAMESPACE
+    )
+    if resource_version is None:
+        resource.watch.assert_not_called()
+
+
+def test_watch_resources_error(mocker, inventory, watch_client):
+    client, resource = watch_client
+
+    def watch(**kwargs):
+        raise ApiException(status=500, reason="Internal Server Error")
+
+    resource.watch = mocker.Mock(side_effect=watch)
+
+    with pytest.raises(
+        KubeVirtInventoryException,
+        match="Error watching VirtualMachine list: 500 Reason: Internal Server Error",
+    ):
+        inventory._watch_resources(
+            client, "kubevirt.io/v1", "VirtualMachine", [], "4", InventoryOptions()
+        )
+
+
+@pytest.mark.parametrize(
+    "code,relisted",
+    [
+        (410, True),
+        (500, False),
+    ],
+)
+def test_watch_resources_error_event(mocker, inventory, watch_client, code, relisted):
+    client, resource = watch_client
+    resource.watch = mocker.Mock(
+        return_value=iter(
+            [
+                {"type": "MODIFIED", "raw_object": vm("testvm1", "5")},
+                {
+                    "type": "ERROR",
+                    "raw_object": {"kind": "Status", "code": code, "message": "error"},
+                },
+            ]
+        )
+    )
+    get_resources = mocker.patch.object(
+        inventory, "_get_resources", return_value=[vm("testvm1", "10")]
+    )
+
+    if relisted:
+        result = inventory._watch_resources(
+            client, "kubevirt.io/v1", "VirtualMachine", [], "4", InventoryOptions()
+        )
+        assert result == [vm("testvm1", "10")]
+    else:
+        with pytest.raises(
+            KubeVirtInventoryException, match="Error watching VirtualMachine list"
+        ):
+            inventory._watch_resources(
+                client, "kubevirt.io/v1", "VirtualMachine", [], "4", InventoryOptions()
+            )
+    assert get_resources.called == relisted
+
+
+def test_refresh_objects_without_resource_versions(mocker, inventory):
+    fetch_objects = mocker.patch.object(inventory, "_fetch_objects")
+    opts = InventoryOptions()
+    client = mocker.Mock()
+
+    inventory._refresh_objects(client, {"namespaces": {}}, opts)
+
+    fetch_objects.assert_called_once_with(client, opts)
+
+
+def test_refresh_objects_per_namespace(mocker, inventory):
+    cached = {
+        "default_hostname": "test",
+        "cluster_domain": "example.com",
+        "namespaces": {
+            DEFAULT_NAMESPACE: {
+                "vms": [vm("testvm1")],
+                "vmis": [vmi("testvm1")],
+                "services": {"testvm1": [SERVICE]},
+            }
+        },
+        "resource_versions": {
+            "VirtualMachine": {DEFAULT_NAMESPACE: "1", "empty": "2"},
+            "VirtualMachineInstance": {DEFAULT_NAMESPACE: "3", "empty": "4"},
+            "Service": {DEFAULT_NAMESPACE: "5"},
+        },
+    }
+
+    def watch_resources(
+        client, api_version, kind, items, resource_version, opts, **kwargs
+    ):
+        if kind == "VirtualMachineInstance" and kwargs["namespace"] == "new":
+            return [vm("testvm4", namespace="new")]
+        return items
+
+    watch_resources = mocker.patch.object(
+        inventory, "_watch_resources", side_effect=watch_resources
+    )
+    mocker.patch.object(
+        inventory,
+        "_get_available_namespaces",
+        return_value=[DEFAULT_NAMESPACE, "empty", "new"],
+    )
+    opts = InventoryOptions()
+
+    result = inventory._refresh_objects(mocker.Mock(), cached, opts)
+
+    assert result["default_hostname"] == "test"
+    assert result["cluster_domain"] == "example.com"
+    assert result["namespaces"] == {
+        DEFAULT_NAMESPACE: {
+            "vms": [vm("testvm1")],
+            "vmis": [vmi("testvm1")],
+            "services": {"testvm1": [SERVICE]},
+        },
+        "new": {
+            "vms": [],
+            "vmis": [vm("testvm4", namespace="new")],
+            "services": {},
+        },
+    }
+    watch_resources.assert_any_call(
+        mocker.ANY,
+        "v1",
+        "Service",
+        [SERVICE],
+        "5",
+        opts,
+        namespace=DEFAULT_NAMESPACE,
+    )
+    watch_resources.assert_any_call(
+        mocker.ANY,
+        opts.api_version,
+        "VirtualMachine",
+        [],
+        "2",
+        opts,
+        namespace="empty",
+        label_selector=None,
+    )
+    watch_resources.assert_any_call(
+        mocker.ANY,
+        opts.api_version,
+        "VirtualMachineInstance",
+        [],
+        None,
+        opts,
+        namespace="new",
+        label_selector=None,
+    )
+
+
+def test_refresh_objects_cluster_wide(mocker, inventory):
+    cached = {
+        "namespaces": {
+            DEFAULT_NAMESPACE: {
+                "vms": [vm("testvm1")],
+                "vmis": [vmi("testvm1")],
+                "services": {"testvm1": [SERVICE]},
+            }
+        },
+        "resource_versions": {
+            "VirtualMachine": {"": "1"},
+            "VirtualMachineInstance": {"": "1"},
+            "Service": {"": "1"},
+        },
+    }
+
+    def watch_resources(
+        client, api_version, kind, items, resource_version, opts, **kwargs
+    ):
+        assert resource_version == "1"
+        if kind == "VirtualMachine":
+            return items + [vm("testvm2", namespace="other")]
+        return items
+
+    mocker.patch.object(inventory, "_watch_resources", side_effect=watch_resources)
+    get_available_namespaces = mocker.patch.object(
+        inventory, "_get_available_namespaces"
+    )
+
+    result = inventory._refresh_objects(
+        mocker.Mock(), cached, InventoryOptions(cluster_wide_list=True)
+    )
+
+    get_available_namespaces.assert_not_called()
+    assert result["namespaces"] == {
+        DEFAULT_NAMESPACE: cached["namespaces"][DEFAULT_NAMESPACE],
+        "other": {
+            "vms": [vm("testvm2", namespace="other")],
+            "vmis": [],
+            "services": {},
+        },
+    }
+
+
+@pytest.mark.parametrize(
+    "status,fallback",
+    [
+        (403, True),
+        (500, False),
+    ],
+)
+def test_refresh_objects_cluster_wide_fallback(mocker, inventory, status, fallback):
+    cached = {
+        "namespaces": {},
+        "resource_versions": {"VirtualMachine": {"": "1"}},
+    }
+
+    def watch_resources(*args, **kwargs):
+        inventory._resource_versions.setdefault("VirtualMachine", {})[""] = "2"
+        exc = ApiException(status=status, reason="Reason")
+        raise KubeVirtInventoryException("Error watching list") from exc
+
+    mocker.patch.object(inventory, "_watch_resources", side_effect=watch_resources)
+    refresh_objects_per_namespace = mocker.patch.object(
+        inventory, "_refresh_objects_per_namespace", return_value={}
+    )
+    opts = InventoryOptions(cluster_wide_list=True)
+
+    if fallback:
+        result = inventory._refresh_objects(mocker.Mock(), cached, opts)
+        refresh_objects_per_namespace.assert_called_once_with(
+            mocker.ANY, {}, cached["resource_versions"], opts
+        )
+        assert result["resource_versions"] == {}
+    else:
+        with pytest.raises(KubeVirtInventoryException, match="Error watching list"):
+            inventory._refresh_objects(mocker.Mock(), cached, opts)
+        refresh_objects_per_namespace.assert_not_called()
+
+
+@pytest.fixture(scope="function")
+def probe_client(mocker, watch_client):
+    client, resource = watch_client
+    current = {"": "10", DEFAULT_NAMESPACE: "10", "other": "11"}
+
+    def watch(resource_version, timeout, namespace="", **kwargs):
+        if int(resource_version) < int(current[namespace]):
+            yield {"type": "MODIFIED", "raw_object": vm("testvm1", current[namespace])}
+        yield {"type": "BOOKMARK", "raw_object": {"metadata": {}}}
+
+    resource.watch = mocker.Mock(side_effect=watch)
+    return client, resource
+
+
+NAMESPACES = {"Namespace": {"": "10"}}
+
+
+@pytest.mark.parametrize(
+    "resource_versions,expired,opts,expected,probes",
+    [
+        (
+            {"VirtualMachine": {DEFAULT_NAMESPACE: "10"}} | NAMESPACES,
+            None,
+            InventoryOptions(),
+            True,
+            2,
+        ),
+        (
+            {
+                "VirtualMachine": {DEFAULT_NAMESPACE: "10", "other": "11"},
+                "VirtualMachineInstance": {DEFAULT_NAMESPACE: "10"},
+            }
+            | NAMESPACES,
+            None,
+            InventoryOptions(),
+            True,
+            4,
+        ),
+        (
+            {"VirtualMachine": {DEFAULT_NAMESPACE: "9"}} | NAMESPACES,
+            None,
+            InventoryOptions(),
+            False,
+            2,
+        ),
+        ({"VirtualMachine": {"": "10"}}, None, InventoryOptions(), True, 1),
+        (
+            {
+                "VirtualMachine": {DEFAULT_NAMESPACE: "10", "other": "9"},
+                "Service": {DEFAULT_NAMESPACE: "10"},
+            }
+            | NAMESPACES,
+            [(DEFAULT_NAMESPACE, "vms"), (DEFAULT_NAMESPACE, "services")],
+            InventoryOptions(),
+            True,
+            3,
+        ),
+        (
+            {"VirtualMachine": {"": "10"}},
+            [("other", "vms")],
+            InventoryOptions(),
+            True,
+            1,
+        ),
+        (
+            {"VirtualMachine": {DEFAULT_NAMESPACE: "10"}},
+            [("other", "vms")],
+            InventoryOptions(),
+            False,
+            0,
+        ),
+        (
+            {"VirtualMachine": {DEFAULT_NAMESPACE: None}},
+            None,
+            InventoryOptions(),
+            False,
+            0,
+        ),
+        ({}, None, InventoryOptions(), False, 0),
+        # Namespaces created since the cache was written are detected
+        (
+            {"VirtualMachine": {DEFAULT_NAMESPACE: "10"}, "Project": {"": "9"}},
+            None,
+            InventoryOptions(),
+            False,
+            2,
+        ),
+        (
+            {"VirtualMachine": {DEFAULT_NAMESPACE: "10"}},
+            None,
+            InventoryOptions(),
+            False,
+            0,
+        ),
+        (
+            {"VirtualMachine": {DEFAULT_NAMESPACE: "10"}},
+            None,
+            InventoryOptions(namespaces=[DEFAULT_NAMESPACE]),
+            True,
+            1,
+        ),
+    ],
+)
+def test_probe_resource_versions(
+    inventory, probe_client, resource_versions, expired, opts, expected, probes
+):
+    client, resource = probe_client
+    opts.watch_timeout = 3
+
+    assert (
+        inventory._probe_resource_versions(client, resource_versions, expired, opts)
+        == expected
+    )
+    assert resource.watch.call_count == probes
+    for call in resource.watch.call_args_list:
+        assert call.kwargs["timeout"] == 3
+        assert call.kwargs["allow_watch_bookmarks"]
+
+
+def test_probe_resource_versions_label_selector(inventory, probe_client):
+    client, resource = probe_client
+    resource_versions = {
+        "VirtualMachine": {DEFAULT_NAMESPACE: "10"},
+        "Service": {DEFAULT_NAMESPACE: "10"},
+    }
+
+    assert inventory._probe_resource_versions(
+        client,
+        resource_versions,
+        None,
+        InventoryOptions(namespaces=[DEFAULT_NAMESPACE], label_selector="app=test"),
+    )
+    assert sorted(
+        str(call.kwargs.get("label_selector")) for call in resource.watch.call_args_list
+    ) == ["None", "app=test"]
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        ApiException(status=410, reason="Gone"),
+        DynamicApiError(ApiException(status=500, reason="error")),
+    ],
+)
+def test_probe_resource_versions_error(mocker, inventory, watch_client, exc):
+    client, resource = watch_client
+    resource.watch = mocker.Mock(side_effect=exc)
+
+    assert not inventory._probe_resource_versions(
+        client, {"VirtualMachine": {"": "10"}}, None, InventoryOptions()
+    )
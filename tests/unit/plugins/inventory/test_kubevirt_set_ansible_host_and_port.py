@@ -9,6 +9,7 @@ __metaclass__ = type
 import pytest
 
 from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    ObjectRecord,
     InventoryOptions,
 )
 
@@ -21,21 +22,16 @@ from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
         InventoryOptions(use_service=True),  # needs service
     ],
 )
-def test_use_ip_address_by_default(mocker, inventory, opts):
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
-
-    hostname = "default-testvm"
+def test_use_ip_address_by_default(inventory, opts):
+    hostvars = {}
     ip_address = "1.1.1.1"
 
-    inventory._set_ansible_host_and_port({}, hostname, ip_address, None, opts)
-
-    set_variable.assert_has_calls(
-        [
-            mocker.call(hostname, "ansible_host", ip_address),
-            mocker.call(hostname, "ansible_port", None),
-        ]
+    inventory._set_ansible_host_and_port(
+        ObjectRecord.from_obj({}), hostvars, ip_address, None, opts
     )
 
+    assert hostvars == {"ansible_host": ip_address, "ansible_port": None}
+
 
 @pytest.mark.parametrize(
     "base_domain",
@@ -44,18 +40,18 @@ def test_use_ip_address_by_default(mocker, inventory, opts):
         False,
     ],
 )
-def test_kube_secondary_dns(mocker, inventory, base_domain):
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
-
-    hostname = "default-testvm"
-    vmi = {
-        "metadata": {"name": "testvm", "namespace": "default"},
-        "status": {"interfaces": [{"name": "awesome"}]},
-    }
+def test_kube_secondary_dns(inventory, base_domain):
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {"name": "testvm", "namespace": "default"},
+            "status": {"interfaces": [{"name": "awesome"}]},
+        }
+    )
 
     inventory._set_ansible_host_and_port(
         vmi,
-        hostname,
+        hostvars,
         "1.1.1.1",
         None,
         InventoryOptions(
@@ -69,26 +65,21 @@ def test_kube_secondary_dns(mocker, inventory, base_domain):
     if base_domain:
         ansible_host += ".example.com"
 
-    set_variable.assert_has_calls(
-        [
-            mocker.call(hostname, "ansible_host", ansible_host),
-            mocker.call(hostname, "ansible_port", None),
-        ]
-    )
-
+    assert hostvars == {"ansible_host": ansible_host, "ansible_port": None}
 
-def test_kube_secondary_dns_precedence_over_service(mocker, inventory):
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
 
-    hostname = "default-testvm"
-    vmi = {
-        "metadata": {"name": "testvm", "namespace": "default"},
-        "status": {"interfaces": [{"name": "awesome"}]},
-    }
+def test_kube_secondary_dns_precedence_over_service(inventory):
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {"name": "testvm", "namespace": "default"},
+            "status": {"interfaces": [{"name": "awesome"}]},
+        }
+    )
 
     inventory._set_ansible_host_and_port(
         vmi,
-        hostname,
+        hostvars,
         "1.1.1.1",
         {"metadata": {"name": "testsvc"}},
         InventoryOptions(
@@ -96,12 +87,10 @@ def test_kube_secondary_dns_precedence_over_service(mocker, inventory):
         ),
     )
 
-    set_variable.assert_has_calls(
-        [
-            mocker.call(hostname, "ansible_host", "awesome.testvm.default.vm"),
-            mocker.call(hostname, "ansible_port", None),
-        ]
-    )
+    assert hostvars == {
+        "ansible_host": "awesome.testvm.default.vm",
+        "ansible_port": None,
+    }
 
 
 @pytest.mark.parametrize(
@@ -160,41 +149,36 @@ def test_kube_secondary_dns_precedence_over_service(mocker, inventory):
         ),
     ],
 )
-def test_service(mocker, inventory, service, expected_host, expected_port):
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
-
-    hostname = "default-testvm"
-    vmi = {
-        "status": {
-            "nodeName": "testnode.example.com",
-        },
-    }
+def test_service(inventory, service, expected_host, expected_port):
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "status": {
+                "nodeName": "testnode.example.com",
+            },
+        }
+    )
 
     inventory._set_ansible_host_and_port(
         vmi,
-        hostname,
+        hostvars,
         "1.1.1.1",
         service,
         InventoryOptions(use_service=True),
     )
 
-    set_variable.assert_has_calls(
-        [
-            mocker.call(hostname, "ansible_host", expected_host),
-            mocker.call(hostname, "ansible_port", expected_port),
-        ]
-    )
-
+    assert hostvars == {"ansible_host": expected_host, "ansible_port": expected_port}
 
-def test_service_append_base_domain(mocker, inventory):
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
 
-    hostname = "default-testvm"
-    vmi = {
-        "status": {
-            "nodeName": "testnode",
-        },
-    }
+def test_service_append_base_domain(inventory):
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "status": {
+                "nodeName": "testnode",
+            },
+        }
+    )
     service = {
         "spec": {
             "type": "NodePort",
@@ -203,7 +187,7 @@ def test_service_append_base_domain(mocker, inventory):
     }
     inventory._set_ansible_host_and_port(
         vmi,
-        hostname,
+        hostvars,
         "1.1.1.1",
         service,
         InventoryOptions(
@@ -211,12 +195,7 @@ def test_service_append_base_domain(mocker, inventory):
         ),
     )
 
-    set_variable.assert_has_calls(
-        [
-            mocker.call(hostname, "ansible_host", "testnode.awesome.com"),
-            mocker.call(hostname, "ansible_port", 25),
-        ]
-    )
+    assert hostvars == {"ansible_host": "testnode.awesome.com", "ansible_port": 25}
 
 
 @pytest.mark.parametrize(
@@ -228,50 +207,39 @@ def test_service_append_base_domain(mocker, inventory):
     ],
 )
 def test_service_fallback(mocker, inventory, host, port):
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
     mocker.patch.object(inventory, "_get_host_from_service", return_value=host)
     mocker.patch.object(inventory, "_get_port_from_service", return_value=port)
 
-    hostname = "default-testvm"
-    vmi = {
-        "status": {
-            "nodeName": "testnode",
-        },
-    }
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "status": {
+                "nodeName": "testnode",
+            },
+        }
+    )
     inventory._set_ansible_host_and_port(
         vmi,
-        hostname,
+        hostvars,
         "1.1.1.1",
         {"something": "something"},
         InventoryOptions(use_service=True),
     )
 
-    set_variable.assert_has_calls(
-        [
-            mocker.call(hostname, "ansible_host", "1.1.1.1"),
-            mocker.call(hostname, "ansible_port", None),
-        ]
-    )
-
+    assert hostvars == {"ansible_host": "1.1.1.1", "ansible_port": None}
 
-def test_no_service_if_network_name(mocker, inventory):
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
 
-    hostname = "default-testvm"
+def test_no_service_if_network_name(inventory):
+    hostvars = {}
     inventory._set_ansible_host_and_port(
         {},
-        hostname,
+        hostvars,
         "1.2.3.4",
         {"something": "something"},
         InventoryOptions(use_service=True, network_name="awesome"),
     )
 
-    set_variable.assert_has_calls(
-        [
-            mocker.call(hostname, "ansible_host", "1.2.3.4"),
-            mocker.call(hostname, "ansible_port", None),
-        ]
-    )
+    assert hostvars == {"ansible_host": "1.2.3.4", "ansible_port": None}
 
 
 @pytest.mark.parametrize(
@@ -282,15 +250,14 @@ def test_no_service_if_network_name(mocker, inventory):
         (InventoryOptions(unset_ansible_port=False), False),
     ],
 )
-def test_unset_ansible_port(mocker, inventory, opts, expected):
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
-
-    hostname = "default-testvm"
+def test_unset_ansible_port(inventory, opts, expected):
+    hostvars = {}
     ip_address = "1.1.1.1"
 
-    inventory._set_ansible_host_and_port({}, hostname, ip_address, None, opts)
+    inventory._set_ansible_host_and_port(
+        ObjectRecord.from_obj({}), hostvars, ip_address, None, opts
+    )
 
-    calls = [mocker.call(hostname, "ansible_host", ip_address)]
-    if expected:
-        calls.append(mocker.call(hostname, "ansible_port", None))
-    set_variable.assert_has_calls(calls)
+    assert hostvars["ansible_host"] == ip_address
+    assert ("ansible_port" in hostvars) == expected
+    assert hostvars.get("ansible_port") is None
@@ -12,6 +12,7 @@ from string import ascii_lowercase
 import pytest
 
 from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    ObjectRecord,
     InventoryOptions,
 )
 
@@ -81,16 +82,15 @@ from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
         ),
     ],
 )
-def test_set_common_vars(inventory, hosts, obj, expected):
+def test_set_common_vars(inventory, obj, expected):
     hostname = "default-testvm"
+    hostvars = {}
     prefix = "".join(choice(ascii_lowercase) for i in range(5))
-    inventory.inventory.add_host(hostname)
-    inventory._set_common_vars(hostname, prefix, obj, InventoryOptions())
+    inventory._set_common_vars(
+        hostname, hostvars, prefix, ObjectRecord.from_obj(obj), InventoryOptions()
+    )
 
-    for key, value in expected.items():
-        prefixed_key = f"{prefix}_{key}"
-        assert prefixed_key in hosts[hostname]
-        assert hosts[hostname][prefixed_key] == value
+    assert hostvars == {f"{prefix}_{key}": value for key, value in expected.items()}
 
 
 @pytest.mark.parametrize(
@@ -101,7 +101,6 @@ def test_set_common_vars(inventory, hosts, obj, expected):
     ],
 )
 def test_set_common_vars_create_groups(mocker, inventory, create_groups):
-    mocker.patch.object(inventory.inventory, "set_variable")
     set_groups_from_labels = mocker.patch.object(inventory, "_set_groups_from_labels")
 
     hostname = "default-testvm"
@@ -109,7 +108,11 @@ def test_set_common_vars_create_groups(mocker, inventory, create_groups):
     opts = InventoryOptions(create_groups=create_groups)
 
     inventory._set_common_vars(
-        hostname, "prefix", {"metadata": {"labels": labels}, "status": {}}, opts
+        hostname,
+        {},
+        "prefix",
+        ObjectRecord.from_obj({"metadata": {"labels": labels}, "status": {}}),
+        opts,
     )
 
     if create_groups:
@@ -118,19 +121,107 @@ def test_set_common_vars_create_groups(mocker, inventory, create_groups):
         set_groups_from_labels.assert_not_called()
 
 
+OBJ = {
+    "metadata": {
+        "annotations": {"testanno": "testval"},
+        "labels": {"testlabel": "testval"},
+        "uid": "48e6ed2c-d8a2-4172-844d-0fe7056aa180",
+    },
+    "spec": {},
+    "status": {"nodeName": "testnode", "guestOSInfo": {"id": "fedora"}},
+}
+
+
+@pytest.mark.parametrize(
+    "opts,expected",
+    [
+        (
+            InventoryOptions(),
+            [
+                "vmi_annotations",
+                "vmi_labels",
+                "vmi_uid",
+                "vmi_node_name",
+                "vmi_guest_os_info",
+            ],
+        ),
+        (
+            InventoryOptions(hostvars_include=["vmi_node_name", "vmi_guest_*"]),
+            ["vmi_node_name", "vmi_guest_os_info"],
+        ),
+        (
+            InventoryOptions(hostvars_exclude=["vmi_node_name", "*_labels"]),
+            ["vmi_annotations", "vmi_uid", "vmi_guest_os_info"],
+        ),
+        (
+            InventoryOptions(
+                hostvars_include=["vmi_node_name", "vmi_guest_*"],
+                hostvars_exclude=["vmi_node_name"],
+            ),
+            ["vmi_guest_os_info"],
+        ),
+        (
+            InventoryOptions(hostvars_annotations=False),
+            ["vmi_labels", "vmi_uid", "vmi_node_name", "vmi_guest_os_info"],
+        ),
+        (
+            InventoryOptions(hostvars_include=["vm_*"]),
+            [],
+        ),
+    ],
+)
+def test_set_common_vars_filtered(inventory, opts, expected):
+    hostvars = {}
+    inventory._set_common_vars(
+        "default-testvm", hostvars, "vmi", ObjectRecord.from_obj(OBJ), opts
+    )
+
+    assert list(hostvars) == expected
+
+
+def test_set_common_vars_filtered_create_groups(mocker, inventory):
+    set_groups_from_labels = mocker.patch.object(inventory, "_set_groups_from_labels")
+
+    hostvars = {}
+    inventory._set_common_vars(
+        "default-testvm",
+        hostvars,
+        "vmi",
+        ObjectRecord.from_obj(OBJ),
+        InventoryOptions(create_groups=True, hostvars_exclude=["vmi_labels"]),
+    )
+
+    assert "vmi_labels" not in hostvars
+    set_groups_from_labels.assert_called_once_with(
+        "default-testvm", OBJ["metadata"]["labels"]
+    )
+
+
+def test_get_hostvar_name_once_per_field(mocker, inventory):
+    format_var_name = mocker.spy(inventory, "_format_var_name")
+    opts = InventoryOptions(hostvars_exclude=["vm_node_name"])
+
+    for _ in range(2):
+        assert inventory._get_hostvar_name("vmi", "nodeName", opts) == "vmi_node_name"
+        assert inventory._get_hostvar_name("vm", "nodeName", opts) is None
+
+    assert format_var_name.call_count == 2
+
+
 def test_called_by_set_vars_from(mocker, inventory):
     hostname = "default-testvm"
+    hostvars = {}
     opts = InventoryOptions()
-    obj = {"status": {}}
+    obj = ObjectRecord.from_obj({"status": {}})
 
     set_common_vars = mocker.patch.object(inventory, "_set_common_vars")
 
-    inventory._set_vars_from_vm(hostname, obj, opts)
-    inventory._set_vars_from_vmi(hostname, obj, {}, opts)
+    inventory._set_vars_from_vm(hostname, hostvars, obj, opts)
+    inventory._set_vars_from_vmi(hostname, hostvars, obj, {}, opts)
 
     set_common_vars.assert_has_calls(
         [
-            mocker.call(hostname, "vm", obj, opts),
-            mocker.call(hostname, "vmi", obj, opts),
+            mocker.call(hostname, hostvars, "vm", obj, opts),
+            mocker.call(hostname, hostvars, "vmi", obj, opts),
         ]
     )
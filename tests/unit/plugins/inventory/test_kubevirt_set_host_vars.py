@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from ansible.inventory.data import InventoryData
+from ansible.utils.vars import combine_vars
+
+from ansible_collections.kubevirt.core.tests.unit.plugins.inventory.constants import (
+    DEFAULT_NAMESPACE,
+)
+
+
+def test_set_host_vars(inventory):
+    hostname = f"{DEFAULT_NAMESPACE}-testvm"
+    inventory.inventory = InventoryData()
+    inventory.inventory.add_host(hostname)
+
+    inventory._set_host_vars(
+        hostname, {"vm_uid": "testuid", "vm_labels": {"app": "test"}}
+    )
+
+    hostvars = inventory.inventory.get_host(hostname).get_vars()
+    assert hostvars["vm_uid"] == "testuid"
+    assert hostvars["vm_labels"] == {"app": "test"}
+
+
+def test_set_host_vars_merges_existing(inventory):
+    hostname = f"{DEFAULT_NAMESPACE}-testvm"
+    inventory.inventory = InventoryData()
+    inventory.inventory.add_host(hostname)
+    inventory.inventory.set_variable(hostname, "ansible_user", "testuser")
+    inventory.inventory.set_variable(hostname, "vm_labels", {"existing": "label"})
+
+    inventory._set_host_vars(
+        hostname, {"vm_uid": "testuid", "vm_labels": {"app": "test"}}
+    )
+
+    hostvars = inventory.inventory.get_host(hostname).get_vars()
+    assert hostvars["ansible_user"] == "testuser"
+    assert hostvars["vm_uid"] == "testuid"
+    assert hostvars["vm_labels"] == (
+        combine_vars(
+            {"vm_labels": {"existing": "label"}}, {"vm_labels": {"app": "test"}}
+        )["vm_labels"]
+    )
+
+
+def test_set_host_vars_uses_inventory(mocker, inventory):
+    hostname = f"{DEFAULT_NAMESPACE}-testvm"
+    inventory.inventory = InventoryData()
+    inventory.inventory.add_host(hostname)
+    set_variable = mocker.spy(inventory.inventory, "set_variable")
+
+    inventory._set_host_vars(hostname, {"vm_uid": "testuid", "vm_name": "testvm"})
+
+    set_variable.assert_has_calls(
+        [
+            mocker.call(hostname, "vm_uid", "testuid"),
+            mocker.call(hostname, "vm_name", "testvm"),
+        ]
+    )
@@ -9,6 +9,7 @@ __metaclass__ = type
 import pytest
 
 from ansible_collections.kubevirt.core.plugins.inventory.kubevirt import (
+    ObjectRecord,
     InventoryOptions,
     LABEL_KUBEVIRT_IO_DOMAIN,
 )
@@ -20,8 +21,8 @@ def test_ignore_vmi_without_interface(mocker, inventory):
         inventory, "_set_ansible_host_and_port"
     )
 
-    vmi = {"status": {}}
-    inventory._set_vars_from_vmi("default-testvm", vmi, {}, InventoryOptions())
+    vmi = ObjectRecord.from_obj({"status": {}})
+    inventory._set_vars_from_vmi("default-testvm", {}, vmi, {}, InventoryOptions())
 
     set_ansible_host_and_port.assert_not_called()
 
@@ -33,15 +34,20 @@ def test_use_first_interface_by_default(mocker, inventory):
     )
 
     hostname = "default-testvm"
-    vmi = {
-        "metadata": {},
-        "status": {"interfaces": [{"ipAddress": "1.1.1.1"}, {"ipAddress": "2.2.2.2"}]},
-    }
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {},
+            "status": {
+                "interfaces": [{"ipAddress": "1.1.1.1"}, {"ipAddress": "2.2.2.2"}]
+            },
+        }
+    )
     opts = InventoryOptions()
-    inventory._set_vars_from_vmi(hostname, vmi, {}, opts)
+    inventory._set_vars_from_vmi(hostname, hostvars, vmi, {}, opts)
 
     set_ansible_host_and_port.assert_called_once_with(
-        vmi, hostname, "1.1.1.1", None, opts
+        vmi, hostvars, "1.1.1.1", None, opts
     )
 
 
@@ -52,20 +58,23 @@ def test_use_named_interface(mocker, inventory):
     )
 
     hostname = "default-testvm"
-    vmi = {
-        "metadata": {},
-        "status": {
-            "interfaces": [
-                {"name": "first", "ipAddress": "1.1.1.1"},
-                {"name": "second", "ipAddress": "2.2.2.2"},
-            ]
-        },
-    }
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {},
+            "status": {
+                "interfaces": [
+                    {"name": "first", "ipAddress": "1.1.1.1"},
+                    {"name": "second", "ipAddress": "2.2.2.2"},
+                ]
+            },
+        }
+    )
     opts = InventoryOptions(network_name="second")
-    inventory._set_vars_from_vmi(hostname, vmi, {}, opts)
+    inventory._set_vars_from_vmi(hostname, hostvars, vmi, {}, opts)
 
     set_ansible_host_and_port.assert_called_once_with(
-        vmi, hostname, "2.2.2.2", None, opts
+        vmi, hostvars, "2.2.2.2", None, opts
     )
 
 
@@ -75,12 +84,14 @@ def test_ignore_vmi_without_named_interface(mocker, inventory):
         inventory, "_set_ansible_host_and_port"
     )
 
-    vmi = {
-        "metadata": {},
-        "status": {"interfaces": [{"name": "somename", "ipAddress": "1.1.1.1"}]},
-    }
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {},
+            "status": {"interfaces": [{"name": "somename", "ipAddress": "1.1.1.1"}]},
+        }
+    )
     inventory._set_vars_from_vmi(
-        "default-testvm", vmi, {}, InventoryOptions(network_name="awesome")
+        "default-testvm", {}, vmi, {}, InventoryOptions(network_name="awesome")
     )
 
     set_ansible_host_and_port.assert_not_called()
@@ -104,20 +115,20 @@ def test_set_connection_if_windows(mocker, inventory, default_win_ansible_connec
     mocker.patch.object(
         inventory.inventory,
         "get_host",
-        return_value=mocker.Mock(get_vars=mocker.Mock(return_value={})),
+        return_value=mocker.Mock(vars={}),
     )
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
 
     hostname = "default-testvm"
-    vmi = {"metadata": {}, "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]}}
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {"metadata": {}, "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]}}
+    )
     opts = InventoryOptions(
         default_win_ansible_connection=default_win_ansible_connection
     )
-    inventory._set_vars_from_vmi(hostname, vmi, {}, opts)
+    inventory._set_vars_from_vmi(hostname, hostvars, vmi, {}, opts)
 
-    set_variable.assert_called_once_with(
-        hostname, "ansible_connection", default_win_ansible_connection
-    )
+    assert hostvars == {"ansible_connection": default_win_ansible_connection}
 
 
 @pytest.mark.parametrize(
@@ -143,18 +154,18 @@ def test_respect_existing_ansible_connection(
         inventory.inventory,
         "get_host",
         return_value=mocker.Mock(
-            get_vars=mocker.Mock(
-                return_value={"ansible_connection": existing_ansible_connection}
-            )
+            vars={"ansible_connection": existing_ansible_connection}
         ),
     )
-    set_variable = mocker.patch.object(inventory.inventory, "set_variable")
 
     hostname = "default-testvm"
-    vmi = {
-        "metadata": {"labels": {LABEL_KUBEVIRT_IO_DOMAIN: "testdomain"}},
-        "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]},
-    }
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {"labels": {LABEL_KUBEVIRT_IO_DOMAIN: "testdomain"}},
+            "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]},
+        }
+    )
     service = {
         "metadata": {"name": "testsvc"},
         "spec": {"ports": [{"targetPort": target_port}]},
@@ -162,11 +173,13 @@ def test_respect_existing_ansible_connection(
     opts = InventoryOptions(
         default_win_ansible_connection=default_win_ansible_connection
     )
-    inventory._set_vars_from_vmi(hostname, vmi, {"testdomain": [service]}, opts)
+    inventory._set_vars_from_vmi(
+        hostname, hostvars, vmi, {("testdomain", target_port): service}, opts
+    )
 
-    set_variable.assert_not_called()
+    assert "ansible_connection" not in hostvars
     set_ansible_host_and_port.assert_called_once_with(
-        vmi, hostname, "1.1.1.1", service, opts
+        vmi, hostvars, "1.1.1.1", service, opts
     )
 
 
@@ -184,26 +197,31 @@ def test_service_lookup(mocker, inventory, is_windows, target_port):
     mocker.patch.object(
         inventory.inventory,
         "get_host",
-        return_value=mocker.Mock(get_vars=mocker.Mock(return_value={})),
+        return_value=mocker.Mock(vars={}),
     )
     set_ansible_host_and_port = mocker.patch.object(
         inventory, "_set_ansible_host_and_port"
     )
 
     hostname = "default-testvm"
-    vmi = {
-        "metadata": {"labels": {LABEL_KUBEVIRT_IO_DOMAIN: "testdomain"}},
-        "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]},
-    }
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {"labels": {LABEL_KUBEVIRT_IO_DOMAIN: "testdomain"}},
+            "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]},
+        }
+    )
     opts = InventoryOptions()
     service = {
         "metadata": {"name": "testsvc"},
         "spec": {"ports": [{"targetPort": target_port}]},
     }
-    inventory._set_vars_from_vmi(hostname, vmi, {"testdomain": [service]}, opts)
+    inventory._set_vars_from_vmi(
+        hostname, hostvars, vmi, {("testdomain", target_port): service}, opts
+    )
 
     set_ansible_host_and_port.assert_called_once_with(
-        vmi, hostname, "1.1.1.1", service, opts
+        vmi, hostvars, "1.1.1.1", service, opts
     )
 
 
@@ -223,26 +241,31 @@ def test_service_ignore_not_matching_connection(
     mocker.patch.object(
         inventory.inventory,
         "get_host",
-        return_value=mocker.Mock(get_vars=mocker.Mock(return_value={})),
+        return_value=mocker.Mock(vars={}),
     )
     set_ansible_host_and_port = mocker.patch.object(
         inventory, "_set_ansible_host_and_port"
     )
 
     hostname = "default-testvm"
-    vmi = {
-        "metadata": {"labels": {LABEL_KUBEVIRT_IO_DOMAIN: "testdomain"}},
-        "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]},
-    }
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {"labels": {LABEL_KUBEVIRT_IO_DOMAIN: "testdomain"}},
+            "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]},
+        }
+    )
     opts = InventoryOptions()
     service = {
         "metadata": {"name": "testsvc"},
         "spec": {"ports": [{"targetPort": target_port}]},
     }
-    inventory._set_vars_from_vmi(hostname, vmi, {"testdomain": [service]}, opts)
+    inventory._set_vars_from_vmi(
+        hostname, hostvars, vmi, {("testdomain", target_port): service}, opts
+    )
 
     set_ansible_host_and_port.assert_called_once_with(
-        vmi, hostname, "1.1.1.1", None, opts
+        vmi, hostvars, "1.1.1.1", None, opts
     )
 
 
@@ -252,17 +275,20 @@ def test_service_prefer_winrm_https(mocker, inventory):
     mocker.patch.object(
         inventory.inventory,
         "get_host",
-        return_value=mocker.Mock(get_vars=mocker.Mock(return_value={})),
+        return_value=mocker.Mock(vars={}),
     )
     set_ansible_host_and_port = mocker.patch.object(
         inventory, "_set_ansible_host_and_port"
     )
 
     hostname = "default-testvm"
-    vmi = {
-        "metadata": {"labels": {LABEL_KUBEVIRT_IO_DOMAIN: "testdomain"}},
-        "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]},
-    }
+    hostvars = {}
+    vmi = ObjectRecord.from_obj(
+        {
+            "metadata": {"labels": {LABEL_KUBEVIRT_IO_DOMAIN: "testdomain"}},
+            "status": {"interfaces": [{"ipAddress": "1.1.1.1"}]},
+        }
+    )
     opts = InventoryOptions()
     service_winrm_http = {
         "metadata": {"name": "svc_winrm_http"},
@@ -273,9 +299,16 @@ def test_service_prefer_winrm_https(mocker, inventory):
         "spec": {"ports": [{"targetPort": 5986}]},
     }
     inventory._set_vars_from_vmi(
-        hostname, vmi, {"testdomain": [service_winrm_http, service_winrm_https]}, opts
+        hostname,
+        hostvars,
+        vmi,
+        {
+            ("testdomain", 5985): service_winrm_http,
+            ("testdomain", 5986): service_winrm_https,
+        },
+        opts,
     )
 
     set_ansible_host_and_port.assert_called_once_with(
-        vmi, hostname, "1.1.1.1", service_winrm_https, opts
+        vmi, hostvars, "1.1.1.1", service_winrm_https, opts
     )
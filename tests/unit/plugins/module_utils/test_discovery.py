@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from json import dump
+from time import time
+
+import pytest
+
+from kubernetes.dynamic.exceptions import ResourceNotFoundError
+
+from ansible_collections.kubevirt.core.plugins.module_utils.discovery import (
+    DiscoveryCache,
+)
+
+
+@pytest.fixture
+def client(mocker):
+    def get(api_version, kind):
+        if kind == "DNS":
+            raise ResourceNotFoundError("No matches found")
+        return f"{api_version}/{kind}"
+
+    client = mocker.Mock()
+    client.resources.get = mocker.Mock(side_effect=get)
+    return client
+
+
+def test_discovery_cache_remembers_missing_resources(tmp_path, client):
+    cache = DiscoveryCache("https://test", 3600, str(tmp_path))
+    assert cache.expired
+
+    cache.refresh(client)
+    client.resources.invalidate_cache.assert_not_called()
+    assert cache.get(client, "kubevirt.io/v1", "VirtualMachine") == (
+        "kubevirt.io/v1/VirtualMachine"
+    )
+    with pytest.raises(ResourceNotFoundError):
+        cache.get(client, "config.openshift.io/v1", "DNS")
+    cache.save()
+
+    cache = DiscoveryCache("https://test", 3600, str(tmp_path))
+    assert not cache.expired
+    assert cache.missing == {"config.openshift.io/v1/DNS"}
+    with pytest.raises(ResourceNotFoundError):
+        cache.get(client, "config.openshift.io/v1", "DNS")
+    assert client.resources.get.call_count == 2
+
+
+def test_discovery_cache_per_host(tmp_path, client):
+    cache = DiscoveryCache("https://test1", 3600, str(tmp_path))
+    cache.refresh(client)
+    cache.save()
+
+    assert DiscoveryCache("https://test2", 3600, str(tmp_path)).expired
+
+
+@pytest.mark.parametrize(
+    "timeout,age,expired",
+    [
+        (3600, 60, False),
+        (3600, 7200, True),
+        (0, 7200, False),
+    ],
+)
+def test_discovery_cache_timeout(tmp_path, timeout, age, expired):
+    path = DiscoveryCache("https://test", timeout, str(tmp_path)).path
+    with open(path, "w") as f:
+        dump({"timestamp": time() - age, "missing": ["v1/Test"]}, f)
+
+    cache = DiscoveryCache("https://test", timeout, str(tmp_path))
+
+    assert cache.expired == expired
+    assert cache.missing == (set() if expired else {"v1/Test"})
+
+
+@pytest.mark.parametrize(
+    "state,invalidated",
+    [
+        (None, False),
+        ({"timestamp": time() - 7200, "missing": []}, True),
+    ],
+)
+def test_discovery_cache_refresh(tmp_path, client, state, invalidated):
+    path = DiscoveryCache("https://test", 3600, str(tmp_path)).path
+    if state is not None:
+        with open(path, "w") as f:
+            dump(state, f)
+
+    cache = DiscoveryCache("https://test", 3600, str(tmp_path))
+    assert cache.expired
+    cache.refresh(client)
+    assert client.resources.invalidate_cache.called == invalidated
+    assert not cache.expired
+
+    # Resources reported as not found later always invalidate the discovery
+    client.resources.invalidate_cache.reset_mock()
+    cache.refresh(client)
+    client.resources.invalidate_cache.assert_called_once()
+
+
+@pytest.mark.parametrize("content", ["not json", "[]", '{"timestamp": null}'])
+def test_discovery_cache_invalid(tmp_path, content):
+    path = DiscoveryCache("https://test", 3600, str(tmp_path)).path
+    with open(path, "w") as f:
+        f.write(content)
+
+    assert DiscoveryCache("https://test", 3600, str(tmp_path)).expired
+
+
+def test_discovery_cache_save_unchanged(tmp_path):
+    cache = DiscoveryCache("https://test", 3600, str(tmp_path))
+
+    cache.save()
+
+    assert list(tmp_path.iterdir()) == []
@@ -0,0 +1,48 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+import pytest
+
+from ansible_collections.kubevirt.core.plugins.module_utils.info import (
+    ResourceVersionClient,
+)
+
+
+@pytest.mark.parametrize(
+    "params,expected",
+    [
+        (
+            {"namespace": "default"},
+            {
+                "namespace": "default",
+                "resource_version": "0",
+                "resource_version_match": "NotOlderThan",
+            },
+        ),
+        (
+            {"name": "testvm", "namespace": "default"},
+            {"name": "testvm", "namespace": "default", "resource_version": "0"},
+        ),
+    ],
+)
+def test_resource_version_client_get(mocker, params, expected):
+    client = mocker.Mock()
+    wrapped = ResourceVersionClient(client, "0")
+
+    assert wrapped.get("resource", **params) is client.get.return_value
+    client.get.assert_called_once_with("resource", **expected)
+
+
+def test_resource_version_client_delegates(mocker):
+    client = mocker.Mock()
+    wrapped = ResourceVersionClient(client, "0")
+
+    assert wrapped.resource("VirtualMachine", "kubevirt.io/v1") is (
+        client.resource.return_value
+    )
+    assert wrapped.configuration is client.configuration
@@ -0,0 +1,358 @@
+# -*- coding: utf-8 -*-
+# Copyright 2026 Red Hat, Inc.
+# Apache License 2.0 (see LICENSE or http://www.apache.org/licenses/LICENSE-2.0)
+
+from __future__ import absolute_import, division, print_function
+
+__metaclass__ = type
+
+from json import dumps
+from threading import Event
+from time import sleep
+
+import pytest
+
+from kubernetes.client.rest import ApiException
+from kubernetes.dynamic.exceptions import ResourceNotFoundError
+from urllib3.exceptions import MaxRetryError, ProtocolError, ReadTimeoutError
+
+from ansible_collections.kubevirt.core.plugins.module_utils import snapshot
+from ansible_collections.kubevirt.core.plugins.module_utils.snapshot import (
+    SNAPSHOT_FORMAT_VERSION,
+    SnapshotStore,
+    find_in_snapshot,
+    match_labels,
+    parse_label_selector,
+    read_snapshot,
+    write_snapshot,
+)
+
+
+def obj(name, namespace="default", labels=None, uid=None):
+    return {
+        "metadata": {
+            "name": name,
+            "namespace": namespace,
+            "uid": uid or f"{namespace}-{name}",
+            "labels": labels or {},
+        }
+    }
+
+
+def test_store_replace_and_apply():
+    store = SnapshotStore(["VirtualMachine", "Service"])
+    assert not store.is_synced()
+
+    store.replace("VirtualMachine", [obj("b"), obj("a")])
+    store.replace("Service", [])
+    assert store.is_synced()
+
+    store.apply("VirtualMachine", "ADDED", obj("c", "aaa"))
+    store.apply("VirtualMachine", "DELETED", obj("b"))
+    store.apply("VirtualMachine", "BOOKMARK", obj("d"))
+
+    result = store.snapshot(host="https://test")
+    assert result["version"] == SNAPSHOT_FORMAT_VERSION
+    assert result["host"] == "https://test"
+    assert result["objects"] == {
+        "VirtualMachine": [obj("c", "aaa"), obj("a")],
+        "Service": [],
+    }
+
+
+def test_write_and_read_snapshot(tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    data = SnapshotStore(["VirtualMachine"]).snapshot(host="https://test")
+
+    write_snapshot(path, data)
+
+    assert read_snapshot(path, 60) == data
+    assert list(tmp_path.iterdir()) == [tmp_path / "snapshot.json"]
+
+
+@pytest.mark.parametrize(
+    "content",
+    [
+        None,
+        "not json",
+        dumps([]),
+        dumps({"version": SNAPSHOT_FORMAT_VERSION + 1, "timestamp": 0}),
+        dumps({"version": SNAPSHOT_FORMAT_VERSION, "timestamp": 0}),
+    ],
+)
+def test_read_snapshot_invalid(tmp_path, content):
+    path = tmp_path / "snapshot.json"
+    if content is not None:
+        path.write_text(content)
+
+    assert read_snapshot(str(path), 60) is None
+
+
+@pytest.mark.parametrize(
+    "selector,labels,expected",
+    [
+        (None, {}, True),
+        ("app=test", {"app": "test"}, True),
+        ("app==test", {"app": "other"}, False),
+        ("app!=test", {}, True),
+        ("app!=test", {"app": "test"}, False),
+        ("app", {"app": "test"}, True),
+        ("!app", {"app": "test"}, False),
+        ("app in (a, b)", {"app": "b"}, True),
+        ("app in (a, b),env", {"app": "b"}, False),
+        ("app notin (a,b)", {"app": "c"}, True),
+        ("kubevirt.io/domain=test,app", {"kubevirt.io/domain": "test"}, False),
+    ],
+)
+def test_match_labels(selector, labels, expected):
+    assert match_labels(parse_label_selector(selector), labels) == expected
+
+
+@pytest.mark.parametrize("selector", ["app=(test", "!app=test", "app >= 1"])
+def test_parse_label_selector_invalid(selector):
+    assert parse_label_selector(selector) is None
+
+
+SNAPSHOT = {
+    "host": "https://test:6443",
+    "api_version": "kubevirt.io/v1",
+    "label_selector": None,
+    "objects": {
+        "VirtualMachine": [
+            obj("testvm1", labels={"app": "test"}),
+            obj("testvm2", "other"),
+        ],
+        "Service": [obj("testsvc")],
+    },
+}
+
+
+@pytest.mark.parametrize(
+    "snapshot_data,kind,api_version,kwargs,expected",
+    [
+        (
+            SNAPSHOT,
+            "VirtualMachine",
+            "kubevirt.io/v1",
+            {},
+            SNAPSHOT["objects"]["VirtualMachine"],
+        ),
+        (
+            SNAPSHOT,
+            "VirtualMachine",
+            "kubevirt.io/v1",
+            {"name": "testvm2", "namespace": "other"},
+            [obj("testvm2", "other")],
+        ),
+        (
+            SNAPSHOT,
+            "VirtualMachine",
+            "kubevirt.io/v1",
+            {"label_selectors": ["app=test"]},
+            [obj("testvm1", labels={"app": "test"})],
+        ),
+        (SNAPSHOT, "Service", "v1", {}, [obj("testsvc")]),
+        (SNAPSHOT, "VirtualMachineInstance", "kubevirt.io/v1", {}, None),
+        (SNAPSHOT, "VirtualMachine", "kubevirt.io/v1alpha3", {}, None),
+        (
+            SNAPSHOT,
+            "VirtualMachine",
+            "kubevirt.io/v1",
+            {"field_selectors": ["status.phase=Running"]},
+            None,
+        ),
+        (
+            SNAPSHOT | {"label_selector": "app=test"},
+            "VirtualMachine",
+            "kubevirt.io/v1",
+            {},
+            None,
+        ),
+        (
+            SNAPSHOT | {"label_selector": "app=test"},
+            "VirtualMachine",
+            "kubevirt.io/v1",
+            {"label_selectors": ["app=test"]},
+            [obj("testvm1", labels={"app": "test"})],
+        ),
+        (
+            SNAPSHOT | {"label_selector": "app=test"},
+            "Service",
+            "v1",
+            {},
+            [obj("testsvc")],
+        ),
+        (
+            SNAPSHOT,
+            "VirtualMachine",
+            "kubevirt.io/v1",
+            {"host": "https://test:6443/"},
+            SNAPSHOT["objects"]["VirtualMachine"],
+        ),
+        (SNAPSHOT, "VirtualMachine", "kubevirt.io/v1", {"host": "https://other"}, None),
+        (SNAPSHOT, "Service", "v1", {"host": "https://other"}, None),
+    ],
+)
+def test_find_in_snapshot(snapshot_data, kind, api_version, kwargs, expected):
+    assert find_in_snapshot(snapshot_data, kind, api_version, **kwargs) == expected
+
+
+def test_sync_kind_relists_on_gone(mocker):
+    store = SnapshotStore(["VirtualMachine"])
+    stop = Event()
+
+    def list_response(items, resource_version):
+        response = mocker.Mock()
+        response.data = dumps(
+            {"metadata": {"resourceVersion": resource_version}, "items": items}
+        ).encode()
+        return response
+
+    watch_calls = []
+
+    def watch(**kwargs):
+        watch_calls.append(kwargs)
+        if len(watch_calls) == 1:
+            raise ApiException(status=410)
+        added = obj("testvm2")
+        added["metadata"]["resourceVersion"] = "3"
+        yield {"type": "ADDED", "raw_object": added}
+        stop.set()
+
+    resource = mocker.Mock()
+    resource.get.side_effect = [
+        list_response([obj("testvm1")], "1"),
+        list_response([], "2"),
+    ]
+    resource.watch.side_effect = watch
+    client = mocker.Mock()
+    client.resources.get.return_value = resource
+
+    snapshot._sync_kind(
+        client, store, "kubevirt.io/v1", "VirtualMachine", "app=test", 1, stop
+    )
+
+    assert [call["resource_version"] for call in watch_calls] == ["1", "2"]
+    assert all(call["label_selector"] == "app=test" for call in watch_calls)
+    assert [
+        vm["metadata"]["name"] for vm in store.snapshot()["objects"]["VirtualMachine"]
+    ] == ["testvm2"]
+
+
+@pytest.mark.parametrize(
+    "exc",
+    [
+        ProtocolError("Connection broken"),
+        ReadTimeoutError(None, None, "Read timed out"),
+        MaxRetryError(None, "/apis", "Connection refused"),
+        ResourceNotFoundError("No matches found"),
+    ],
+)
+def test_sync_kind_retries_on_error(mocker, capsys, exc):
+    store = SnapshotStore(["VirtualMachine"])
+    stop = Event()
+
+    response = mocker.Mock()
+    response.data = dumps(
+        {"metadata": {"resourceVersion": "1"}, "items": [obj("testvm1")]}
+    ).encode()
+
+    def watch(**kwargs):
+        if resource.watch.call_count == 1:
+            raise exc
+        stop.set()
+        yield from ()
+
+    resource = mocker.Mock()
+    resource.get.return_value = response
+    resource.watch.side_effect = watch
+    client = mocker.Mock()
+    client.resources.get.return_value = resource
+
+    snapshot._sync_kind(
+        client, store, "kubevirt.io/v1", "VirtualMachine", None, 0, stop
+    )
+
+    assert resource.get.call_count == 2
+    assert "Error watching VirtualMachine list" in capsys.readouterr().err
+
+
+def test_sync_kind_retries_discovery(mocker):
+    store = SnapshotStore(["VirtualMachine"])
+    stop = Event()
+
+    response = mocker.Mock()
+    response.data = dumps({"metadata": {"resourceVersion": "1"}, "items": []}).encode()
+
+    def watch(**kwargs):
+        stop.set()
+        yield from ()
+
+    resource = mocker.Mock()
+    resource.get.return_value = response
+    resource.watch.side_effect = watch
+    client = mocker.Mock()
+    client.resources.get.side_effect = [ResourceNotFoundError("Not found"), resource]
+
+    snapshot._sync_kind(
+        client, store, "kubevirt.io/v1", "VirtualMachine", None, 0, stop
+    )
+
+    assert client.resources.get.call_count == 2
+    assert store.is_synced()
+
+
+def test_run_writes_snapshot(mocker, tmp_path):
+    path = str(tmp_path / "snapshot.json")
+    stop = Event()
+    writes = []
+
+    def sync_kind(client, store, api_version, kind, *args):
+        store.replace(kind, [obj(kind.lower())])
+        while not stop.is_set():
+            sleep(0.01)
+
+    def write(output, data):
+        writes.append(data)
+        write_snapshot(output, data)
+
+    def wait(timeout):
+        # Stop after the snapshot was written twice without any changes
+        if len(writes) == 2:
+            stop.set()
+        else:
+            sleep(0.01)
+        return stop.is_set()
+
+    mocker.patch.object(snapshot, "_sync_kind", side_effect=sync_kind)
+    mocker.patch.object(snapshot, "_get_cluster_domain", return_value="example.com")
+    mocker.patch.object(snapshot, "write_snapshot", side_effect=write)
+    client = mocker.Mock()
+    client.configuration.host = "https://test"
+    mocker.patch.object(stop, "wait", side_effect=wait)
+
+    snapshot.run(client, path, label_selector="app=test", stop=stop)
+
+    assert writes[0]["objects"] == writes[1]["objects"]
+    assert writes[0]["timestamp"] <= writes[1]["timestamp"]
+    result = read_snapshot(path, 60)
+    assert result["host"] == "https://test"
+    assert result["label_selector"] == "app=test"
+    assert result["cluster_domain"] == "example.com"
+    assert result["objects"]["Service"] == [obj("service")]
+    assert stop.is_set()
+
+
+def test_run_stops_if_sync_stopped(mocker, tmp_path):
+    path = tmp_path / "snapshot.json"
+    stop = Event()
+
+    mocker.patch.object(snapshot, "_sync_kind")
+    mocker.patch.object(snapshot, "_get_cluster_domain", return_value=None)
+    mocker.patch.object(stop, "wait", side_effect=lambda timeout: sleep(0.01))
+
+    with pytest.raises(RuntimeError, match="stopped unexpectedly"):
+        snapshot.run(mocker.Mock(), str(path), stop=stop)
+
+    assert not path.exists()
+    assert stop.is_set()
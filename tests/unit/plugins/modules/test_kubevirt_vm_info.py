@@ -18,6 +18,10 @@ from ansible_collections.kubevirt.core.plugins.modules import (
 from ansible_collections.kubevirt.core.plugins.module_utils import (
     info,
 )
+from ansible_collections.kubevirt.core.plugins.module_utils.snapshot import (
+    SnapshotStore,
+    write_snapshot,
+)
 from ansible_collections.kubevirt.core.tests.unit.utils.ansible_module_mock import (
     AnsibleExitJson,
     AnsibleFailJson,
@@ -127,3 +131,96 @@ def test_module(mocker, module_args, find_args):
         kubevirt_vm_info.main()
 
     find.assert_called_once_with(**find_args)
+
+
+@pytest.mark.parametrize(
+    "module_args,params",
+    [
+        (
+            {"resource_version": "0"},
+            {"resource_version": "0", "resource_version_match": "NotOlderThan"},
+        ),
+        (
+            {"resource_version": "0", "name": "testvm", "namespace": "default"},
+            {"name": "testvm", "namespace": "default", "resource_version": "0"},
+        ),
+        ({}, {}),
+    ],
+)
+def test_module_resource_version(mocker, module_args, params):
+    mocker.patch.object(AnsibleModule, "exit_json", exit_json)
+    client = mocker.patch.object(info, "get_api_client").return_value
+    client.get.return_value.to_dict.return_value = {
+        "kind": "VirtualMachineList",
+        "items": [{"metadata": {"name": "testvm"}}],
+    }
+
+    with pytest.raises(AnsibleExitJson) as exc_info, patch_module_args(module_args):
+        kubevirt_vm_info.main()
+
+    client.get.assert_called_once_with(client.resource.return_value, **params)
+    assert exc_info.value.args[0]["resources"] == [{"metadata": {"name": "testvm"}}]
+
+
+SNAPSHOT_VM = {
+    "metadata": {
+        "name": "testvm",
+        "namespace": "default",
+        "uid": "testvm-uid",
+        "managedFields": [],
+    }
+}
+
+
+@pytest.mark.parametrize(
+    "module_args,use_snapshot",
+    [
+        ({"name": "testvm", "namespace": "default"}, True),
+        ({"wait": True, "running": True}, False),
+        ({"field_selectors": "app=test"}, False),
+        ({"snapshot_max_age": -1}, False),
+        ({"name": "testvm", "namespace": "default", "host": "https://other"}, False),
+    ],
+)
+def test_module_snapshot(mocker, tmp_path, module_args, use_snapshot):
+    snapshot_file = str(tmp_path / "snapshot.json")
+    store = SnapshotStore(["VirtualMachine"])
+    store.replace("VirtualMachine", [SNAPSHOT_VM])
+    write_snapshot(
+        snapshot_file,
+        store.snapshot(host="https://test", api_version="kubevirt.io/v1"),
+    )
+
+    mocker.patch.object(AnsibleModule, "exit_json", exit_json)
+    get_api_client = mocker.patch.object(info, "get_api_client")
+    get_api_client.return_value.configuration.host = module_args.get(
+        "host", "https://test"
+    )
+    find = mocker.patch.object(
+        K8sService,
+        "find",
+        return_value={
+            "api_found": True,
+            "failed": False,
+            "resources": [],
+        },
+    )
+
+    with pytest.raises(AnsibleExitJson) as exc_info, patch_module_args(
+        module_args | {"snapshot_file": snapshot_file}
+    ):
+        kubevirt_vm_info.main()
+
+    if use_snapshot:
+        find.assert_not_called()
+        assert exc_info.value.args[0]["resources"] == [
+            {
+                "metadata": {
+                    "name": "testvm",
+                    "namespace": "default",
+                    "uid": "testvm-uid",
+                }
+            }
+        ]
+    else:
+        find.assert_called_once()